@@ -1,21 +1,34 @@
 # ai_agent.py
-import json
 import time
+import threading
 from typing import Optional, Dict, Any
 from web3 import Web3
 from web3.exceptions import ContractLogicError, BadFunctionCallOutput
 from utils.helpers import load_contract, get_gas_price
+from gas_engine import tx_fee_fields
+from utils import method_cache, gas_cache
+from utils.nonce_manager import get_nonce_manager
+from multicall import Batch, is_available as multicall_available
 from price_fetcher import get_price
 from telegram_notifier import send_alert
+from state_store import get_store, save_json_atomic
+from metrics import STAGE_SECONDS, HARVESTS
 
 WATCHERS_FILE = "watchers.json"
+PRICE_FEED_ABI_FILE = "abis/price_feed.json"
+DEFAULT_REWARD_DECIMALS = 18
 
 # Gas and retry defaults
 DEFAULT_GAS_ESTIMATE = 210000
 GAS_ESTIMATE_BUFFER = 1.2
 RETRY_GAS_BUMP_FACTOR = 1.25
+# Broadcast failures worth resending the same signed bytes for
+TRANSIENT_SEND_ERRORS = ("timeout", "timed out", "connection", "temporarily unavailable", "502", "503", "504")
 MAX_RETRIES = 3
 
+# Single serialized signer: evaluations may run concurrently, sends may not
+_signer_lock = threading.Lock()
+
 # Function name variants
 PENDING_FN_CANDIDATES = [
     ("pendingReward", ("pid", "address")),
@@ -36,12 +49,11 @@ HARVEST_FN_CANDIDATES = [
 # Helpers
 # -------------------------
 def save_watchers_state(watchers: list):
-    with open(WATCHERS_FILE, "w") as f:
-        json.dump(watchers, f, indent=2)
+    save_json_atomic(WATCHERS_FILE, watchers)
 
 def _call_read_safe(fn, *args):
     try:
-        return fn(*args)
+        return fn(*args).call()
     except (ContractLogicError, BadFunctionCallOutput, ValueError, TypeError):
         return None
     except Exception:
@@ -53,6 +65,21 @@ def _to_float_safe(value) -> float:
     except (TypeError, ValueError):
         return 0.0
 
+def _reward_units(raw, watcher: Dict[str, Any]) -> float:
+    """On-chain reward reads come back in base units; scale by the token decimals."""
+    decimals = int(watcher.get("rewardDecimals", DEFAULT_REWARD_DECIMALS))
+    return _to_float_safe(raw) / (10 ** decimals)
+
+def pending_probes(watcher: Dict[str, Any], wallet_address: str) -> list:
+    """(fn_name, args) for every pending-reward candidate, in priority order."""
+    probes = []
+    for fn_name, sig in PENDING_FN_CANDIDATES:
+        if "pid" in sig and "address" in sig:
+            probes.append((fn_name, (watcher.get("pid", 0), wallet_address)))
+        elif len(sig) == 0:
+            probes.append((fn_name, ()))
+    return probes
+
 # -------------------------
 # Detect pending reward
 # -------------------------
@@ -65,30 +92,96 @@ def detect_pending_reward(w3: Web3, contract, watcher: Dict[str, Any], wallet_ad
             "args": ()
         }
 
-    for fn_name, sig in PENDING_FN_CANDIDATES:
+    resolved = method_cache.lookup(contract, "pending")
+    if resolved:
+        args = method_cache.args_for(resolved["shape"], watcher, wallet_address)
+        fn = getattr(contract.functions, resolved["method"], None)
+        val = _call_read_safe(fn, *args) if fn else None
+        if val is not None:
+            return {"amount": _reward_units(val, watcher), "symbol": watcher.get("rewardToken"), "method": resolved["method"], "args": args}
+        # decode/revert failure: forget it and re-probe below
+        method_cache.invalidate(contract, "pending")
+
+    for fn_name, args in pending_probes(watcher, wallet_address):
         fn = getattr(contract.functions, fn_name, None)
         if not fn:
             continue
+        val = _call_read_safe(fn, *args)
+        if val is not None:
+            method_cache.record(contract, "pending", fn_name, method_cache.shape_of(args))
+            return {"amount": _reward_units(val, watcher), "symbol": watcher.get("rewardToken"), "method": fn_name, "args": args}
 
-        # pid + address signature
-        if "pid" in sig and "address" in sig:
-            pid = watcher.get("pid", 0)
-            val = _call_read_safe(fn, pid, wallet_address)
-            if val is not None:
-                return {"amount": _to_float_safe(val), "symbol": watcher.get("rewardToken"), "method": fn_name, "args": (pid, wallet_address)}
+    return {"amount": _to_float_safe(watcher.get("rewardAmount", 0.0)), "symbol": watcher.get("rewardToken"), "method": "none", "args": ()}
 
-        # no-arg
-        if len(sig) == 0:
-            val = _call_read_safe(fn)
-            if val is not None:
-                return {"amount": _to_float_safe(val), "symbol": watcher.get("rewardToken"), "method": fn_name, "args": ()}
+# -------------------------
+# Batched reads (Multicall3)
+# -------------------------
+def prefetch_reads(w3: Web3, watchers: list, wallet_address: str, feed_addresses=()) -> Dict[str, Dict[Any, Any]]:
+    """
+    Packs every watcher's pending-reward probes plus the Chainlink latestRoundData
+    reads into aggregate3 calls. Returns {"pending": {id(watcher): info}, "rounds": {feed: round}};
+    anything missing from the result is left for the per-watcher path.
+    """
+    out = {"pending": {}, "rounds": {}}
+    if not multicall_available(w3):
+        return out
+
+    batch = Batch(w3)
+    probes = {}
+    for watcher in watchers:
+        if watcher.get("rewardAmount") and watcher.get("rewardToken"):
+            continue
+        try:
+            contract = load_contract(w3, watcher["contract_address"], watcher["abi_file"])
+        except Exception:
+            continue
+        keys = []
+        resolved = method_cache.lookup(contract, "pending")
+        if resolved:
+            candidates = [(resolved["method"], method_cache.args_for(resolved["shape"], watcher, wallet_address))]
+        else:
+            candidates = pending_probes(watcher, wallet_address)
+        for i, (fn_name, args) in enumerate(candidates):
+            key = ("pending", id(watcher), i)
+            if batch.add(key, contract, fn_name, args):
+                keys.append((key, fn_name, args))
+        probes[id(watcher)] = (watcher, contract, keys)
+
+    for feed in feed_addresses:
+        try:
+            batch.add(("round", feed), load_contract(w3, feed, PRICE_FEED_ABI_FILE), "latestRoundData")
+        except Exception:
+            continue
 
-    return {"amount": _to_float_safe(watcher.get("rewardAmount", 0.0)), "symbol": watcher.get("rewardToken"), "method": "none", "args": ()}
+    try:
+        results = batch.execute()
+    except Exception as e:
+        print(f"[Multicall] batch read failed, falling back to per-watcher reads: {e}")
+        return out
+
+    for wid, (watcher, contract, keys) in probes.items():
+        for key, fn_name, args in keys:
+            ok, val = results.get(key, (False, None))
+            if ok:
+                method_cache.record(contract, "pending", fn_name, method_cache.shape_of(args))
+                out["pending"][wid] = {"amount": _reward_units(val, watcher), "symbol": watcher.get("rewardToken"), "method": fn_name, "args": args}
+                break
+
+    for feed in feed_addresses:
+        ok, val = results.get(("round", feed), (False, None))
+        if ok:
+            round_id, answer, started_at, updated_at, answered_in_round = val
+            out["rounds"][feed] = {"roundId": round_id, "answer": answer, "updatedAt": updated_at}
+    return out
 
 # -------------------------
 # Detect harvest function
 # -------------------------
 def detect_harvest_function(contract, watcher: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    resolved = method_cache.lookup(contract, "harvest")
+    if resolved and getattr(contract.functions, resolved["method"], None):
+        return {"name": resolved["method"], "args_signature": ("pid",) if resolved["shape"] == method_cache.SHAPE_PID else ()}
+
     for name, sig in HARVEST_FN_CANDIDATES:
         fn = getattr(contract.functions, name, None)
         if fn:
@@ -99,108 +192,211 @@ def detect_harvest_function(contract, watcher: Dict[str, Any]) -> Optional[Dict[
 # Transaction builder
 # -------------------------
 def build_tx_for_function(w3: Web3, contract, func_name: str, watcher: Dict[str, Any], public_address: str):
+    """
+    Resolve the call's argument shape and return (template, args). The template
+    carries from/to/data/value/chainId and a buffered gas limit; nonce and fee
+    fields are only added at send time, so the call is encoded exactly once.
+    """
     fn_obj = getattr(contract.functions, func_name, None)
     if fn_obj is None:
         raise ValueError(f"No function {func_name} found")
 
     pid = watcher.get("pid", None)
-    nonce = w3.eth.get_transaction_count(public_address)
 
-    # try no-arg first
-    try:
-        tx = fn_obj().build_transaction({
+    # try the argument shape that worked last time, then no-arg, then pid
+    shapes = [method_cache.SHAPE_NONE]
+    if pid is not None:
+        shapes.append(method_cache.SHAPE_PID)
+    resolved = method_cache.lookup(contract, "harvest")
+    if resolved and resolved["method"] == func_name and resolved["shape"] in shapes:
+        shapes.remove(resolved["shape"])
+        shapes.insert(0, resolved["shape"])
+
+    for shape in shapes:
+        args = method_cache.args_for(shape, watcher)
+        try:
+            data = contract.encodeABI(fn_name=func_name, args=list(args))
+            gas_key = gas_cache.key_for(contract, func_name, args)
+            estimate = gas_cache.get(gas_key)
+            if estimate is None:
+                # a revert here also rules the shape out
+                estimate = w3.eth.estimate_gas({"from": public_address, "to": contract.address, "data": data})
+                gas_cache.put(gas_key, estimate)
+        except Exception:
+            if resolved and resolved["shape"] == shape:
+                method_cache.invalidate(contract, "harvest")
+                resolved = None
+            continue
+        method_cache.record(contract, "harvest", func_name, shape)
+        template = {
             "from": public_address,
-            "nonce": nonce,
-            "gasPrice": w3.eth.gas_price
-        })
-        return tx, ()
-    except Exception:
-        if pid is not None:
-            try:
-                tx = fn_obj(pid).build_transaction({
-                    "from": public_address,
-                    "nonce": nonce,
-                    "gasPrice": w3.eth.gas_price
-                })
-                return tx, (pid,)
-            except Exception:
-                pass
+            "to": contract.address,
+            "data": data,
+            "value": 0,
+            "chainId": w3.eth.chain_id,  # permanent entry in the RPC cache
+            "gas": int(estimate * GAS_ESTIMATE_BUFFER),
+        }
+        return template, args
     raise ValueError(f"Could not build tx for {func_name}")
 
-def estimate_gas_for_tx(w3: Web3, tx: dict) -> int:
-    try:
-        return int(w3.eth.estimate_gas(tx) * GAS_ESTIMATE_BUFFER)
-    except Exception:
-        return DEFAULT_GAS_ESTIMATE
-
-def compute_gas_cost_usd(gas_gwei: float, gas_limit: int) -> float:
-    matic_price = get_price("MATIC")
+def compute_gas_cost_usd(gas_gwei: float, gas_limit: int, matic_price: Optional[float] = None) -> float:
+    if matic_price is None:
+        matic_price = get_price("MATIC")
     return (gas_gwei * 1e-9) * gas_limit * matic_price
 
 # -------------------------
 # Harvest decision
 # -------------------------
+# The rules are plain comparisons so backtest.py can apply them to NumPy
+# arrays of parameter combinations as well as to the scalars used here.
+def gas_within_cap(gas_gwei, absolute_max_gas_gwei):
+    return gas_gwei <= absolute_max_gas_gwei
+
+
+def reward_above_min(reward_usd, min_reward_usd):
+    return reward_usd >= min_reward_usd
+
+
+def profit_ratio_ok(reward_usd, gas_cost_usd, profit_multiplier):
+    return (reward_usd - gas_cost_usd) >= gas_cost_usd * (profit_multiplier - 1)
+
+
+def harvest_rule(reward_usd, gas_cost_usd, gas_gwei, profit_multiplier, absolute_max_gas_gwei):
+    """True where decide_to_harvest would say "ok" (given a usable MATIC price)."""
+    return (gas_within_cap(gas_gwei, absolute_max_gas_gwei)
+            & profit_ratio_ok(reward_usd, gas_cost_usd, profit_multiplier))
+
+
+# Skips that a combined (batched) harvest can overturn
+BATCHABLE_REASONS = ("reward_below_auto_min", "profit_ratio_too_low")
+
+
+def is_batch_candidate(decision: Dict[str, Any]) -> bool:
+    return decision["should"] or decision["reason"].startswith(BATCHABLE_REASONS)
+
+
 def decide_to_harvest(watcher: Dict[str, Any], pending_info: Dict[str, Any], gas_gwei: float, gas_limit: int, config: Dict[str, Any]) -> Dict[str, Any]:
     reward_amount = _to_float_safe(pending_info.get("amount", 0.0))
     reward_token = pending_info.get("symbol", watcher.get("rewardToken", "MATIC"))
-    token_price = get_price(reward_token) or 0.0
+    with STAGE_SECONDS.time(stage="price_lookup"):
+        token_price = get_price(reward_token) or 0.0
     reward_usd = reward_amount * token_price
     gas_cost_usd = compute_gas_cost_usd(gas_gwei, gas_limit)
+    profit_multiplier = config.get("profit_multiplier", 2.0)
+    # gas-scaled floor from config.json's auto_profiler block (bot.cycle_config); None when it is off
+    auto_min_reward_usd = config.get("auto_min_reward_usd")
+    # reward at which every rule passes (the scheduler aims for it)
+    required_reward_usd = max(auto_min_reward_usd or 0.0, gas_cost_usd * profit_multiplier)
+    expected_profit = reward_usd - gas_cost_usd
 
-    if gas_gwei > config.get("absolute_max_gas_gwei", 600):
-        return {"should": False, "reason": f"gas_above_absolute_max ({gas_gwei} gwei)", "expected_profit_usd": reward_usd, "gas_cost_usd": gas_cost_usd}
+    def result(should, reason, expected_profit_usd, required=required_reward_usd):
+        return {"should": should, "reason": reason, "expected_profit_usd": expected_profit_usd, "gas_cost_usd": gas_cost_usd,
+                "reward_amount": reward_amount, "reward_usd": reward_usd, "required_reward_usd": required}
 
-    expected_profit = reward_usd - gas_cost_usd
-    profit_multiplier = config.get("profit_multiplier", 2.0)
-    if expected_profit < (gas_cost_usd * (profit_multiplier - 1)):
-        return {"should": False, "reason": f"profit_ratio_too_low (exp_profit=${expected_profit:.4f})", "expected_profit_usd": expected_profit, "gas_cost_usd": gas_cost_usd}
+    # prices are served from cache without blocking; until the first fetch lands
+    # a 0.0 MATIC price would make gas look free
+    if get_price("MATIC") <= 0:
+        return result(False, "price_unavailable (MATIC)", 0.0, required=None)
 
-    return {"should": True, "reason": "ok", "expected_profit_usd": expected_profit, "gas_cost_usd": gas_cost_usd}
+    if not gas_within_cap(gas_gwei, config.get("absolute_max_gas_gwei", 600)):
+        return result(False, f"gas_above_absolute_max ({gas_gwei} gwei)", reward_usd, required=None)
+
+    if auto_min_reward_usd is not None and not reward_above_min(reward_usd, auto_min_reward_usd):
+        return result(False, f"reward_below_auto_min (${reward_usd:.4f} < ${auto_min_reward_usd:.2f})", expected_profit)
+
+    if not profit_ratio_ok(reward_usd, gas_cost_usd, profit_multiplier):
+        return result(False, f"profit_ratio_too_low (exp_profit=${expected_profit:.4f})", expected_profit)
+
+    return result(True, "ok", expected_profit)
 
 # -------------------------
 # Send transaction
 # -------------------------
-def send_tx_with_retries(w3: Web3, contract, watcher: Dict[str, Any], public_address: str, private_key: str, func_name: str, func_args: tuple, gas_price_gwei: float, gas_limit: int):
-    fn_obj = getattr(contract.functions, func_name)
-    call_obj = fn_obj(*func_args) if func_args else fn_obj()
-    local_gas_price = gas_price_gwei
-    local_gas_limit = gas_limit
-
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            nonce = w3.eth.get_transaction_count(public_address)
-            tx = call_obj.build_transaction({
-                "from": public_address,
-                "nonce": nonce,
-                "gasPrice": int(local_gas_price * 1e9),
-                "gas": local_gas_limit
-            })
-            signed = w3.eth.account.sign_transaction(tx, private_key)
-            tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
-            send_alert(f"✅ {watcher.get('name')} harvested: {tx_hash.hex()}")
-            return tx_hash.hex()
-        except Exception as e:
-            errstr = str(e).lower()
-            if "replacement transaction" in errstr or "nonce" in errstr:
-                local_gas_price *= RETRY_GAS_BUMP_FACTOR
-                local_gas_limit = int(local_gas_limit * 1.05)
-                time.sleep(1 + attempt)
-                continue
-            send_alert(f"❌ {watcher.get('name')} send_tx failed: {e}")
-            raise
+def build_tx_template(w3: Web3, contract, func_name: str, func_args: tuple, public_address: str, gas_limit: int) -> Dict[str, Any]:
+    return {
+        "from": public_address,
+        "to": contract.address,
+        "data": contract.encodeABI(fn_name=func_name, args=list(func_args)),
+        "value": 0,
+        "chainId": w3.eth.chain_id,
+        "gas": gas_limit,
+    }
+
+
+def send_tx_with_retries(w3: Web3, contract, watcher: Dict[str, Any], public_address: str, private_key: str, func_name: str, func_args: tuple, gas_price_gwei: float, gas_limit: int, fees: Optional[Dict[str, Any]] = None, template: Optional[Dict[str, Any]] = None, sent: Optional[Dict[str, Any]] = None):
+    """
+    Sign and broadcast from a prebuilt template (nonce and fees are the only
+    per-send fields). The raw tx is re-signed only when the nonce or the fee
+    bump changes; transient broadcast errors resend the same bytes. When `sent`
+    is given it receives the unsigned tx that went out (for tx_tracker replacements).
+    Alerts are left to the caller: a broadcast is not a harvest yet.
+    """
+    template = dict(template or build_tx_template(w3, contract, func_name, func_args, public_address, gas_limit))
+    template["gas"] = gas_limit
+    # gas engine suggestion (EIP-1559 when the node supports it), else legacy gasPrice
+    fees = fees or {"eip1559": False, "gas_price_gwei": gas_price_gwei}
+    bump = 1.0
+
+    nonces = get_nonce_manager(w3, public_address)
+
+    with _signer_lock:
+        nonce = nonces.allocate()
+        signed, signed_for = None, None
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                if signed_for != (nonce, bump, template["gas"]):
+                    tx = {**template, "nonce": nonce, **tx_fee_fields(fees, bump)}
+                    tx.pop("from", None)
+                    signed = w3.eth.account.sign_transaction(tx, private_key)
+                    signed_for = (nonce, bump, template["gas"])
+                tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
+                if sent is not None:
+                    sent.update(tx=tx, fees=fees, bump=bump)
+                return tx_hash.hex()
+            except Exception as e:
+                errstr = str(e).lower()
+                if signed is not None and ("already known" in errstr or "known transaction" in errstr):
+                    # an earlier attempt did reach the pool
+                    if sent is not None:
+                        sent.update(tx=tx, fees=fees, bump=bump)
+                    return signed.hash.hex()
+                if "nonce too low" in errstr or "invalid transaction nonce" in errstr:
+                    # someone (or a dropped/replaced tx) moved the chain on; resync
+                    nonces.reconcile()
+                    nonce = nonces.allocate()
+                    continue
+                if "replacement transaction" in errstr or "nonce" in errstr:
+                    bump *= RETRY_GAS_BUMP_FACTOR
+                    template["gas"] = int(template["gas"] * 1.05)
+                    time.sleep(1 + attempt)
+                    continue
+                if signed is not None and any(marker in errstr for marker in TRANSIENT_SEND_ERRORS):
+                    time.sleep(attempt)
+                    continue
+                nonces.release(nonce)
+                raise
+        nonces.release(nonce)
     raise RuntimeError("Max retries hit while sending tx")
 
 # -------------------------
-# Main analyze & act
+# Evaluate (read/decide) — safe to run concurrently
 # -------------------------
-def analyze_and_act(w3: Web3, watcher: Dict[str, Any], public_address: str, private_key: str, config: Dict[str, Any]) -> Optional[str]:
+def evaluate_watcher(w3: Web3, watcher: Dict[str, Any], public_address: str, config: Dict[str, Any], pending: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Read-only phase: returns a harvest plan, or None when there is nothing to send.
+    With config["batch"], plans whose decision failed only on size are returned too
+    (plan["decision"]["should"] is False) so they can join a batched harvest.
+    """
     try:
-        contract = load_contract(w3, watcher["contract_address"], watcher["abi_file"])
+        with STAGE_SECONDS.time(stage="contract_load"):
+            contract = load_contract(w3, watcher["contract_address"], watcher["abi_file"])
     except Exception as e:
         watcher["last_error"] = f"load_contract_failed: {e}"
         return None
 
-    pending = detect_pending_reward(w3, contract, watcher, public_address)
+    if pending is None:
+        with STAGE_SECONDS.time(stage="reward_read"):
+            pending = detect_pending_reward(w3, contract, watcher, public_address)
     harvest_info = detect_harvest_function(contract, watcher)
     if not harvest_info:
         watcher["last_error"] = "no_harvest_function_found"
@@ -208,45 +404,87 @@ def analyze_and_act(w3: Web3, watcher: Dict[str, Any], public_address: str, priv
 
     func_name = harvest_info["name"]
     try:
-        tx_template, used_args = build_tx_for_function(w3, contract, func_name, watcher, public_address)
-        gas_limit = estimate_gas_for_tx(w3, tx_template)
+        with STAGE_SECONDS.time(stage="build_estimate"):
+            tx_template, used_args = build_tx_for_function(w3, contract, func_name, watcher, public_address)
+        gas_limit = tx_template["gas"]
     except Exception as e:
         watcher["last_error"] = f"build_tx_error: {e}"
         return None
 
-    gas_price_gwei = get_gas_price(w3)
-    decision = decide_to_harvest(watcher, pending, gas_price_gwei, gas_limit, config)
+    # bot.py samples the gas engine once per cycle; fall back to eth_gasPrice
+    fees = config.get("gas")
+    gas_price_gwei = fees["effective_gwei"] if fees else get_gas_price(w3)
+    with STAGE_SECONDS.time(stage="decide"):
+        decision = decide_to_harvest(watcher, pending, gas_price_gwei, gas_limit, config)
 
     if not decision["should"]:
         watcher["last_decision"] = decision
-        return None
+        # too small alone, but batch_executor may still include it in a combined harvest
+        # (only permissionless harvests: through the aggregator a per-user claim pays the aggregator)
+        if not (config.get("batch") and watcher.get("permissionless_harvest") and is_batch_candidate(decision)):
+            return None
+
+    return {
+        "contract": contract,
+        "func_name": func_name,
+        "args": used_args,
+        "gas_price_gwei": gas_price_gwei,
+        "fees": fees,
+        "gas_limit": gas_limit,
+        "tx": tx_template,
+        "pending": pending,
+        "decision": decision,
+    }
 
+# -------------------------
+# Execute (send) — serialized through the signer lock
+# -------------------------
+def execute_plan(w3: Web3, watcher: Dict[str, Any], plan: Dict[str, Any], public_address: str, private_key: str,
+                 tracker=None) -> Optional[str]:
+    """
+    Broadcast a planned harvest. With a tx_tracker the send returns right away
+    and last_harvest is stamped (and the success alert sent) by the tracker once
+    the receipt is in.
+    """
     try:
-        tx_hash = send_tx_with_retries(
-            w3, contract, watcher, public_address, private_key, func_name, used_args, gas_price_gwei, gas_limit
-        )
-        watcher["last_harvest"] = time.time()
+        sent = {} if tracker else None
+        with STAGE_SECONDS.time(stage="send"):
+            tx_hash = send_tx_with_retries(
+                w3, plan["contract"], watcher, public_address, private_key,
+                plan["func_name"], plan["args"], plan["gas_price_gwei"], plan["gas_limit"], plan.get("fees"),
+                template=plan.get("tx"), sent=sent,
+            )
+        HARVESTS.inc(outcome="sent")
+        if tracker:
+            tracker.track([(watcher, plan)], tx_hash, sent)
+        else:
+            # fire-and-forget: the broadcast is all we will know
+            watcher["last_harvest"] = time.time()
+            send_alert(f"✅ {watcher.get('name')} harvested: {tx_hash}")
         watcher.pop("last_error", None)
         watcher.pop("last_decision", None)
 
-        # persist watchers.json
+        # persist this watcher's state only (one indexed row)
         try:
-            with open(WATCHERS_FILE, "r") as f:
-                watchers = json.load(f)
-            updated = False
-            for w in watchers:
-                if w.get("contract_address") == watcher.get("contract_address") and w.get("name") == watcher.get("name"):
-                    w.update(watcher)
-                    updated = True
-                    break
-            if not updated:
-                watchers.append(watcher)
-            save_watchers_state(watchers)
-        except Exception:
-            pass
+            get_store().update(watcher)
+        except Exception as e:
+            print(f"[StateStore] Failed to persist {watcher.get('name')}: {e}")
 
         return tx_hash
     except Exception as e:
         watcher["last_error"] = f"send_tx_failed: {e}"
+        HARVESTS.inc(outcome="send_failed")
+        if "revert" in str(e).lower():
+            method_cache.invalidate(plan["contract"], "harvest")
+            gas_cache.invalidate(gas_cache.key_for(plan["contract"], plan["func_name"], plan["args"]))
         send_alert(f"❌ {watcher.get('name')} send_tx failed: {e}")
         return None
+
+# -------------------------
+# Main analyze & act
+# -------------------------
+def analyze_and_act(w3: Web3, watcher: Dict[str, Any], public_address: str, private_key: str, config: Dict[str, Any]) -> Optional[str]:
+    plan = evaluate_watcher(w3, watcher, public_address, config)
+    if not plan:
+        return None
+    return execute_plan(w3, watcher, plan, public_address, private_key)
@@ -0,0 +1,226 @@
+# analytics.py
+import os
+import glob
+import sqlite3
+import datetime
+from threading import Lock
+from typing import Optional
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from profit_ledger import get_ledger, COLUMNS, CSV_TIME_FORMAT
+
+FRAME_DTYPES = {
+    "protocol": "category",
+    "watcher": "category",
+    "reward_token": "category",
+    "profit_usd": "float64",
+    "gas_cost_usd": "float64",
+    "reward_amount": "float64",
+    "tx_hash": "object",
+}
+
+# profit_logger CSV header -> ledger column
+CSV_COLUMNS = {"name": "watcher", "timestamp": "ts"}
+
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    for col, dtype in FRAME_DTYPES.items():
+        if col not in df:
+            df[col] = pd.Series(index=df.index, dtype="float64" if dtype == "float64" else "object")
+        df[col] = df[col].astype(dtype)
+    return df[list(COLUMNS)]
+
+
+def _concat(frames) -> pd.DataFrame:
+    # union_categoricals keeps the category dtypes instead of falling back to object
+    out = {}
+    for col in frames[0].columns:
+        parts = [f[col] for f in frames]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            out[col] = pd.Categorical(union_categoricals([p.array for p in parts]))
+        else:
+            out[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(out)
+
+
+class _FrameCache:
+    """
+    Ledger rows already converted to a frame. Each load only reads rows with a
+    higher rowid than last time, so repeated reports cost a vectorized mask
+    over memory instead of a full table scan. CSVs are re-read only when
+    their mtime/size changes.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.path = None
+        self.last_id = 0
+        self.frame = None
+        self.hashes = set()
+        self.csv = {}  # path -> ((mtime, size), frame)
+
+    def ledger_frame(self) -> pd.DataFrame:
+        ledger = get_ledger()
+        ledger.flush()
+        with self.lock:
+            if self.path != ledger.path:
+                self.path, self.last_id, self.frame, self.hashes = ledger.path, 0, None, set()
+            # a separate read-only connection; WAL lets it run alongside the writer
+            with sqlite3.connect(f"file:{ledger.path}?mode=ro", uri=True) as conn:
+                new = pd.read_sql_query(
+                    f"SELECT id, {', '.join(COLUMNS)} FROM profits WHERE id > ? ORDER BY id",
+                    conn, params=(self.last_id,),
+                )
+            if len(new) or self.frame is None:
+                if len(new):
+                    self.last_id = int(new["id"].iloc[-1])
+                new["ts"] = pd.to_datetime(new["ts"], unit="s", utc=True)
+                new = _typed(new)
+                self.hashes.update(new["tx_hash"].dropna())
+                self.frame = new if self.frame is None else _concat([self.frame, new])
+            return self.frame
+
+    def csv_frame(self, path: str) -> pd.DataFrame:
+        stat = os.stat(path)
+        key = (stat.st_mtime, stat.st_size)
+        with self.lock:
+            cached = self.csv.get(path)
+            if cached and cached[0] == key:
+                return cached[1]
+        df = pd.read_csv(path).rename(columns=CSV_COLUMNS)
+        # profit_logger wrote local wall-clock time
+        local_tz = datetime.datetime.now().astimezone().tzinfo
+        df["ts"] = pd.to_datetime(df["ts"], format=CSV_TIME_FORMAT, errors="coerce").dt.tz_localize(local_tz).dt.tz_convert("UTC")
+        df = _typed(df)
+        with self.lock:
+            self.csv[path] = (key, df)
+        return df
+
+
+_cache = _FrameCache()
+
+
+def _csv_history(logs_dir: str) -> Optional[pd.DataFrame]:
+    frames = [
+        _cache.csv_frame(path)
+        for path in sorted(glob.glob(os.path.join(logs_dir, "profit_log*.csv")))
+        if os.path.getsize(path) > 0
+    ]
+    return _concat(frames) if frames else None
+
+
+def _between(df: pd.DataFrame, start: Optional[float], end: Optional[float]) -> pd.DataFrame:
+    ts = df["ts"].to_numpy(dtype="datetime64[ns]")
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= ts >= np.datetime64(int(start * 1e9), "ns")
+    if end is not None:
+        mask &= ts < np.datetime64(int(end * 1e9), "ns")
+    return df[mask]
+
+
+def load_history(start: Optional[float] = None, end: Optional[float] = None,
+                 logs_dir: str = "logs", include_csv: bool = True) -> pd.DataFrame:
+    """
+    Profit history as one typed frame: the ledger plus (optionally) any legacy
+    profit_log CSVs that were never ingested. start/end are unix seconds.
+    """
+    df = _cache.ledger_frame()
+    if include_csv:
+        csv_df = _csv_history(logs_dir)
+        if csv_df is not None and len(csv_df):
+            # rows imported into the ledger also still sit in their CSV
+            ledger_hashes, seen = _cache.hashes, set()
+            keep = np.ones(len(csv_df), dtype=bool)
+            for i, tx_hash in enumerate(csv_df["tx_hash"].tolist()):
+                if isinstance(tx_hash, str):
+                    keep[i] = tx_hash not in ledger_hashes and tx_hash not in seen
+                    seen.add(tx_hash)
+            csv_df = csv_df[keep]
+            if len(csv_df):
+                df = _concat([df, csv_df])
+    return _between(df, start, end).reset_index(drop=True)
+
+
+def window(df: pd.DataFrame, hours: float, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """Rows from the last `hours` of an already loaded frame."""
+    now = now or pd.Timestamp.now(tz="UTC")
+    return _between(df, (now - pd.Timedelta(hours=hours)).timestamp(), None)
+
+
+def rollup(df: pd.DataFrame, by: str = "protocol", percentiles=(0.5, 0.9)) -> pd.DataFrame:
+    """
+    Per-group profit, gas spend, ROI, harvest frequency and profit percentiles,
+    all computed with grouped/vectorized ops.
+    """
+    pct_cols = [f"profit_p{int(p * 100)}" for p in percentiles]
+    if df.empty:
+        return pd.DataFrame(columns=["harvests", "profit_usd", "gas_cost_usd", "roi",
+                                     "harvests_per_day", "mean_interval_h"] + pct_cols)
+
+    codes, keys = pd.factorize(df[by], sort=False)
+    valid = codes >= 0
+    codes = codes[valid]
+    n = len(keys)
+    profit = df["profit_usd"].to_numpy(dtype="float64", na_value=0.0)[valid]
+    gas = df["gas_cost_usd"].to_numpy(dtype="float64", na_value=0.0)[valid]
+    ts = df["ts"].to_numpy(dtype="datetime64[ns]").astype("int64")[valid] / 1e9
+
+    harvests = np.bincount(codes, minlength=n)
+    profit_sum = np.bincount(codes, weights=profit, minlength=n)
+    gas_sum = np.bincount(codes, weights=gas, minlength=n)
+    # one sort by (group, profit): groups become contiguous slices for both
+    # the first/last timestamps and the percentiles
+    order = np.lexsort((profit, codes))
+    starts = np.concatenate(([0], np.cumsum(harvests)[:-1]))
+    sorted_ts = ts[order]
+    span_days = (np.maximum.reduceat(sorted_ts, starts) - np.minimum.reduceat(sorted_ts, starts)) / 86400
+
+    nan = np.full(n, np.nan)
+    out = pd.DataFrame({
+        "harvests": harvests,
+        "profit_usd": profit_sum,
+        "gas_cost_usd": gas_sum,
+        "roi": np.divide(profit_sum, gas_sum, out=nan.copy(), where=gas_sum > 0),
+        "harvests_per_day": np.divide(harvests, span_days, out=nan.copy(), where=span_days > 0),
+        "mean_interval_h": np.divide(span_days * 24, harvests - 1, out=nan.copy(), where=harvests > 1),
+    }, index=pd.Index(keys, name=by))
+
+    sorted_profit = profit[order]
+    for col, p in zip(pct_cols, percentiles):
+        pos = starts + p * (harvests - 1)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, starts + harvests - 1)
+        frac = pos - lo
+        out[col] = sorted_profit[lo] * (1 - frac) + sorted_profit[hi] * frac
+    return out.sort_values("profit_usd", ascending=False)
+
+
+def daily_summary(hours: float = 24, logs_dir: str = "logs") -> str:
+    """Telegram-ready summary of the last `hours` built from the rollups."""
+    now = pd.Timestamp.now(tz="UTC")
+    df = load_history(start=(now - pd.Timedelta(hours=hours)).timestamp(), logs_dir=logs_dir)
+    lines = [f"📊 Profit summary, last {hours:g}h ({now.strftime('%Y-%m-%d %H:%M')} UTC)"]
+    if df.empty:
+        lines.append("No harvests recorded.")
+        return "\n".join(lines)
+
+    lines.append(f"Harvests: {len(df)} | Profit: ${df['profit_usd'].sum():.2f} | Gas: ${df['gas_cost_usd'].sum():.2f}")
+    for protocol, row in rollup(df, by="protocol").iterrows():
+        roi = f"{row['roi']:.1f}x" if pd.notna(row["roi"]) else "n/a"
+        lines.append(f"• {protocol}: {int(row['harvests'])} harvests, ${row['profit_usd']:.2f} profit, "
+                     f"${row['gas_cost_usd']:.2f} gas, ROI {roi}, p50 ${row['profit_p50']:.2f}")
+    top = rollup(df, by="watcher").head(3)
+    lines.append("Top watchers: " + ", ".join(f"{w} (${p:.2f})" for w, p in top["profit_usd"].items()))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python analytics.py [protocol|watcher|reward_token] [days]
+    import sys
+    import time
+    by = sys.argv[1] if len(sys.argv) > 1 else "protocol"
+    days = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(rollup(load_history(start=time.time() - days * 86400 if days else None), by=by))
@@ -0,0 +1,176 @@
+# batch_executor.py
+"""
+Batched harvests: the cycle's harvest calls go out as one aggregate3
+transaction through an aggregator contract, so the 21k base cost, signing
+and broadcast are paid once.
+
+Inside the batch the aggregator is msg.sender. The farms in abis/ are
+per-user MasterChef / gauge contracts whose harvest(pid) / claimRewards()
+pays whoever calls it, so through an aggregator they would claim the
+aggregator's (empty) position while the bot's pending reward priced the
+batch. Only watchers marked "permissionless_harvest": true in watchers.json
+(keeper-style harvests that pay out the same whoever calls them) are
+batched; everything else is sent from the bot's own address.
+"""
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from web3 import Web3
+from utils.helpers import load_contract
+from utils import method_cache
+from multicall import MULTICALL3_ABI_FILE
+from price_fetcher import get_price
+from state_store import get_store
+from telegram_notifier import send_alert
+from ai_agent import (
+    send_tx_with_retries, compute_gas_cost_usd, harvest_rule, reward_above_min,
+    GAS_ESTIMATE_BUFFER,
+)
+
+# aggregate3-compatible contract the harvests are routed through
+BATCH_EXECUTOR_ADDRESS = os.getenv("BATCH_EXECUTOR_ADDRESS")
+BATCH_HARVEST = os.getenv("BATCH_HARVEST", "false").lower() == "true"
+BATCH_MAX_CALLS = int(os.getenv("BATCH_MAX_CALLS", 20))
+# Rough per-call cost of the aggregator loop, used only to pick candidates;
+# the final check uses a real estimate of the whole batch
+BATCH_CALL_OVERHEAD_GAS = int(os.getenv("BATCH_CALL_OVERHEAD_GAS", 8000))
+BASE_TX_GAS = 21000
+
+Pair = Tuple[Dict[str, Any], Dict[str, Any]]  # (watcher, plan)
+
+
+def is_batchable(watcher: Dict[str, Any]) -> bool:
+    """Whether the watcher's harvest pays out the same when sent through the aggregator."""
+    return bool(watcher.get("permissionless_harvest"))
+
+
+def decide_batch(plans: List[Dict[str, Any]], gas_gwei: float, gas_limit: int, config: Dict[str, Any]) -> Dict[str, Any]:
+    """decide_to_harvest's rules applied to the combined reward against the batch's gas."""
+    reward_usd = sum(p["decision"]["reward_usd"] for p in plans)
+    gas_cost_usd = compute_gas_cost_usd(gas_gwei, gas_limit)
+    expected_profit = reward_usd - gas_cost_usd
+    if get_price("MATIC") <= 0:
+        should, reason = False, "price_unavailable (MATIC)"
+    else:
+        should = bool(harvest_rule(reward_usd, gas_cost_usd, gas_gwei,
+                                   config.get("profit_multiplier", 2.0), config.get("absolute_max_gas_gwei", 600)))
+        if config.get("auto_min_reward_usd") is not None:
+            should = should and reward_above_min(reward_usd, config["auto_min_reward_usd"])
+        reason = "ok" if should else f"batch_not_profitable (reward=${reward_usd:.4f}, gas=${gas_cost_usd:.4f})"
+    return {"should": should, "reason": reason, "calls": len(plans), "reward_usd": reward_usd,
+            "gas_cost_usd": gas_cost_usd, "expected_profit_usd": expected_profit, "gas_limit": gas_limit}
+
+
+def _marginal_gas(plan: Dict[str, Any]) -> int:
+    return max(0, int(plan["gas_limit"] / GAS_ESTIMATE_BUFFER) - BASE_TX_GAS) + BATCH_CALL_OVERHEAD_GAS
+
+
+def select(pairs: List[Pair], gas_gwei: float, config: Dict[str, Any]) -> List[Pair]:
+    """
+    Candidates whose reward covers their own marginal gas, best reward-per-gas
+    first, trimmed from the weak end until the combined decision passes.
+    """
+    def marginal_cost(plan):
+        return compute_gas_cost_usd(gas_gwei, _marginal_gas(plan))
+
+    ranked = sorted(
+        (pair for pair in pairs if pair[1]["decision"].get("reward_usd", 0) > marginal_cost(pair[1])),
+        key=lambda pair: pair[1]["decision"]["reward_usd"] / max(1, _marginal_gas(pair[1])),
+        reverse=True,
+    )[:BATCH_MAX_CALLS]
+    while len(ranked) >= 2:
+        gas = BASE_TX_GAS + sum(_marginal_gas(p) for _, p in ranked)
+        if decide_batch([p for _, p in ranked], gas_gwei, gas, config)["should"]:
+            return ranked
+        ranked.pop()
+    return []
+
+
+class BatchExecutor:
+    def __init__(self, w3: Web3, address: str):
+        self.w3 = w3
+        self.address = Web3.to_checksum_address(address)
+
+    @property
+    def contract(self):
+        return load_contract(self.w3, self.address, MULTICALL3_ABI_FILE)
+
+    @staticmethod
+    def _call(plan: Dict[str, Any]):
+        contract = plan["contract"]
+        return (contract.address, True, contract.encodeABI(fn_name=plan["func_name"], args=list(plan["args"])))
+
+    def simulate(self, pairs: List[Pair], public_address: str) -> List[Pair]:
+        """eth_call the batch and keep only the calls that would succeed."""
+        results = self.contract.functions.aggregate3([self._call(p) for _, p in pairs]).call({"from": public_address})
+        ok = []
+        for (watcher, plan), (success, _) in zip(pairs, results):
+            if success:
+                ok.append((watcher, plan))
+            else:
+                watcher["last_error"] = "batch_call_reverted"
+                method_cache.invalidate(plan["contract"], "harvest")
+        return ok
+
+    def execute(self, pairs: List[Pair], public_address: str, private_key: str,
+                config: Dict[str, Any], tracker=None) -> Dict[int, str]:
+        """
+        Harvest what is worth it as one transaction. Returns {id(watcher): tx_hash}
+        for the watchers included; an empty dict means nothing was batched and the
+        caller should send the individually profitable plans itself. With a
+        tx_tracker, last_harvest is stamped when the receipt comes back.
+        """
+        pairs = [(w, p) for w, p in pairs if p.get("decision") and is_batchable(w)]
+        if len(pairs) < 2:
+            return {}
+        gas_gwei = pairs[0][1]["gas_price_gwei"]
+        chosen = select(pairs, gas_gwei, config)
+        if len(chosen) < 2:
+            return {}
+
+        chosen = self.simulate(chosen, public_address)
+        if len(chosen) < 2:
+            return {}
+        calls = [self._call(p) for _, p in chosen]
+        gas_limit = int(self.contract.functions.aggregate3(calls).estimate_gas({"from": public_address}) * GAS_ESTIMATE_BUFFER)
+        decision = decide_batch([p for _, p in chosen], gas_gwei, gas_limit, config)
+        if not decision["should"]:
+            print(f"[Batch] {len(chosen)} calls skipped: {decision['reason']}")
+            return {}
+
+        label = {"name": f"batch harvest ({len(chosen)}: {', '.join(w.get('name', '?') for w, _ in chosen)})"}
+        sent = {} if tracker else None
+        tx_hash = send_tx_with_retries(
+            self.w3, self.contract, label, public_address, private_key,
+            "aggregate3", (calls,), gas_gwei, gas_limit, chosen[0][1].get("fees"), sent=sent,
+        )
+        if tracker:
+            tracker.track(chosen, tx_hash, sent)
+        else:
+            send_alert(f"✅ {label['name']} harvested: {tx_hash}")
+        now = time.time()
+        for watcher, plan in chosen:
+            if not tracker:
+                watcher["last_harvest"] = now
+            watcher.pop("last_error", None)
+            watcher.pop("last_decision", None)
+        try:
+            get_store().update_many([w for w, _ in chosen])
+        except Exception as e:
+            print(f"[StateStore] Failed to persist batch state: {e}")
+        print(f"[Batch] {len(chosen)} harvests in one tx {tx_hash}: reward ${decision['reward_usd']:.4f}, "
+              f"gas ${decision['gas_cost_usd']:.4f}")
+        return {id(w): tx_hash for w, _ in chosen}
+
+
+def get_batch_executor(w3: Web3) -> Optional[BatchExecutor]:
+    """The executor when BATCH_HARVEST is on and BATCH_EXECUTOR_ADDRESS has code."""
+    if not BATCH_HARVEST:
+        return None
+    if not BATCH_EXECUTOR_ADDRESS:
+        print("[Batch] BATCH_HARVEST is set but BATCH_EXECUTOR_ADDRESS is not; batching disabled")
+        return None
+    if len(w3.eth.get_code(Web3.to_checksum_address(BATCH_EXECUTOR_ADDRESS))) == 0:
+        print(f"[Batch] No contract at {BATCH_EXECUTOR_ADDRESS}; batching disabled")
+        return None
+    return BatchExecutor(w3, BATCH_EXECUTOR_ADDRESS)
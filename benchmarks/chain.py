@@ -0,0 +1,138 @@
+# benchmarks/chain.py
+"""
+Local simulated chain for the benchmarks: an eth-tester (py-evm) backend
+served as a plain HTTP JSON-RPC endpoint, so the bot talks to it through
+the same RPCPoolProvider it uses against Polygon.
+"""
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections.abc import Mapping
+from typing import Any, Dict, List
+from web3 import Web3, EthereumTesterProvider
+from eth_account import Account
+
+CONTRACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "contracts")
+CLONE_BATCH = 200  # CloneFactory.clone's DynArray bound
+
+
+def _to_rpc(value):
+    """eth-tester hands back Python ints/bytes/tuples; JSON-RPC wants hex quantities and data."""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if isinstance(value, Mapping):
+        return {k: _to_rpc(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_rpc(v) for v in value]
+    return value
+
+
+def compile_contract(name: str) -> Dict[str, Any]:
+    import vyper
+    with open(os.path.join(CONTRACTS_DIR, f"{name}.vy")) as f:
+        return vyper.compile_code(f.read(), output_formats=["abi", "bytecode"])
+
+
+class SimulatedChain:
+    """eth-tester chain plus a JSON-RPC server on 127.0.0.1; every request is serialised (py-evm is not thread-safe)."""
+
+    def __init__(self):
+        self.w3 = Web3(EthereumTesterProvider())
+        self.tester = self.w3.provider.ethereum_tester
+        self.deployer = self.w3.eth.accounts[0]
+        self._request = self.w3.provider.request_func(self.w3, self.w3.middleware_onion)
+        self._lock = threading.Lock()
+        self._server = None
+        self.requests = 0
+        self._compiled = {}
+
+    # ---- contracts ----
+    def _contract(self, name: str):
+        if name not in self._compiled:
+            self._compiled[name] = compile_contract(name)
+        out = self._compiled[name]
+        return self.w3.eth.contract(abi=out["abi"], bytecode=out["bytecode"])
+
+    def deploy(self, name: str, *args):
+        factory = self._contract(name)
+        tx_hash = factory.constructor(*args).transact({"from": self.deployer})
+        address = self.w3.eth.get_transaction_receipt(tx_hash)["contractAddress"]
+        return self.w3.eth.contract(address=address, abi=factory.abi)
+
+    def clones(self, name: str, rewards: List[int], staker: str) -> List[str]:
+        """One initialised minimal proxy of `name` per reward (position held by `staker`), CLONE_BATCH per transaction."""
+        target = self.deploy(name)
+        factory = self.deploy("CloneFactory")
+        addresses = []
+        for i in range(0, len(rewards), CLONE_BATCH):
+            chunk = rewards[i:i + CLONE_BATCH]
+            call = factory.functions.clone(target.address, chunk, staker)
+            addresses += call.call({"from": self.deployer})
+            call.transact({"from": self.deployer, "gas": 30_000_000})
+        return addresses
+
+    def fund(self, private_key: str, wei: int = 10 ** 22) -> str:
+        """Fund the bot's signer and make it a known account (eth-tester wants that for eth_call `from`)."""
+        address = Account.from_key(private_key).address
+        try:
+            self.tester.add_account(private_key)
+        except Exception:
+            pass  # already added
+        self.w3.eth.send_transaction({"from": self.deployer, "to": address, "value": wei})
+        return address
+
+    # ---- JSON-RPC ----
+    def handle(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        reply = {"jsonrpc": "2.0", "id": call.get("id")}
+        try:
+            with self._lock:
+                self.requests += 1
+                response = self._request(call["method"], call.get("params") or [])
+        except Exception as e:
+            message = str(e)
+            if type(e).__name__ == "TransactionFailed" and "revert" not in message.lower():
+                message = f"execution reverted: {message}"
+            reply["error"] = {"code": -32000, "message": message}
+            return reply
+        if "error" in response:
+            reply["error"] = response["error"]
+        else:
+            reply["result"] = _to_rpc(response.get("result"))
+        return reply
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        chain = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like a real node behind a load balancer
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if isinstance(body, list):
+                    out = [chain.handle(call) for call in body]
+                else:
+                    out = chain.handle(body)
+                data = json.dumps(out).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="sim-chain", daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def shutdown(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,32 @@
+# @version 0.3.10
+# Autofarm / QuickSwap-style MasterChef matching abis/autofarm.json and
+# abis/quickswap.json: the position belongs to one staker, pendingReward is
+# per user and harvest() pays msg.sender, so a harvest routed through an
+# aggregator claims the aggregator's (empty) position, like on chain.
+# Deployed as minimal proxies, so initialize() stands in for the constructor.
+reward: public(uint256)
+staker: public(address)
+claimed: public(HashMap[address, uint256])
+harvests: public(HashMap[uint256, uint256])
+initialized: bool
+
+@external
+def initialize(_reward: uint256, _staker: address):
+    assert not self.initialized
+    self.initialized = True
+    self.reward = _reward
+    self.staker = _staker
+
+@external
+@view
+def pendingReward(_pid: uint256, _user: address) -> uint256:
+    if _user == self.staker:
+        return self.reward
+    return 0
+
+@external
+def harvest(_pid: uint256):
+    # the reward stays put so every cycle sees the same load
+    if msg.sender == self.staker:
+        self.claimed[msg.sender] += self.reward
+    self.harvests[_pid] += 1
@@ -0,0 +1,26 @@
+# @version 0.3.10
+# Balancer gauge-style rewards matching abis/balancer.json; claimRewards()
+# pays msg.sender, and only the staker has a position.
+reward: public(uint256)
+staker: public(address)
+claimed: public(HashMap[address, uint256])
+claims: public(uint256)
+initialized: bool
+
+@external
+def initialize(_reward: uint256, _staker: address):
+    assert not self.initialized
+    self.initialized = True
+    self.reward = _reward
+    self.staker = _staker
+
+@external
+@view
+def earned() -> uint256:
+    return self.reward
+
+@external
+def claimRewards():
+    if msg.sender == self.staker:
+        self.claimed[msg.sender] += self.reward
+    self.claims += 1
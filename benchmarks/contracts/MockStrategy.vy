@@ -0,0 +1,24 @@
+# @version 0.3.10
+# Keeper-style strategy with the abis/autofarm.json interface: anyone may
+# call harvest(pid) and the reward is compounded for the vault whoever the
+# caller is, so it is safe to batch ("permissionless_harvest": true).
+reward: public(uint256)
+compounded: public(uint256)
+harvests: public(HashMap[uint256, uint256])
+initialized: bool
+
+@external
+def initialize(_reward: uint256, _staker: address):
+    assert not self.initialized
+    self.initialized = True
+    self.reward = _reward
+
+@external
+@view
+def pendingReward(_pid: uint256, _user: address) -> uint256:
+    return self.reward
+
+@external
+def harvest(_pid: uint256):
+    self.compounded += self.reward
+    self.harvests[_pid] += 1
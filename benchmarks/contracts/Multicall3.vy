@@ -0,0 +1,22 @@
+# @version 0.3.10
+# Minimal Multicall3: aggregate3 only, which is all multicall.py and batch_executor.py use
+struct Call3:
+    target: address
+    allowFailure: bool
+    callData: Bytes[1024]
+
+struct Result:
+    success: bool
+    returnData: Bytes[1024]
+
+@external
+@payable
+def aggregate3(calls: DynArray[Call3, 500]) -> DynArray[Result, 500]:
+    out: DynArray[Result, 500] = []
+    for c in calls:
+        ok: bool = False
+        data: Bytes[1024] = b""
+        ok, data = raw_call(c.target, c.callData, max_outsize=1024, revert_on_failure=False)
+        assert ok or c.allowFailure, "Multicall3: call failed"
+        out.append(Result({success: ok, returnData: data}))
+    return out
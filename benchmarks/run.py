@@ -0,0 +1,190 @@
+# benchmarks/run.py
+"""
+Benchmark the bot's cycle against a local simulated chain.
+
+    python -m benchmarks.run --sizes 10,100,1000 --cycles 5
+
+Starts an eth-tester chain behind a JSON-RPC server, deploys mock Autofarm /
+QuickSwap / Balancer contracts (ABIs from abis/) plus Multicall3, stub
+CoinGecko and Telegram servers, then for every N runs benchmarks/worker.py in
+a fresh process over N synthetic watchers. Results (latency, RPC calls per
+watcher, CPU, memory per N) go to benchmarks/results/bench-<time>.json.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.chain import SimulatedChain  # noqa: E402
+from benchmarks.stubs import start_coingecko, start_telegram, PRICES  # noqa: E402
+
+BENCH_PRIVATE_KEY = "0x" + "b3" * 32
+DEFAULT_SIZES = "10,50,100,250,500,1000"
+
+# protocol -> (mock contract, abi file, reward token, CoinGecko id)
+PROTOCOLS = {
+    "autofarm": ("MockFarm", "abis/autofarm.json", "AUTO", "auto"),
+    "quickswap": ("MockFarm", "abis/quickswap.json", "QUICK", "quick"),
+    "balancer": ("MockRewards", "abis/balancer.json", "USDC", "usd-coin"),
+}
+# Pending rewards: profitable watchers clear MIN_REWARD_USD and the gas multiple, the rest don't
+PROFITABLE_USD = 5.0
+UNPROFITABLE_USD = 0.1
+
+
+def synthetic_watchers(chain: SimulatedChain, count: int, harvest_ratio: float, staker: str):
+    """`count` watchers spread over the protocols, every 1/harvest_ratio-th one worth harvesting for `staker`."""
+    specs = []
+    for i in range(count):
+        protocol = list(PROTOCOLS)[i % len(PROTOCOLS)]
+        profitable = int((i + 1) * harvest_ratio) > int(i * harvest_ratio)
+        usd = PROFITABLE_USD if profitable else UNPROFITABLE_USD
+        price = PRICES[PROTOCOLS[protocol][3]]
+        specs.append((i, protocol, int(usd / price * 10 ** 18)))
+
+    watchers = [None] * count
+    for protocol, (mock, abi_file, token, _) in PROTOCOLS.items():
+        mine = [s for s in specs if s[1] == protocol]
+        if not mine:
+            continue
+        addresses = chain.clones(mock, [reward for _, _, reward in mine], staker)
+        for (i, _, _), address in zip(mine, addresses):
+            watcher = {
+                "name": f"{protocol}-{i}",
+                "protocol": protocol,
+                "contract_address": address,
+                "abi_file": abi_file,
+                "rewardToken": token,
+                "rewardDecimals": 18,
+            }
+            if mock == "MockFarm":
+                watcher["pid"] = i
+            watchers[i] = watcher
+    return watchers
+
+
+def worker_env(rpc_url: str, multicall: str, coingecko_url: str, telegram_base: str, concurrency: int) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "RPC_URL_1": rpc_url, "RPC_URL_2": "", "RPC_URL_3": "", "RPC_URL_4": "",
+        "PRIVATE_KEY": BENCH_PRIVATE_KEY,
+        "PUBLIC_ADDRESS": "",  # filled in by main()
+        "MULTICALL3_ADDRESS": multicall,
+        "COINGECKO_API": coingecko_url,
+        "TELEGRAM_API_BASE": telegram_base, "TELEGRAM_BOT_TOKEN": "bench", "TELEGRAM_CHAT_ID": "1",
+        "PRICE_SOURCES": "coingecko", "CHAINLINK_FEEDS": "",
+        "BOT_ENABLED": "true", "ENABLE_BALANCER": "true", "ENABLE_ORACLE": "false",
+        # every watcher every cycle: the scheduler would skip the ones it predicts are not ready
+        "WATCH_SCHEDULER": "false",
+        "BATCH_HARVEST": "false", "PROFILE_CYCLES": "0",
+        "TX_POLL_S": "0.25",
+        "MAX_CONCURRENCY": str(concurrency),
+        "PYTHONUNBUFFERED": "1",
+    })
+    return env
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_size(n, watchers, env, args, chain, coingecko, telegram):
+    workdir = tempfile.mkdtemp(prefix=f"bench-{n}-")
+    try:
+        with open(os.path.join(workdir, "watchers.json"), "w") as f:
+            json.dump(watchers[:n], f)
+        os.symlink(os.path.join(REPO_ROOT, "abis"), os.path.join(workdir, "abis"))
+        out = os.path.join(workdir, "result.json")
+        counts = (chain.requests, coingecko.hits, telegram.hits)
+        with open(os.path.join(workdir, "worker.log"), "w") as log:
+            proc = subprocess.run(
+                [sys.executable, os.path.join(BENCH_DIR, "worker.py"),
+                 "--cycles", str(args.cycles), "--interval", str(args.interval), "--out", out],
+                cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT, timeout=args.timeout,
+            )
+        if proc.returncode != 0 or not os.path.exists(out):
+            with open(os.path.join(workdir, "worker.log")) as log:
+                tail = log.read()[-3000:]
+            raise RuntimeError(f"worker for N={n} failed (exit {proc.returncode}):\n{tail}")
+        with open(out) as f:
+            result = json.load(f)
+        result["node_requests"] = chain.requests - counts[0]
+        result["coingecko_requests"] = coingecko.hits - counts[1]
+        result["telegram_messages"] = telegram.hits - counts[2]
+        return result
+    finally:
+        if args.keep_workdirs:
+            print(f"  workdir kept: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated watcher counts")
+    parser.add_argument("--cycles", type=int, default=5, help="cycles per size; the first is reported as cold")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between cycles")
+    parser.add_argument("--harvest-ratio", type=float, default=0.1, help="fraction of watchers worth harvesting")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("MAX_CONCURRENCY", 8)))
+    parser.add_argument("--timeout", type=float, default=1800, help="per-size worker timeout (s)")
+    parser.add_argument("--out", help="result file (default benchmarks/results/bench-<time>.json)")
+    parser.add_argument("--keep-workdirs", action="store_true")
+    args = parser.parse_args()
+    sizes = sorted({int(s) for s in args.sizes.split(",") if s.strip()})
+
+    print(f"[Bench] Deploying mocks for {max(sizes)} watchers...")
+    t0 = time.time()
+    chain = SimulatedChain()
+    rpc_url = chain.serve()
+    public_address = chain.fund(BENCH_PRIVATE_KEY)
+    multicall = chain.deploy("Multicall3").address
+    watchers = synthetic_watchers(chain, max(sizes), args.harvest_ratio, public_address)
+    coingecko, coingecko_url = start_coingecko()
+    telegram, telegram_base = start_telegram()
+    env = worker_env(rpc_url, multicall, coingecko_url, telegram_base, args.concurrency)
+    env["PUBLIC_ADDRESS"] = public_address
+    print(f"[Bench] Chain ready at {rpc_url} in {time.time() - t0:.1f}s")
+
+    runs = []
+    for n in sizes:
+        print(f"[Bench] N={n}...")
+        result = run_size(n, watchers, env, args, chain, coingecko, telegram)
+        runs.append(result)
+        print(f"  cold {result['cold_latency_s']:.2f}s | p50 {result['latency_p50_s']:.2f}s "
+              f"p95 {result['latency_p95_s']:.2f}s | {result['rpc_per_watcher']:.2f} RPC/watcher "
+              f"(cold {result['cold_rpc_per_watcher']:.2f}) | cpu {result['cpu_s_per_cycle']:.2f}s/cycle "
+              f"| peak rss {result['peak_rss_mb']:.0f} MB")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "runs": runs,
+    }
+    out = args.out or os.path.join(BENCH_DIR, "results", f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"[Bench] Results written to {out}")
+    chain.shutdown()
+
+
+if __name__ == "__main__":
+    main()
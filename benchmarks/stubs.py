@@ -0,0 +1,83 @@
+# benchmarks/stubs.py
+"""Stand-ins for CoinGecko and Telegram so benchmark runs never leave the machine."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+from urllib.parse import urlparse, parse_qs
+
+# USD prices by CoinGecko id
+PRICES = {
+    "matic-network": 0.5,
+    "auto": 10.0,
+    "quick": 50.0,
+    "usd-coin": 1.0,
+    "ethereum": 3000.0,
+    "dai": 1.0,
+    "tether": 1.0,
+    "wrapped-bitcoin": 60000.0,
+}
+
+
+class _Stub:
+    def __init__(self, handler):
+        self.hits = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def shutdown(self):
+        self._server.shutdown()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _CoinGecko(_Handler):
+    def do_GET(self):
+        self.server.stub.hits += 1
+        if self.server.stub.failing:
+            self.send_error(503)
+            return
+        ids = parse_qs(urlparse(self.path).query).get("ids", [""])[0].split(",")
+        self._reply({i: {"usd": self.server.stub.prices[i]} for i in ids if i in self.server.stub.prices})
+
+
+class _Telegram(_Handler):
+    def do_POST(self):
+        self.server.stub.hits += 1
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        text = parse_qs(body).get("text", [""])[0]
+        self.server.stub.messages.append((time.time(), text))
+        self._reply({"ok": True, "result": {}})
+
+
+def start_coingecko(prices: Dict[str, float] = None) -> Tuple[_Stub, str]:
+    """Returns the stub and the COINGECKO_API url to point price_fetcher at."""
+    stub = _Stub(_CoinGecko)
+    stub.prices = dict(prices or PRICES)
+    stub.failing = False  # True: answer every request with a 503
+    return stub, f"{stub.base_url}/api/v3/simple/price"
+
+
+def start_telegram() -> Tuple[_Stub, str]:
+    """Returns the stub and the TELEGRAM_API_BASE to point telegram_notifier at."""
+    stub = _Stub(_Telegram)
+    stub.messages = []  # (received_at, text)
+    return stub, stub.base_url
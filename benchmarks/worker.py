@@ -0,0 +1,112 @@
+# benchmarks/worker.py
+"""
+One benchmark run: imports bot.py against the simulated chain (configured by
+the environment benchmarks/run.py sets up), runs `--cycles` cycles over every
+enabled watcher and writes the measurements as JSON. Runs in its own process
+so CPU time and memory are the bot's alone.
+"""
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux /proc), falling back to the peak."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != "darwin" else peak / 1024 / 1024
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=1.0, help="pause between cycles (lets receipts land)")
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    import bot
+    import metrics
+    import_s = time.perf_counter() - started
+    bot.startup()
+    startup_s = time.perf_counter() - started
+
+    config = bot.base_config()
+    active = [w for w in bot.watchers if bot.is_enabled(w)]
+    rss_loaded = rss_mb()
+
+    cycles = []
+    with ThreadPoolExecutor(max_workers=bot.MAX_CONCURRENCY, thread_name_prefix="watcher") as pool:
+        for i in range(args.cycles):
+            rpc_before = metrics.RPC_REQUESTS.total()
+            cpu_before = time.process_time()
+            t0 = time.perf_counter()
+            bot.run_cycle(pool, list(active), config)
+            cycles.append({
+                "latency_s": time.perf_counter() - t0,
+                "cpu_s": time.process_time() - cpu_before,
+                "rpc_calls": metrics.RPC_REQUESTS.total() - rpc_before,
+            })
+            if i + 1 < args.cycles:
+                time.sleep(args.interval)
+
+    # let the tracker settle what this run sent
+    deadline = time.time() + 30
+    while bot.tracker and bot.tracker.stats()["in_flight"] and time.time() < deadline:
+        time.sleep(0.2)
+
+    n = len(active)
+    warm = cycles[1:] or cycles
+    stages = {key[0]: total / len(cycles) for key, (_, total) in metrics.STAGE_SECONDS.samples().items()}
+    result = {
+        "watchers": n,
+        "cycles": cycles,
+        "import_s": import_s,
+        "startup_s": startup_s,
+        "cold_latency_s": cycles[0]["latency_s"],
+        "latency_p50_s": percentile([c["latency_s"] for c in warm], 0.5),
+        "latency_p95_s": percentile([c["latency_s"] for c in warm], 0.95),
+        "latency_max_s": max(c["latency_s"] for c in warm),
+        "cold_rpc_per_watcher": cycles[0]["rpc_calls"] / n if n else None,
+        "rpc_per_watcher": sum(c["rpc_calls"] for c in warm) / len(warm) / n if n else None,
+        "cpu_s_per_cycle": sum(c["cpu_s"] for c in warm) / len(warm),
+        "rss_before_import_mb": rss_before,
+        "rss_loaded_mb": rss_loaded,
+        "peak_rss_mb": peak_rss_mb(),
+        "stage_s_per_cycle": stages,
+        "harvests": {key[0]: count for key, count in metrics.HARVESTS.samples().items()},
+        "tx": bot.tracker.stats() if bot.tracker else None,
+    }
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
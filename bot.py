@@ -1,13 +1,25 @@
 # bot.py
 import os
+import sys
 import json
 import time
+import signal
 import threading
-from flask import Flask
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Flask, jsonify, Response, request
 from dotenv import load_dotenv
-from rpc_manager import get_web3
-from telegram_notifier import send_alert
-from ai_agent import analyze_and_act, save_watchers_state
+from state_store import get_store, watcher_id
+from profit_ledger import get_ledger
+from watch_scheduler import WatchScheduler
+from circuit_breaker import watcher_breakers
+import metrics
+import profiler
+import sharding
+# web3 and the modules built on it (rpc_manager, ai_agent, gas_engine, ...) take
+# about a second to import; they are imported in startup() and at their call
+# sites so the health port is bound before any of that happens.
+
+PROCESS_STARTED = time.time()
 
 # Load .env locally (Render uses environment variables directly)
 load_dotenv()
@@ -28,15 +40,28 @@ MAX_GAS_GWEI = int(os.getenv("MAX_GAS_GWEI", 40))
 ABSOLUTE_MAX_GAS_GWEI = int(os.getenv("ABSOLUTE_MAX_GAS_GWEI", 600))
 MIN_REWARD_USD = float(os.getenv("MIN_REWARD_USD", 1.0))
 PROFIT_MULTIPLIER = float(os.getenv("PROFIT_MULTIPLIER", 4.0))
-FAIL_PAUSE_MINS = int(os.getenv("FAIL_PAUSE_MINS", 10))
 MAIN_LOOP_SLEEP_S = int(os.getenv("MAIN_LOOP_SLEEP_S", 60))
+MAX_CONCURRENCY = max(1, int(os.getenv("MAX_CONCURRENCY", 8)))
+# watchers.json is refreshed from the state store at most this often
+STATE_EXPORT_INTERVAL_S = int(os.getenv("STATE_EXPORT_INTERVAL_S", 300))
+# Poll each watcher only near its predicted harvest time instead of every loop
+WATCH_SCHEDULER = os.getenv("WATCH_SCHEDULER", "true").lower() == "true"
+# Require a gas-scaled minimum reward from config.json's auto_profiler block (off without a config.json)
+AUTO_PROFILER = os.getenv("AUTO_PROFILER", "true").lower() == "true"
+# Follow receipts in the background (speed-ups, real gas in the profit log) instead of fire-and-forget
+TX_TRACKER = os.getenv("TX_TRACKER", "true").lower() == "true"
+# Threads for the startup warm-up (prices, ABIs, contract objects)
+STARTUP_WORKERS = max(1, int(os.getenv("STARTUP_WORKERS", 8)))
+# /healthz fails once ready if the main loop hasn't come round in this long (0 disables)
+LIVENESS_STALL_S = float(os.getenv("LIVENESS_STALL_S", max(600, 5 * MAIN_LOOP_SLEEP_S)))
 
 WATCHERS_FILE = "watchers.json"
+ORACLE_JOBS_FILE = "oracle_jobs.json"
 
-# -------------------------
-# INIT WEB3
-# -------------------------
-w3 = get_web3()
+def send_alert(message: str):
+    # telegram_notifier pulls in requests; only pay for it once there's something to say
+    from telegram_notifier import send_alert as queue_alert
+    queue_alert(message)
 
 # Exit if bot disabled
 if not BOT_ENABLED:
@@ -47,86 +72,373 @@ if not BOT_ENABLED:
         pass
     exit(0)
 
-# Load watchers safely
-if os.path.exists(WATCHERS_FILE):
-    with open(WATCHERS_FILE, "r") as f:
-        watchers = json.load(f)
-else:
-    watchers = []
+# Everything below is filled in by startup(), off the import path
+w3 = None
+store = None
+watchers = []
+oracle_jobs = []
+last_export = 0.0
+price_router = None
+scheduler = None
+gas_engine = None
+auto_profiler = None
+batch_executor = None
+tracker = None
+shard = None  # sharding.ShardCoordinator when this process is one of several workers
+supervisor = None  # sharding.Supervisor when this process runs the workers
 
-fail_count = 0
+# Readiness (/readyz) and liveness (/healthz) state
+ready = threading.Event()
+startup_state = {"phase": "starting", "since": PROCESS_STARTED, "error": None, "ready_after_s": None}
+last_loop = 0.0
+bot_thread = None
 
-def save_watchers():
-    save_watchers_state(watchers)
+def set_phase(phase: str, error: str = None):
+    now = time.time()
+    print(f"[Startup] {phase} (+{now - PROCESS_STARTED:.2f}s)")
+    startup_state.update(phase=phase, since=now, error=error)
 
-def run_bot():
-    global fail_count
-    print("🚀 Oracle Bot started...")
+def load_watchers():
+    """watchers.json is the config source, per-watcher state lives in the store."""
+    global store, watchers, oracle_jobs
+    store = get_store()
+    if os.path.exists(WATCHERS_FILE):
+        store.import_json(WATCHERS_FILE, keep_state=True)
+    watchers = store.load()
+
+    # Chainlink feeds read alongside the reward probes each cycle
+    oracle_jobs = []
+    if os.path.exists(ORACLE_JOBS_FILE):
+        with open(ORACLE_JOBS_FILE, "r") as f:
+            oracle_jobs = json.load(f)
+
+def warm_abi(abi_path: str):
+    from utils.contract_registry import load_abi
+    load_abi(abi_path)
+
+def warm_contract(watcher):
+    from utils.helpers import load_contract
+    load_contract(w3, watcher["contract_address"], watcher["abi_file"])
+
+def warm_multicall():
+    from multicall import is_available
+    is_available(w3)
+
+def startup():
+    """
+    Load watchers, connect RPC (get_web3 retries until an endpoint answers),
+    build the price router, gas engine, batch executor and tx tracker, and warm
+    caches. Prices and ABIs need no RPC and warm in parallel with the connect;
+    contract objects and the Multicall3 probe follow once it's up. run_bot
+    calls this on its own thread, after the health server is listening.
+    """
+    global w3, price_router, scheduler, gas_engine, auto_profiler, batch_executor, tracker, shard
+    try:
+        set_phase("loading_watchers")
+        load_watchers()
+        active = [w for w in watchers if is_enabled(w)]
+        with ThreadPoolExecutor(max_workers=STARTUP_WORKERS, thread_name_prefix="warmup") as warm:
+            jobs = {warm.submit(warm_prices): "prices"}
+            jobs.update({warm.submit(warm_abi, path): path for path in {w["abi_file"] for w in active if w.get("abi_file")}})
+
+            set_phase("connecting_rpc")
+            from rpc_manager import get_web3
+            w3 = get_web3()
+
+            set_phase("warming_up")
+            if sharding.enabled():
+                from utils.nonce_manager import use_shared_store
+                # every worker signs with the same key: one nonce counter for all of them
+                use_shared_store(sharding.SHARD_DB)
+                shard = sharding.get_coordinator()
+            from price_sources import install as install_price_sources
+            from gas_engine import get_gas_engine, load_auto_profiler
+            from batch_executor import get_batch_executor
+            from tx_tracker import get_tracker
+            # On-chain Chainlink first, CoinGecko cache as fallback (PRICE_SOURCES)
+            price_router = install_price_sources(w3, watchers + oracle_jobs)
+            scheduler = WatchScheduler(min_interval=MAIN_LOOP_SLEEP_S) if WATCH_SCHEDULER else None
+            gas_engine = get_gas_engine(w3)
+            auto_profiler = load_auto_profiler() if AUTO_PROFILER else None
+            if AUTO_PROFILER and not auto_profiler:
+                print("[GasEngine] No auto_profiler block in config.json; min reward is not gas-scaled")
+            # BATCH_HARVEST=true + BATCH_EXECUTOR_ADDRESS: one aggregate tx per cycle
+            batch_executor = get_batch_executor(w3)
+            tracker = get_tracker(w3, PUBLIC_ADDRESS, PRIVATE_KEY) if TX_TRACKER else None
+
+            jobs[warm.submit(warm_multicall)] = "multicall"
+            jobs.update({warm.submit(warm_contract, w): w.get("name", "Unnamed") for w in active if w.get("abi_file")})
+            for future in as_completed(jobs):
+                try:
+                    future.result()
+                except Exception as e:
+                    # the first cycle retries and reports it properly
+                    print(f"[Startup] ⚠️ Warm-up of {jobs[future]} failed: {e}")
+    except Exception as e:
+        set_phase("failed", error=str(e))
+        raise
+    if shard:
+        # take a share of the watchers only once this worker can run them
+        shard.join()
+    startup_state["ready_after_s"] = round(time.time() - PROCESS_STARTED, 3)
+    set_phase("ready")
+    ready.set()
+
+def save_watchers(force=False):
+    """Export the store to watchers.json (atomic), throttled to STATE_EXPORT_INTERVAL_S."""
+    global last_export
+    if not force and time.time() - last_export < STATE_EXPORT_INTERVAL_S:
+        return
+    last_export = time.time()
+    if shard and not shard.is_leader():
+        return
+    from ai_agent import save_watchers_state
+    # sharded: in-memory state is only current for this worker's watchers, the store has everyone's
+    save_watchers_state(store.load() if shard else watchers)
+
+def is_enabled(watcher) -> bool:
+    protocol = watcher.get("protocol", "").lower()
+    # Respect toggles
+    if protocol == "autofarm" and not ENABLE_AUTOFARM:
+        return False
+    if protocol == "balancer" and not ENABLE_BALANCER:
+        return False
+    if protocol == "quickswap" and not ENABLE_QUICKSWAP:
+        return False
+    if protocol == "oracle" and not ENABLE_ORACLE:
+        return False
+    return True
+
+def handle_error(name, e):
+    print(f"❌ Error on {name}: {e}")
+    try:
+        send_alert(f"❌ Error on {name}: {e}")
+    except Exception:
+        pass
+
+def record_outcome(watcher, error=None):
+    """
+    Feed the watcher's circuit breaker. A watcher that keeps failing is
+    quarantined on its own (exponential backoff with jitter, then one probe
+    cycle); everything else keeps running.
+    """
+    key = watcher_id(watcher)
+    name = watcher.get("name", "Unnamed")
+    if error is None:
+        if watcher_breakers.record_success(key):
+            print(f"✅ {name} recovered, breaker closed")
+        return
+    if watcher_breakers.record_failure(key, error):
+        breaker = watcher_breakers.get(key)
+        msg = f"⏸ {name} quarantined for {breaker.remaining() / 60:.1f} min after {breaker.consecutive} failures: {error}"
+        print(msg)
+        try:
+            send_alert(msg)
+        except Exception:
+            pass
+        if scheduler:
+            scheduler.reschedule(watcher, breaker.remaining())
+
+def feed_addresses(active):
+    feeds = [w["chainlink_feed_address"] for w in active if w.get("chainlink_feed_address")]
+    if ENABLE_ORACLE:
+        feeds += [j["chainlink_feed_address"] for j in oracle_jobs if j.get("chainlink_feed_address")]
+    # every feed the price router quotes from, so it never needs a read of its own
+    for source in price_router.sources if price_router else ():
+        feeds += list(getattr(source, "feeds", {}).values())
+    return list(dict.fromkeys(feeds))
+
+def cycle_config(config):
+    """Base config plus this cycle's gas suggestion and, with auto_profiler, a gas-scaled min reward."""
+    from gas_engine import adaptive_min_reward
+    cfg = dict(config)
+    try:
+        cfg["gas"] = gas_engine.suggest()
+    except Exception as e:
+        print(f"[GasEngine] No suggestion this cycle, falling back to eth_gasPrice per watcher: {e}")
+        return cfg
+    if auto_profiler:
+        cfg["auto_min_reward_usd"] = adaptive_min_reward(cfg["gas"]["effective_gwei"], auto_profiler)
+    return cfg
+
+def evaluate(watcher, config, pending):
+    from ai_agent import evaluate_watcher
+    with profiler.span("evaluate", watcher=watcher.get("name")):
+        return evaluate_watcher(w3, watcher, PUBLIC_ADDRESS, config, pending)
 
-    config = {
+def run_cycle(pool, active, config):
+    """
+    One pass over the watchers: reward probes and feed reads are batched through
+    Multicall3, evaluations (decision + tx build) run in the pool, then sends run
+    here one at a time so the signer's nonce stays ordered. With batch harvesting,
+    everything worth it is sent as one aggregate transaction first. Receipts are
+    followed by the tx tracker, so a send never waits for its block.
+    """
+    from ai_agent import execute_plan, prefetch_reads
+    config = cycle_config(config)
+    if batch_executor:
+        config["batch"] = True
+    with metrics.STAGE_SECONDS.time(stage="prefetch"), profiler.span("prefetch", watchers=len(active)):
+        prefetched = prefetch_reads(w3, active, PUBLIC_ADDRESS, feed_addresses(active))
+    for source in price_router.sources:
+        if hasattr(source, "ingest"):
+            source.ingest(prefetched["rounds"], w3.eth.block_number)
+    if tracker:
+        # a watcher with a harvest still in flight waits for its receipt
+        pending = [w for w in active if tracker.is_pending(w)]
+        for watcher in pending:
+            if scheduler:
+                scheduler.reschedule(watcher)
+        active = [w for w in active if not tracker.is_pending(w)]
+    # quarantined watchers sit out until their breaker lets a probe through
+    quarantined = [w for w in active if not watcher_breakers.allow(watcher_id(w))]
+    for watcher in quarantined:
+        if scheduler:
+            scheduler.reschedule(watcher, watcher_breakers.get(watcher_id(watcher)).remaining() or None)
+    active = [w for w in active if w not in quarantined]
+    if not active:
+        return
+    for watcher in active:
+        watcher.pop("last_decision", None)  # re-made by this evaluation
+        watcher.pop("last_error", None)  # anything set from here on counts against the breaker
+    futures = {
+        pool.submit(evaluate, watcher, config, prefetched["pending"].get(id(watcher))): watcher
+        for watcher in active
+    }
+    plans = []
+    errors = {}
+    for future in as_completed(futures):
+        watcher = futures[future]
+        try:
+            plans.append((watcher, future.result()))
+        except Exception as e:
+            errors[id(watcher)] = e
+            if scheduler:
+                scheduler.reschedule(watcher)
+            handle_error(watcher.get("name", "Unnamed"), e)
+
+    if shard:
+        # a worker stalled past its lease may have lost watchers mid-cycle
+        lost = shard.lost([w for w, _ in plans])
+        if lost:
+            print(f"[Shard] {len(lost)} watchers moved to another worker during the cycle, not sending for them")
+            plans = [(w, p) for w, p in plans if watcher_id(w) not in lost]
+            active = [w for w in active if watcher_id(w) not in lost]
+
+    batched = {}
+    if batch_executor and (not tracker or tracker.has_capacity()):
+        try:
+            with metrics.STAGE_SECONDS.time(stage="batch"), profiler.span("batch"):
+                batched = batch_executor.execute([(w, p) for w, p in plans if p], PUBLIC_ADDRESS, PRIVATE_KEY, config, tracker)
+            metrics.HARVESTS.inc(len(batched), outcome="batched")
+        except Exception as e:
+            handle_error("batch harvest", e)
+
+    for watcher, plan in plans:
+        name = watcher.get("name", "Unnamed")
+        try:
+            if id(watcher) in batched:
+                tx_hash = batched[id(watcher)]
+            elif plan and plan["decision"]["should"] and tracker and not tracker.has_capacity():
+                print(f"⏸ {name} deferred: {tracker.max_in_flight} txs already in flight")
+                metrics.HARVESTS.inc(outcome="deferred")
+                if scheduler:
+                    scheduler.reschedule(watcher)
+                continue
+            elif plan and plan["decision"]["should"]:
+                with profiler.span("send", watcher=name):
+                    tx_hash = execute_plan(w3, watcher, plan, PUBLIC_ADDRESS, PRIVATE_KEY, tracker)
+            else:
+                tx_hash = None
+            if scheduler:
+                scheduler.observe(watcher, plan["decision"] if plan else watcher.get("last_decision"), harvested=bool(tx_hash))
+            if tx_hash:
+                # the alert comes from the tracker on confirmation (or execute_plan without one)
+                print(f"📤 {name} harvest sent: {tx_hash}")
+            else:
+                # log skipped harvest
+                last_decision = watcher.get("last_decision") or {}
+                reason = last_decision.get("reason", "no_action")
+                print(f"⏸ {name} skipped: {reason}")
+                metrics.HARVESTS.inc(outcome="skipped")
+        except Exception as e:
+            errors[id(watcher)] = e
+            if scheduler:
+                scheduler.reschedule(watcher)
+            handle_error(name, e)
+
+    for watcher in active:
+        record_outcome(watcher, errors.get(id(watcher)) or watcher.get("last_error"))
+
+    # last_decision / last_error for the whole cycle in one transaction
+    try:
+        store.update_many(active)
+        save_watchers()
+        get_ledger().flush_if_due()
+    except Exception as e:
+        print(f"[StateStore] Failed to persist cycle state: {e}")
+
+def warm_prices():
+    """Warm every reward token's price once, then keep them fresh off the hot path."""
+    from price_fetcher import prefetch as prefetch_prices, start_refresher
+    reward_tokens = {w.get("rewardToken") for w in watchers} | {j.get("token") for j in oracle_jobs}
+    prefetch_prices(reward_tokens)
+    start_refresher()
+
+def base_config():
+    return {
         "min_reward_usd": MIN_REWARD_USD,
         "profit_multiplier": PROFIT_MULTIPLIER,
         "absolute_max_gas_gwei": ABSOLUTE_MAX_GAS_GWEI,
     }
 
-    while True:
-        try:
-            for watcher in watchers:
-                protocol = watcher.get("protocol", "").lower()
-                name = watcher.get("name", "Unnamed")
-
-                # Respect toggles
-                if protocol == "autofarm" and not ENABLE_AUTOFARM:
-                    continue
-                if protocol == "balancer" and not ENABLE_BALANCER:
-                    continue
-                if protocol == "quickswap" and not ENABLE_QUICKSWAP:
-                    continue
-                if protocol == "oracle" and not ENABLE_ORACLE:
-                    continue
+def run_bot():
+    global last_loop
+    startup()
+    print(f"🚀 Oracle Bot started{f' as {shard.worker_id}' if shard else ''} (concurrency={MAX_CONCURRENCY}, ready in {startup_state['ready_after_s']:.2f}s)...")
 
-                try:
-                    tx_hash = analyze_and_act(w3, watcher, PUBLIC_ADDRESS, PRIVATE_KEY, config)
-                    if tx_hash:
-                        msg = f"✅ {name} harvested: {tx_hash}"
-                        print(msg)
-                        try:
-                            send_alert(msg)
-                        except Exception:
-                            pass
-                        save_watchers()
-                        fail_count = 0  # reset fail count after success
-                    else:
-                        # log skipped harvest
-                        last_decision = watcher.get("last_decision", {})
-                        reason = last_decision.get("reason", "no_action")
-                        print(f"⏸ {name} skipped: {reason}")
+    config = base_config()
 
-                except Exception as e:
-                    print(f"❌ Error on {name}: {e}")
-                    try:
-                        send_alert(f"❌ Error on {name}: {e}")
-                    except Exception:
-                        pass
-                    fail_count += 1
-                    if fail_count >= 2:
-                        print(f"⏸ Pausing bot for {FAIL_PAUSE_MINS} minutes after {fail_count} consecutive errors...")
-                        try:
-                            send_alert(f"Bot paused for {FAIL_PAUSE_MINS} mins after {fail_count} fails.")
-                        except Exception:
-                            pass
-                        time.sleep(FAIL_PAUSE_MINS * 60)
-                        fail_count = 0
-
-            time.sleep(MAIN_LOOP_SLEEP_S)
-
-        except Exception as loop_err:
-            print(f"🔥 Main loop error: {loop_err}")
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="watcher") as pool:
+        while True:
+            started = last_loop = time.time()
             try:
-                send_alert(f"🔥 Main loop error: {loop_err}")
-            except Exception:
-                pass
-            time.sleep(60)
+                active = [w for w in watchers if is_enabled(w)]
+                if shard:
+                    # this worker's share of the ring, minus watchers another worker still holds
+                    active = shard.assign(active, tracker.pending_ids if tracker else set)
+                if scheduler:
+                    scheduler.sync(active)
+                    active = scheduler.pop_due()
+                if active:
+                    rpc_before = metrics.RPC_REQUESTS.total()
+                    with profiler.cycle(watchers=len(active)):
+                        run_cycle(pool, active, config)
+                    elapsed = time.time() - started
+                    metrics.CYCLE_SECONDS.observe(elapsed)
+                    metrics.CYCLE_WATCHERS.set(len(active))
+                    metrics.CYCLES.inc()
+                    rpc_calls = metrics.RPC_REQUESTS.total() - rpc_before
+                    print(f"⏱ Cycle finished: {len(active)} watchers in {elapsed:.2f}s ({rpc_calls:.0f} RPC calls)")
+                    caches = cache_stats()
+                    print("   caches: " + ", ".join(
+                        f"{name} {st['hits']} hits / {st['misses']} misses, {st['size']} entries"
+                        for name, st in caches.items()) + f", {caches['rpc']['evictions']} rpc evictions")
+                    if elapsed > MAIN_LOOP_SLEEP_S:
+                        print(f"⚠️ Cycle took longer than MAIN_LOOP_SLEEP_S ({MAIN_LOOP_SLEEP_S}s)")
+                sleep_s = MAIN_LOOP_SLEEP_S - (time.time() - started)
+                next_due = scheduler.next_due() if scheduler else None
+                if next_due is not None:
+                    sleep_s = min(sleep_s, next_due - time.time())
+                time.sleep(max(1 if scheduler else 0, sleep_s))
+
+            except Exception as loop_err:
+                print(f"🔥 Main loop error: {loop_err}")
+                try:
+                    send_alert(f"🔥 Main loop error: {loop_err}")
+                except Exception:
+                    pass
+                time.sleep(60)
 
 # -------------------------
 # FLASK HEALTHCHECK
@@ -141,9 +453,110 @@ def index():
 def ping():
     return "pong 🏓"
 
+@app.route("/healthz")
+def healthz():
+    """Liveness: up while starting or connecting; 503 only if the bot thread died or its loop stalled."""
+    status = {"phase": startup_state["phase"], "uptime_s": round(time.time() - PROCESS_STARTED, 1)}
+    if supervisor:
+        status.update(phase="supervising", workers=supervisor.status())
+        return jsonify(status), 200 if supervisor.alive() else 503
+    if bot_thread is not None and not bot_thread.is_alive():
+        status["error"] = startup_state["error"] or "bot thread exited"
+        return jsonify(status), 503
+    if ready.is_set() and last_loop and LIVENESS_STALL_S and time.time() - last_loop > LIVENESS_STALL_S:
+        status["error"] = f"main loop stalled for {time.time() - last_loop:.0f}s"
+        return jsonify(status), 503
+    return jsonify(status)
+
+@app.route("/readyz")
+def readyz():
+    """Readiness: 200 once RPC is connected and caches are warm; until then 503 with the startup phase."""
+    if supervisor:
+        # ready as soon as one worker has joined the ring; the others pick up their share as they join
+        status = sharding.shard_status()
+        return jsonify(status), 200 if status["live"] else 503
+    status = {
+        "ready": ready.is_set(),
+        "phase": startup_state["phase"],
+        "phase_s": round(time.time() - startup_state["since"], 1),
+        "ready_after_s": startup_state["ready_after_s"],
+    }
+    if startup_state["error"]:
+        status["error"] = startup_state["error"]
+    return jsonify(status), 200 if ready.is_set() else 503
+
+def cache_stats():
+    """RPC block cache and gas-estimate cache counters, mirrored into metrics."""
+    from utils.rpc_cache import cache_stats as rpc_cache_stats
+    from utils import gas_cache
+    caches = {"rpc": rpc_cache_stats(), "gas": gas_cache.stats()}
+    for name, st in caches.items():
+        metrics.CACHE_LOOKUPS.sync(st["hits"], cache=name, result="hit")
+        metrics.CACHE_LOOKUPS.sync(st["misses"], cache=name, result="miss")
+        metrics.CACHE_ENTRIES.set(st["size"], cache=name)
+    metrics.CACHE_EVICTIONS.sync(caches["rpc"]["evictions"], cache="rpc")
+    return caches
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Prometheus text format: cycle/stage/RPC/HTTP histograms and counters, cache hit/miss counts."""
+    cache_stats()
+    if tracker:
+        metrics.TX_IN_FLIGHT.set(tracker.stats()["in_flight"])
+    metrics.BREAKERS_OPEN.set(sum(1 for b in watcher_breakers.snapshot().values() if b["state"] != "closed"), kind="watcher")
+    if w3 is not None and hasattr(w3.provider, "endpoint_stats"):
+        states = [st["breaker"]["state"] for st in w3.provider.endpoint_stats().values()]
+        metrics.BREAKERS_OPEN.set(sum(1 for s in states if s != "closed"), kind="rpc")
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/profile")
+def profile():
+    """
+    /profile?cycles=N profiles the next N cycles (stack samples + span trace
+    under logs/), capped at PROFILE_MAX_CYCLES; no args shows status.
+    """
+    cycles = request.args.get("cycles")
+    if cycles is None:
+        return jsonify(profiler.status())
+    try:
+        cycles = int(cycles)
+    except ValueError:
+        return jsonify({"error": "cycles must be an integer"}), 400
+    if cycles < 0:
+        return jsonify({"error": "cycles must not be negative"}), 400
+    return jsonify(profiler.arm(cycles))
+
+@app.route("/shards")
+def shards():
+    """Workers on the ring and the claims each holds (sharded mode)."""
+    if supervisor:
+        return jsonify({**sharding.shard_status(), "processes": supervisor.status()})
+    if shard:
+        return jsonify(shard.snapshot())
+    return jsonify({"sharding": False})
+
+@app.route("/breakers")
+def breakers():
+    """Circuit breaker state: watchers that have failed recently, and every RPC endpoint."""
+    tripped = watcher_breakers.snapshot(only_tripped=True)
+    names = {watcher_id(w): w.get("name") for w in watchers}
+    rpc = w3.provider.endpoint_stats() if w3 is not None and hasattr(w3.provider, "endpoint_stats") else {}
+    return jsonify({
+        "watchers": {names.get(key, key): state for key, state in tripped.items()},
+        "rpc": {url: st["breaker"] for url, st in rpc.items()},
+    })
+
 if __name__ == "__main__":
-    bot_thread = threading.Thread(target=run_bot, daemon=True)
-    bot_thread.start()
+    # Exit through sys.exit on SIGTERM so atexit runs: the workers are stopped and queued alerts flushed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    if sharding.is_supervisor():
+        # SHARD_WORKERS=N: this process serves the endpoints and keeps N workers running
+        supervisor = sharding.Supervisor(run_bot)
+        supervisor.start()
+    else:
+        # Health server first: startup() may sit in get_web3 for as long as every RPC is down
+        bot_thread = threading.Thread(target=run_bot, name="bot", daemon=True)
+        bot_thread.start()
 
     port = int(os.environ.get("PORT", 10000))
     app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,148 @@
+# circuit_breaker.py
+import os
+import time
+import random
+from threading import Lock
+from typing import Any, Dict, Optional
+
+# Consecutive failures that open a breaker
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", 2))
+# First quarantine; doubles on every failed probe up to BREAKER_MAX_S
+BREAKER_BASE_S = float(os.getenv("BREAKER_BASE_S", 60))
+BREAKER_MAX_S = float(os.getenv("BREAKER_MAX_S", 3600))
+# +/- fraction applied to each cooldown so quarantined watchers don't all retry together
+BREAKER_JITTER = float(os.getenv("BREAKER_JITTER", 0.2))
+# A half-open probe that never reports back frees its slot after this long
+BREAKER_PROBE_TIMEOUT_S = float(os.getenv("BREAKER_PROBE_TIMEOUT_S", 120))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failures` consecutive failures; open -> half_open when
+    the cooldown runs out, letting exactly one probe through. A successful probe
+    closes the breaker, a failed one reopens it with twice the cooldown.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, base_s: float = BREAKER_BASE_S,
+                 max_s: float = BREAKER_MAX_S, jitter: float = BREAKER_JITTER):
+        self.failures = failures
+        self.base_s = base_s
+        self.max_s = max_s
+        self.jitter = jitter
+        self._lock = Lock()
+        self.state = CLOSED
+        self.consecutive = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.probe_started = None
+        self.last_error = None
+
+    def _cooldown(self) -> float:
+        cooldown = min(self.max_s, self.base_s * 2 ** max(0, self.trips - 1))
+        return cooldown * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def allow(self, now: Optional[float] = None) -> bool:
+        """True if a call may go through; claims the probe slot when half-open."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if now < self.open_until:
+                    return False
+                self.state = HALF_OPEN
+                self.probe_started = None
+            if self.probe_started is not None and now - self.probe_started < BREAKER_PROBE_TIMEOUT_S:
+                return False
+            self.probe_started = now
+            return True
+
+    def available(self, now: Optional[float] = None) -> bool:
+        """allow() without claiming anything, for ranking/filtering."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return now >= self.open_until
+            return self.probe_started is None or now - self.probe_started >= BREAKER_PROBE_TIMEOUT_S
+
+    def remaining(self, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        with self._lock:
+            return max(0.0, self.open_until - now) if self.state == OPEN else 0.0
+
+    def record_success(self) -> bool:
+        """Returns True when this success closed an open/half-open breaker."""
+        with self._lock:
+            recovered = self.state != CLOSED
+            self.state = CLOSED
+            self.consecutive = 0
+            self.trips = 0
+            self.probe_started = None
+            self.last_error = None
+            return recovered
+
+    def record_failure(self, error: Any = None, now: Optional[float] = None) -> bool:
+        """Returns True when this failure (re)opened the breaker."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self.consecutive += 1
+            self.last_error = str(error)[:200] if error is not None else None
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive >= self.failures):
+                self.trips += 1
+                self.state = OPEN
+                self.open_until = now + self._cooldown()
+                self.probe_started = None
+                return True
+            return False
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive,
+                "trips": self.trips,
+                "retry_in_s": round(max(0.0, self.open_until - now), 1) if self.state == OPEN else 0.0,
+                "last_error": self.last_error,
+            }
+
+
+class BreakerBoard:
+    """Breakers by key (watcher id, RPC url), created closed on first use."""
+
+    def __init__(self, name: str, **settings):
+        self.name = name
+        self.settings = settings
+        self._lock = Lock()
+        self._breakers = {}
+
+    def get(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(**self.settings)
+            return breaker
+
+    def allow(self, key: str) -> bool:
+        return self.get(key).allow()
+
+    def record_success(self, key: str) -> bool:
+        return self.get(key).record_success()
+
+    def record_failure(self, key: str, error: Any = None) -> bool:
+        return self.get(key).record_failure(error)
+
+    def snapshot(self, only_tripped: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            items = list(self._breakers.items())
+        out = {key: b.snapshot() for key, b in items}
+        if only_tripped:
+            out = {k: v for k, v in out.items() if v["state"] != CLOSED or v["consecutive_failures"]}
+        return out
+
+
+watcher_breakers = BreakerBoard("watcher")
@@ -0,0 +1,245 @@
+# gas_engine.py
+import os
+import json
+import time
+from collections import deque
+from threading import Lock
+from typing import Any, Dict, Optional
+import numpy as np
+from web3 import Web3
+from web3.exceptions import MethodUnavailable
+
+# Blocks asked for per eth_feeHistory call and kept in the rolling window
+GAS_HISTORY_BLOCKS = int(os.getenv("GAS_HISTORY_BLOCKS", 20))
+GAS_WINDOW_BLOCKS = int(os.getenv("GAS_WINDOW_BLOCKS", 200))
+REWARD_PERCENTILES = (10, 25, 50, 75, 90)
+# Which tip percentile of recent blocks we bid; lower pays less but may wait a block or two
+GAS_PRIORITY_PERCENTILE = int(os.getenv("GAS_PRIORITY_PERCENTILE", 50))
+# Polygon enforces a minimum priority fee
+MIN_PRIORITY_FEE_GWEI = float(os.getenv("MIN_PRIORITY_FEE_GWEI", 30))
+# maxFeePerGas = forecast base fee * headroom + tip; only base + tip is actually paid
+GAS_MAX_FEE_HEADROOM = float(os.getenv("GAS_MAX_FEE_HEADROOM", 2.0))
+GAS_FORECAST_BLOCKS = int(os.getenv("GAS_FORECAST_BLOCKS", 5))
+# EIP-1559 base fee change denominator (8 on Ethereum, 16 on Polygon PoS since Delhi)
+BASE_FEE_CHANGE_DENOMINATOR = int(os.getenv("BASE_FEE_CHANGE_DENOMINATOR", 16))
+
+CONFIG_FILE = os.getenv("CONFIG_FILE", "config.json")
+
+GWEI = 10 ** 9
+
+
+def _gwei(wei) -> float:
+    return int(wei, 16) / GWEI if isinstance(wei, str) else int(wei) / GWEI
+
+
+class GasEngine:
+    """
+    Rolling window of per-block base fees, gas-used ratios and tip percentiles
+    from eth_feeHistory, refreshed at most once per block. Nodes without
+    eth_feeHistory fall back to the latest block's base fee plus
+    eth_maxPriorityFeePerGas, and finally to legacy eth_gasPrice.
+    """
+
+    def __init__(self, w3: Web3, window: int = GAS_WINDOW_BLOCKS, history_blocks: int = GAS_HISTORY_BLOCKS):
+        self.w3 = w3
+        self.history_blocks = history_blocks
+        self._lock = Lock()
+        self._blocks = deque(maxlen=window)  # (number, base_fee_gwei, gas_used_ratio, [tips_gwei])
+        self._next_base_fee = None
+        self._legacy_gwei = None
+        self._block = None
+        self._fee_history = True
+
+    # ---- sampling ----
+    def refresh(self) -> Optional[int]:
+        block = self.w3.eth.block_number  # served by the block cache between heads
+        with self._lock:
+            if block == self._block:
+                return block
+            last = self._blocks[-1][0] if self._blocks else None
+        count = self.history_blocks if last is None else max(1, min(self.history_blocks, block - last))
+
+        if self._fee_history:
+            try:
+                hist = self.w3.eth.fee_history(count, block, list(REWARD_PERCENTILES))
+                self._ingest(hist, block)
+                return block
+            except Exception as e:
+                if _method_missing(e):
+                    print(f"[GasEngine] eth_feeHistory unavailable, using latest block + eth_gasPrice: {e}")
+                    self._fee_history = False
+                else:
+                    # timeout / rate limit / bad gateway: fall back this block, try again next one
+                    print(f"[GasEngine] eth_feeHistory failed, falling back for block {block}: {e}")
+        self._sample_fallback(block)
+        return block
+
+    def _ingest(self, hist, block: int):
+        oldest = int(hist["oldestBlock"])
+        base_fees = [_gwei(b) for b in hist["baseFeePerGas"]]
+        ratios = list(hist["gasUsedRatio"])
+        rewards = hist.get("reward") or [[0] * len(REWARD_PERCENTILES)] * len(ratios)
+        with self._lock:
+            last = self._blocks[-1][0] if self._blocks else -1
+            for i, ratio in enumerate(ratios):
+                if oldest + i > last:
+                    self._blocks.append((oldest + i, base_fees[i], float(ratio), [_gwei(r) for r in rewards[i]]))
+            # feeHistory returns one extra base fee: the next block's
+            self._next_base_fee = base_fees[-1]
+            self._block = block
+
+    def _sample_fallback(self, block: int):
+        latest = self.w3.eth.get_block(block)
+        legacy = _gwei(self.w3.eth.gas_price)
+        base_fee = latest.get("baseFeePerGas")
+        with self._lock:
+            self._legacy_gwei = legacy
+            if base_fee is not None:
+                base = _gwei(base_fee)
+                limit = latest.get("gasLimit") or 0
+                ratio = latest.get("gasUsed", 0) / limit if limit else 0.5
+                # legacy price minus base fee is what the node thinks the tip should be
+                tip = max(0.0, legacy - base)
+                self._blocks.append((block, base, ratio, [tip] * len(REWARD_PERCENTILES)))
+                self._next_base_fee = _next_base_fee(base, ratio)
+            self._block = block
+
+    # ---- suggestions ----
+    def _window(self):
+        with self._lock:
+            return list(self._blocks), self._next_base_fee, self._legacy_gwei
+
+    def priority_fee(self, percentile: int = GAS_PRIORITY_PERCENTILE) -> float:
+        """Percentile of the recent blocks' tip percentile closest to the one asked for."""
+        blocks, _, _ = self._window()
+        if not blocks:
+            return MIN_PRIORITY_FEE_GWEI
+        column = min(range(len(REWARD_PERCENTILES)), key=lambda i: abs(REWARD_PERCENTILES[i] - percentile))
+        tips = np.array([b[3][column] for b in blocks])
+        return max(MIN_PRIORITY_FEE_GWEI, float(np.percentile(tips, percentile)))
+
+    def forecast(self, blocks_ahead: int = GAS_FORECAST_BLOCKS) -> Dict[str, Any]:
+        """
+        Base fee `blocks_ahead` blocks out, assuming recent block fullness persists
+        (EIP-1559 update rule applied to the window's mean gas-used ratio).
+        """
+        blocks, next_base, legacy = self._window()
+        if next_base is None:
+            return {"base_fee_gwei": None, "trend": "unknown", "legacy_gwei": legacy}
+        recent = np.array([b[2] for b in blocks[-20:]]) if blocks else np.array([0.5])
+        ratio = float(recent.mean())
+        step = 1 + (2 * ratio - 1) / BASE_FEE_CHANGE_DENOMINATOR
+        predicted = next_base * step ** max(0, blocks_ahead - 1)
+        trend = "rising" if step > 1.001 else "falling" if step < 0.999 else "flat"
+        return {"base_fee_gwei": predicted, "next_base_fee_gwei": next_base, "mean_gas_used_ratio": ratio,
+                "trend": trend, "legacy_gwei": legacy}
+
+    def suggest(self, percentile: int = GAS_PRIORITY_PERCENTILE) -> Dict[str, Any]:
+        """
+        Fees for a transaction sent now. effective_gwei (next base fee + tip)
+        is what the harvest will actually pay per gas and is what the profit
+        check should use.
+        """
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"[GasEngine] Refresh failed: {e}")
+        fc = self.forecast()
+        if fc["base_fee_gwei"] is None:
+            legacy = fc["legacy_gwei"]
+            if legacy is None:
+                legacy = _gwei(self.w3.eth.gas_price)
+            return {"eip1559": False, "gas_price_gwei": legacy, "effective_gwei": legacy}
+        tip = self.priority_fee(percentile)
+        max_fee = max(fc["base_fee_gwei"], fc["next_base_fee_gwei"]) * GAS_MAX_FEE_HEADROOM + tip
+        return {
+            "eip1559": True,
+            "base_fee_gwei": fc["next_base_fee_gwei"],
+            "priority_fee_gwei": tip,
+            "max_fee_gwei": max_fee,
+            "effective_gwei": fc["next_base_fee_gwei"] + tip,
+            "trend": fc["trend"],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        blocks, next_base, legacy = self._window()
+        return {"blocks": len(blocks), "latest_block": blocks[-1][0] if blocks else None,
+                "next_base_fee_gwei": next_base, "legacy_gwei": legacy, "fee_history": self._fee_history}
+
+
+def _method_missing(err: Exception) -> bool:
+    """True when the node doesn't serve the method at all (JSON-RPC -32601 / "not implemented")."""
+    if isinstance(err, (MethodUnavailable, NotImplementedError)):
+        return True
+    detail = err.args[0] if err.args else None
+    if isinstance(detail, dict) and detail.get("code") == -32601:
+        return True
+    message = str(err).lower()
+    return any(s in message for s in ("method not found", "not implemented", "does not exist", "not supported"))
+
+
+def _next_base_fee(base_gwei: float, gas_used_ratio: float) -> float:
+    return base_gwei * (1 + (2 * gas_used_ratio - 1) / BASE_FEE_CHANGE_DENOMINATOR)
+
+
+def tx_fee_fields(fees: Dict[str, Any], bump: float = 1.0) -> Dict[str, int]:
+    """build_transaction fee fields in wei; bump scales every field for replacements."""
+    if fees.get("eip1559"):
+        return {
+            "maxFeePerGas": int(fees["max_fee_gwei"] * bump * GWEI),
+            "maxPriorityFeePerGas": int(fees["priority_fee_gwei"] * bump * GWEI),
+        }
+    return {"gasPrice": int(fees["gas_price_gwei"] * bump * GWEI)}
+
+
+# -------------------------
+# auto_profiler: min reward that scales with gas
+# -------------------------
+def load_auto_profiler(path: Optional[str] = None) -> Optional[Dict[str, float]]:
+    """
+    The auto_profiler block from config.json, or None when there is no
+    config.json. The template's example numbers are never applied: they would
+    silently gate live harvests on untuned thresholds.
+    """
+    path = path or CONFIG_FILE
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            block = json.load(f).get("auto_profiler")
+    except (OSError, ValueError) as e:
+        print(f"[GasEngine] Could not read {path}: {e}")
+        return None
+    if not block:
+        return None
+    return {k: float(v) for k, v in block.items()}
+
+
+def adaptive_min_reward(gas_gwei: float, profiler: Dict[str, float]) -> float:
+    """low_gas_min_reward at or below low_gas_threshold, high_gas_min_reward at or above high, linear between."""
+    return float(np.interp(
+        gas_gwei,
+        [profiler["low_gas_threshold"], profiler["high_gas_threshold"]],
+        [profiler["low_gas_min_reward"], profiler["high_gas_min_reward"]],
+    ))
+
+
+_engine = None
+_engine_lock = Lock()
+
+
+def get_gas_engine(w3: Web3) -> GasEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = GasEngine(w3)
+        _engine.w3 = w3
+        return _engine
+
+
+if __name__ == "__main__":
+    from rpc_manager import get_web3
+    engine = get_gas_engine(get_web3())
+    for _ in range(3):
+        print(engine.suggest(), engine.forecast())
+        time.sleep(2)
@@ -0,0 +1,213 @@
+# metrics.py
+import os
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import urlparse
+
+# METRICS_ENABLED=false turns every timer/counter into a no-op
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Seconds; fine at the low end for RPC round-trips, coarse at the top for whole cycles
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CYCLE_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0, 45.0, 60.0, 90.0, 120.0, 300.0)
+
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> Dict[Tuple, float]:
+        """{label values: value} for every series (histograms: (count, sum))."""
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_fmt(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, value: float = 1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def sync(self, total: float, **labels):
+        """Mirror a cumulative count kept by another component (cache hit/miss counters)."""
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = total
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def total(self) -> float:
+        with self._lock:
+            return sum(self._values.values())
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        labels = self.labels
+        if "outcome" in self.histogram.labelnames:
+            labels = {**labels, "outcome": "error" if exc_type else labels.get("outcome", "ok")}
+        self.histogram.observe(time.perf_counter() - self.started, **labels)
+        return False
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, **labels):
+        """
+        with HIST.time(stage="send"): ... observes the block's wall time. An
+        `outcome` label, if the histogram has one, becomes "error" when the block raises.
+        """
+        return _Timer(self, labels) if METRICS_ENABLED else _NULL_TIMER
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[2] if entry else 0
+
+    def samples(self) -> Dict[Tuple, Tuple[int, float]]:
+        with self._lock:
+            return {key: (entry[2], entry[1]) for key, entry in self._values.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._values.items())
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = 'le="%s"' % _fmt(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+def endpoint_label(url: str) -> str:
+    """Host only: RPC URLs often carry the API key in the path."""
+    return urlparse(url).netloc or url
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------
+# Bot metrics
+# -------------------------
+CYCLE_SECONDS = Histogram("oraclebot_cycle_seconds", "Wall time of one run_cycle.", buckets=CYCLE_BUCKETS)
+CYCLE_WATCHERS = Gauge("oraclebot_cycle_watchers", "Watchers evaluated in the last cycle.")
+CYCLES = Counter("oraclebot_cycles_total", "Completed run_cycle passes.")
+STAGE_SECONDS = Histogram("oraclebot_stage_seconds", "Time spent per hot-path stage.", ("stage",))
+HARVESTS = Counter("oraclebot_harvests_total", "Harvest decisions by outcome.", ("outcome",))
+RPC_REQUESTS = Counter("oraclebot_rpc_requests_total", "JSON-RPC calls by method and outcome.", ("method", "outcome"))
+RPC_LATENCY = Histogram("oraclebot_rpc_latency_seconds", "JSON-RPC POST round-trip per endpoint.", ("endpoint", "outcome"))
+HTTP_LATENCY = Histogram("oraclebot_http_latency_seconds", "Outbound HTTP calls other than RPC.", ("service", "outcome"))
+TX_IN_FLIGHT = Gauge("oraclebot_tx_in_flight", "Broadcast transactions awaiting a receipt.")
+BREAKERS_OPEN = Gauge("oraclebot_breakers_open", "Circuit breakers not closed.", ("kind",))
+CACHE_LOOKUPS = Counter("oraclebot_cache_lookups_total", "Cache lookups by cache (rpc, gas) and result (hit, miss).", ("cache", "result"))
+CACHE_EVICTIONS = Counter("oraclebot_cache_evictions_total", "Entries evicted to stay under the cache's size cap.", ("cache",))
+CACHE_ENTRIES = Gauge("oraclebot_cache_entries", "Entries currently held per cache.", ("cache",))
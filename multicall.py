@@ -0,0 +1,75 @@
+# multicall.py
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from web3 import Web3
+from utils.helpers import load_contract
+from utils.contract_registry import encode_call
+
+# Canonical Multicall3 deployment (same address on Polygon and most EVM chains)
+MULTICALL3_ADDRESS = os.getenv("MULTICALL3_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11")
+MULTICALL3_ABI_FILE = "abis/multicall3.json"
+MAX_CALLS_PER_BATCH = int(os.getenv("MULTICALL_MAX_CALLS", 300))
+
+_deployed = {}
+
+
+def is_available(w3: Web3, multicall_address: Optional[str] = None) -> bool:
+    """True when the Multicall3 contract has code on the connected chain (checked once per address)."""
+    addr = Web3.to_checksum_address(multicall_address or MULTICALL3_ADDRESS)
+    if addr not in _deployed:
+        try:
+            _deployed[addr] = len(w3.eth.get_code(addr)) > 0
+        except Exception:
+            return False
+    return _deployed[addr]
+
+
+class Batch:
+    """
+    Collects read calls under caller-chosen keys and executes them through
+    Multicall3.aggregate3 with allowFailure=True, one eth_call per chunk.
+    """
+
+    def __init__(self, w3: Web3, multicall_address: Optional[str] = None):
+        self.w3 = w3
+        self.multicall_address = multicall_address or MULTICALL3_ADDRESS
+        self._calls: List[Tuple[Any, str, bytes, List[str]]] = []
+
+    def __len__(self):
+        return len(self._calls)
+
+    def add(self, key, contract, fn_name: str, args: tuple = ()) -> bool:
+        try:
+            data, output_types = encode_call(contract, fn_name, args)
+        except Exception:
+            # function missing from the ABI or args don't fit its signature
+            return False
+        self._calls.append((key, contract.address, data, output_types))
+        return True
+
+    def execute(self) -> Dict[Any, Tuple[bool, Any]]:
+        """Returns {key: (success, decoded_value)}; single-output calls are unwrapped."""
+        results = {}
+        if not self._calls:
+            return results
+
+        multicall = load_contract(self.w3, self.multicall_address, MULTICALL3_ABI_FILE)
+        for start in range(0, len(self._calls), MAX_CALLS_PER_BATCH):
+            chunk = self._calls[start:start + MAX_CALLS_PER_BATCH]
+            payload = [(target, True, data) for _, target, data, _ in chunk]
+            raw = multicall.functions.aggregate3(payload).call()
+            for (key, _, _, output_types), (success, return_data) in zip(chunk, raw):
+                results[key] = _decode(self.w3, success, return_data, output_types)
+        return results
+
+
+def _decode(w3: Web3, success: bool, return_data: bytes, output_types: List[str]) -> Tuple[bool, Any]:
+    if not success or (output_types and not return_data):
+        return False, None
+    try:
+        decoded = w3.codec.decode(output_types, return_data)
+    except Exception:
+        return False, None
+    if len(decoded) == 1:
+        return True, decoded[0]
+    return True, tuple(decoded)
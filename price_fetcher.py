@@ -1,8 +1,11 @@
 # price_fetcher.py
+import os
 import requests
 import logging
 import time
+import threading
 from threading import Lock
+from metrics import HTTP_LATENCY
 
 logger = logging.getLogger("PriceFetcher")
 logging.basicConfig(level=logging.INFO)
@@ -18,49 +21,142 @@ SYMBOL_MAP = {
     "WBTC": "wrapped-bitcoin"
 }
 
-COINGECKO_API = "https://api.coingecko.com/api/v3/simple/price"
+COINGECKO_API = os.getenv("COINGECKO_API", "https://api.coingecko.com/api/v3/simple/price")
 
 _prices = {sym: 0.0 for sym in SYMBOL_MAP.keys()}
-_last_fetch_time = 0
-_CACHE_DURATION = 30
+_fetched_at = {}  # symbol -> time of the last successful fetch
+_CACHE_DURATION = float(os.getenv("PRICE_TTL_S", 30))
 _lock = Lock()
 
+# Symbols the background refresher keeps warm (every rewardToken plus MATIC for gas)
+_tracked = {"MATIC"}
+_refresh_lock = Lock()  # single-flight: one HTTP refresh at a time
+_refresher = None
+_session = requests.Session()
+_router = None  # price_sources.PriceRouter, when installed
 
-def fetch_prices(symbols=None):
-    global _prices, _last_fetch_time
-    symbols = symbols or SYMBOL_MAP.keys()
 
+def _snapshot(symbols):
     with _lock:
-        now = time.time()
-        if now - _last_fetch_time < _CACHE_DURATION:
-            return {sym: _prices.get(sym, 0.0) for sym in symbols}
+        return {sym: _prices.get(sym, 0.0) for sym in symbols}
 
-        ids = ",".join([SYMBOL_MAP[sym] for sym in symbols if sym in SYMBOL_MAP])
-        params = {"ids": ids, "vs_currencies": "usd"}
 
-        for attempt in range(3):
-            try:
-                response = requests.get(COINGECKO_API, params=params, timeout=10)
-                data = response.json()
-                for sym in symbols:
-                    cg_id = SYMBOL_MAP.get(sym)
-                    if cg_id and cg_id in data and "usd" in data[cg_id]:
+def price_age(symbol) -> float:
+    with _lock:
+        fetched = _fetched_at.get(symbol)
+    return float("inf") if fetched is None else time.time() - fetched
+
+
+def is_fresh(symbol) -> bool:
+    return price_age(symbol) < _CACHE_DURATION
+
+
+def fetch_prices(symbols=None):
+    """Blocking batched fetch of the given symbols; only used off the decision path."""
+    symbols = list(symbols or SYMBOL_MAP.keys())
+    wanted = [sym for sym in symbols if sym in SYMBOL_MAP]
+    if not wanted:
+        return _snapshot(symbols)
+
+    ids = ",".join(SYMBOL_MAP[sym] for sym in wanted)
+    params = {"ids": ids, "vs_currencies": "usd"}
+
+    for attempt in range(3):
+        try:
+            with HTTP_LATENCY.time(service="coingecko"):
+                response = _session.get(COINGECKO_API, params=params, timeout=10)
+            data = response.json()
+            now = time.time()
+            with _lock:
+                for sym in wanted:
+                    cg_id = SYMBOL_MAP[sym]
+                    if cg_id in data and "usd" in data[cg_id]:
                         _prices[sym] = float(data[cg_id]["usd"])
+                        _fetched_at[sym] = now
                     else:
                         logger.warning(f"[PriceFetcher] Failed to fetch {sym}: '{cg_id}'")
-                _last_fetch_time = time.time()
-                return {sym: _prices.get(sym, 0.0) for sym in symbols}
-            except requests.RequestException as e:
-                logger.warning(f"[PriceFetcher] Fetch attempt {attempt+1} failed: {e}")
-                time.sleep(1 + attempt)
+            return _snapshot(symbols)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"[PriceFetcher] Fetch attempt {attempt+1} failed: {e}")
+            time.sleep(1 + attempt)
 
-        logger.error("[PriceFetcher] All fetch attempts failed, returning cached prices or 0.0")
-        return {sym: _prices.get(sym, 0.0) for sym in symbols}
+    logger.error("[PriceFetcher] All fetch attempts failed, returning cached prices or 0.0")
+    return _snapshot(symbols)
+
+
+def _refresh_stale():
+    if not _refresh_lock.acquire(blocking=False):
+        return  # a refresh is already in flight
+    try:
+        with _lock:
+            tracked = set(_tracked)
+        # refresh a little ahead of the TTL so readers rarely see a stale entry
+        stale = [sym for sym in tracked if price_age(sym) >= _CACHE_DURATION * 0.8]
+        if stale:
+            fetch_prices(stale)
+    finally:
+        _refresh_lock.release()
+
+
+def track(symbols):
+    """Add symbols to the batch the refresher keeps warm."""
+    with _lock:
+        _tracked.update(sym for sym in symbols if sym)
+
+
+def prefetch(symbols=None):
+    """One blocking batched fetch of every tracked symbol (startup warm-up)."""
+    if symbols:
+        track(symbols)
+    with _lock:
+        tracked = list(_tracked)
+    return fetch_prices(tracked)
+
+
+def start_refresher(symbols=None, interval=None):
+    """Background thread that refreshes tracked symbols before their TTL runs out."""
+    global _refresher
+    if symbols:
+        track(symbols)
+    if _refresher and _refresher.is_alive():
+        return _refresher
+    interval = interval or max(1, _CACHE_DURATION * 0.8)
+
+    def loop():
+        while True:
+            try:
+                _refresh_stale()
+            except Exception as e:
+                logger.warning(f"[PriceFetcher] Background refresh failed: {e}")
+            time.sleep(interval)
+
+    _refresher = threading.Thread(target=loop, name="price-refresher", daemon=True)
+    _refresher.start()
+    return _refresher
+
+
+def set_router(router):
+    """Route get_price through a price_sources.PriceRouter (None restores CoinGecko only)."""
+    global _router
+    _router = router
 
 
 def get_price(symbol):
-    prices = fetch_prices([symbol])
-    return prices.get(symbol, 0.0)
+    if _router is not None:
+        return _router.get_price(symbol)
+    return get_cached_price(symbol)
+
+
+def get_cached_price(symbol):
+    """
+    Never blocks on HTTP: returns the cached price (possibly stale, 0.0 if never
+    fetched) and kicks a background refresh when it is past its TTL.
+    """
+    if symbol in SYMBOL_MAP and not is_fresh(symbol):
+        track([symbol])
+        if not _refresh_lock.locked():
+            threading.Thread(target=_refresh_stale, name="price-refresh", daemon=True).start()
+    return _snapshot([symbol])[symbol]
 
 
 if __name__ == "__main__":
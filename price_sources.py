@@ -0,0 +1,195 @@
+# price_sources.py
+import os
+import time
+import logging
+from threading import Lock
+from typing import Dict, Optional, Tuple
+from web3 import Web3
+import price_fetcher
+from multicall import Batch, is_available as multicall_available
+from utils.helpers import load_contract
+
+logger = logging.getLogger("PriceSources")
+
+PRICE_FEED_ABI_FILE = "abis/price_feed.json"
+
+# Chainlink USD feeds on Polygon; oracle_jobs.json / CHAINLINK_FEEDS add to these
+DEFAULT_CHAINLINK_FEEDS = {
+    "MATIC": "0xAB594600376Ec9fD91F8e885dADF0CE036862dE0",
+}
+
+PRICE_SOURCES = [s.strip() for s in os.getenv("PRICE_SOURCES", "chainlink,coingecko").split(",") if s.strip()]
+CHAINLINK_MAX_AGE_S = int(os.getenv("CHAINLINK_MAX_AGE_S", 3600))
+COINGECKO_MAX_AGE_S = int(os.getenv("COINGECKO_MAX_AGE_S", 300))
+# Two sources disagreeing by more than this makes the price untrusted
+PRICE_MAX_DEVIATION = float(os.getenv("PRICE_MAX_DEVIATION", 0.05))
+
+Quote = Tuple[float, float]  # (price_usd, updated_at unix time)
+
+
+class CoinGeckoSource:
+    """The price_fetcher cache; never does HTTP on the caller's thread."""
+
+    name = "coingecko"
+
+    def __init__(self, max_age_s: int = COINGECKO_MAX_AGE_S):
+        self.max_age_s = max_age_s
+
+    def quote(self, symbol: str) -> Optional[Quote]:
+        price = price_fetcher.get_cached_price(symbol)
+        age = price_fetcher.price_age(symbol)
+        if price <= 0 or age > self.max_age_s:
+            return None
+        return price, time.time() - age
+
+
+class ChainlinkSource:
+    """
+    AggregatorV3 feeds read over the bot's own RPC connection. All feeds are
+    refreshed together in one Multicall3 batch at most once per block;
+    decimals are read once per feed.
+    """
+
+    name = "chainlink"
+
+    def __init__(self, w3: Web3, feeds: Dict[str, str], max_age_s: int = CHAINLINK_MAX_AGE_S):
+        self.w3 = w3
+        self.feeds = {sym: Web3.to_checksum_address(addr) for sym, addr in feeds.items()}
+        self.max_age_s = max_age_s
+        self._lock = Lock()
+        self._refresh_lock = Lock()  # concurrent evaluators share one batch per block
+        self._decimals = {}
+        self._rounds = {}
+        self._block = None
+
+    def ingest(self, rounds: Dict[str, dict], block: Optional[int] = None):
+        """
+        Accept latestRoundData results already read elsewhere this block (bot
+        prefetch). The block only counts as refreshed when every configured
+        feed was among them; otherwise the rest would never be re-read.
+        """
+        with self._lock:
+            fresh = set()
+            for addr, rnd in rounds.items():
+                addr = Web3.to_checksum_address(addr)
+                self._rounds[addr] = rnd
+                fresh.add(addr)
+            if block is not None and fresh.issuperset(self.feeds.values()):
+                self._block = block
+
+    def _refresh(self):
+        with self._refresh_lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self):
+        block = self.w3.eth.block_number  # served by the block cache between heads
+        with self._lock:
+            missing_decimals = [a for a in self.feeds.values() if a not in self._decimals]
+            if block == self._block and not missing_decimals and all(a in self._rounds for a in self.feeds.values()):
+                return
+
+        contracts = {addr: load_contract(self.w3, addr, PRICE_FEED_ABI_FILE) for addr in self.feeds.values()}
+        rounds, decimals = {}, {}
+        if multicall_available(self.w3):
+            batch = Batch(self.w3)
+            for addr, contract in contracts.items():
+                batch.add(("round", addr), contract, "latestRoundData")
+                if addr in missing_decimals:
+                    batch.add(("decimals", addr), contract, "decimals")
+            for (kind, addr), (ok, val) in batch.execute().items():
+                if ok:
+                    (rounds if kind == "round" else decimals)[addr] = val
+        else:
+            for addr, contract in contracts.items():
+                try:
+                    rounds[addr] = contract.functions.latestRoundData().call()
+                    if addr in missing_decimals:
+                        decimals[addr] = contract.functions.decimals().call()
+                except Exception as e:
+                    logger.warning(f"[PriceSources] Chainlink read failed for {addr}: {e}")
+
+        with self._lock:
+            self._decimals.update(decimals)
+            for addr, (round_id, answer, _, updated_at, _) in rounds.items():
+                self._rounds[addr] = {"roundId": round_id, "answer": answer, "updatedAt": updated_at}
+            self._block = block
+
+    def quote(self, symbol: str) -> Optional[Quote]:
+        addr = self.feeds.get(symbol)
+        if addr is None:
+            return None
+        try:
+            self._refresh()
+        except Exception as e:
+            logger.warning(f"[PriceSources] Chainlink refresh failed: {e}")
+        with self._lock:
+            rnd = self._rounds.get(addr)
+            decimals = self._decimals.get(addr)
+        if not rnd or decimals is None or rnd["answer"] <= 0:
+            return None
+        if time.time() - rnd["updatedAt"] > self.max_age_s:
+            return None
+        return rnd["answer"] / (10 ** decimals), float(rnd["updatedAt"])
+
+
+class PriceRouter:
+    """
+    Asks sources in priority order. The first fresh quote wins; when a second
+    source also has a fresh quote and the two disagree by more than
+    max_deviation, the price is treated as unavailable (0.0).
+    """
+
+    def __init__(self, sources, max_deviation: float = PRICE_MAX_DEVIATION):
+        self.sources = list(sources)
+        self.max_deviation = max_deviation
+        self.last_source = {}
+
+    def get_price(self, symbol: str) -> float:
+        quotes = []
+        for source in self.sources:
+            q = source.quote(symbol)
+            if q is not None:
+                quotes.append((source.name, q[0]))
+            if len(quotes) == 2:
+                break
+        if not quotes:
+            return 0.0
+
+        name, price = quotes[0]
+        if len(quotes) == 2:
+            other_name, other = quotes[1]
+            deviation = abs(price - other) / max(price, other)
+            if deviation > self.max_deviation:
+                logger.warning(
+                    f"[PriceSources] {symbol}: {name}={price:.6f} vs {other_name}={other:.6f} "
+                    f"deviates {deviation:.1%} > {self.max_deviation:.1%}, refusing price"
+                )
+                return 0.0
+        self.last_source[symbol] = name
+        return price
+
+
+def feeds_from(jobs) -> Dict[str, str]:
+    """symbol -> feed address from DEFAULT_CHAINLINK_FEEDS, oracle jobs/watchers and CHAINLINK_FEEDS=SYM:addr,..."""
+    feeds = dict(DEFAULT_CHAINLINK_FEEDS)
+    for job in jobs:
+        symbol = job.get("token") or job.get("rewardToken")
+        if symbol and job.get("chainlink_feed_address"):
+            feeds[symbol] = job["chainlink_feed_address"]
+    for pair in os.getenv("CHAINLINK_FEEDS", "").split(","):
+        if ":" in pair:
+            symbol, addr = pair.split(":", 1)
+            feeds[symbol.strip()] = addr.strip()
+    return feeds
+
+
+def install(w3: Web3, jobs=(), order=None) -> PriceRouter:
+    """Build the router in PRICE_SOURCES order and make price_fetcher.get_price use it."""
+    available = {
+        "chainlink": lambda: ChainlinkSource(w3, feeds_from(jobs)),
+        "coingecko": lambda: CoinGeckoSource(),
+    }
+    sources = [available[name]() for name in (order or PRICE_SOURCES) if name in available]
+    router = PriceRouter(sources)
+    price_fetcher.set_router(router)
+    return router
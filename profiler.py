@@ -0,0 +1,196 @@
+# profiler.py
+"""
+On-demand profiling of run_bot cycles. Arm it with PROFILE_CYCLES=N at start
+or GET /profile?cycles=N (N capped at PROFILE_MAX_CYCLES); each of the
+next N cycles then writes, under PROFILE_DIR:
+
+- cycle-<time>-<n>.collapsed: stack samples of every bot thread in the
+  collapsed format ("thread;outer;...;inner count") that flamegraph.pl,
+  speedscope and inferno read
+- cycle-<time>-<n>.trace.json: Chrome trace events (chrome://tracing or
+  ui.perfetto.dev) for the cycle, each watcher's evaluation and send, and
+  every RPC call, on the thread that made it
+
+When nothing is armed, span() is a flag check returning a shared no-op and
+no sampler thread runs.
+"""
+import os
+import sys
+import json
+import time
+import threading
+from collections import Counter
+from typing import Any, Dict
+
+PROFILE_CYCLES = int(os.getenv("PROFILE_CYCLES", 0))
+# Upper bound on armed cycles: each profiled cycle writes a trace and samples stacks
+PROFILE_MAX_CYCLES = int(os.getenv("PROFILE_MAX_CYCLES", 10))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "logs/profiles")
+PROFILE_INTERVAL_S = float(os.getenv("PROFILE_INTERVAL_MS", 5)) / 1000
+# Deeper stacks are cut from the root end
+PROFILE_MAX_DEPTH = int(os.getenv("PROFILE_MAX_DEPTH", 64))
+
+_lock = threading.Lock()
+_armed = 0
+_active = False
+_events = []
+_t0 = 0.0
+_last_files = []
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "args", "started")
+
+    def __init__(self, name: str, args: Dict[str, Any]):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        ended = time.perf_counter()
+        event = {
+            "name": self.name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+            "ts": round((self.started - _t0) * 1e6, 1), "dur": round((ended - self.started) * 1e6, 1),
+        }
+        args = dict(self.args)
+        if exc_type is not None:
+            args["error"] = exc_type.__name__
+        if args:
+            event["args"] = args
+        with _lock:
+            if _active:
+                _events.append(event)
+        return False
+
+
+def span(name: str, **args):
+    """with span("evaluate", watcher=name): ... -- recorded only while a cycle is being profiled."""
+    if not _active:
+        return NULL_SPAN
+    return _Span(name, args)
+
+
+def is_active() -> bool:
+    return _active
+
+
+def arm(cycles: int) -> Dict[str, Any]:
+    """Profile the next `cycles` cycles, at most PROFILE_MAX_CYCLES (0 disarms)."""
+    global _armed
+    with _lock:
+        _armed = max(0, min(int(cycles), PROFILE_MAX_CYCLES))
+    return status()
+
+
+def status() -> Dict[str, Any]:
+    with _lock:
+        return {"armed_cycles": _armed, "max_cycles": PROFILE_MAX_CYCLES, "profiling": _active, "dir": PROFILE_DIR,
+                "last_files": list(_last_files)}
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, interval: float):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(tid, str(tid)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class _Cycle:
+    def __init__(self, args: Dict[str, Any]):
+        self.args = args
+        self.sampler = None
+
+    def __enter__(self):
+        global _active, _armed, _t0
+        with _lock:
+            if not _armed or _active:
+                return self
+            _armed -= 1
+            _active = True
+            _events.clear()
+            _t0 = time.perf_counter()
+        self.started = time.time()
+        self.sampler = _Sampler(PROFILE_INTERVAL_S)
+        self.sampler.start()
+        self._span = _Span("cycle", self.args).__enter__()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        global _active
+        if self.sampler is None:
+            return False
+        self._span.__exit__(exc_type, *exc)
+        self.sampler.stop()
+        with _lock:
+            _active = False
+            events = list(_events)
+            _events.clear()
+        try:
+            self._write(events)
+        except OSError as e:
+            print(f"[Profiler] Could not write profile: {e}")
+        return False
+
+    def _write(self, events):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(self.started))
+        base = os.path.join(PROFILE_DIR, f"cycle-{stamp}-{int(self.started * 1000) % 1000:03d}")
+        with open(base + ".collapsed", "w") as f:
+            for stack, count in self.sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        names = {t.ident: t.name for t in threading.enumerate()}
+        meta = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": names.get(tid, str(tid))}}
+                for tid in {e["tid"] for e in events}]
+        with open(base + ".trace.json", "w") as f:
+            json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f)
+        files = [base + ".collapsed", base + ".trace.json"]
+        with _lock:
+            _last_files[:] = files
+        print(f"[Profiler] {self.sampler.samples} samples, {len(events)} spans -> {base}.{{collapsed,trace.json}}")
+
+
+def cycle(**args):
+    """Context manager around one run_cycle; a no-op unless profiling is armed."""
+    if not _armed:
+        return NULL_SPAN
+    return _Cycle(args)
+
+
+if PROFILE_CYCLES:
+    arm(PROFILE_CYCLES)
@@ -0,0 +1,199 @@
+# profit_ledger.py
+import os
+import csv
+import glob
+import time
+import atexit
+import sqlite3
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+LEDGER_DB = os.getenv("LEDGER_DB", "logs/profit_ledger.db")
+# Rows are buffered and written in one transaction once either limit is hit
+LEDGER_BATCH_SIZE = int(os.getenv("LEDGER_BATCH_SIZE", 50))
+LEDGER_FLUSH_S = float(os.getenv("LEDGER_FLUSH_S", 30))
+
+COLUMNS = ("ts", "protocol", "watcher", "profit_usd", "gas_cost_usd", "tx_hash", "reward_token", "reward_amount")
+GROUP_COLUMNS = ("protocol", "watcher", "reward_token")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profits (
+    id            INTEGER PRIMARY KEY,
+    ts            REAL NOT NULL,
+    protocol      TEXT,
+    watcher       TEXT,
+    profit_usd    REAL,
+    gas_cost_usd  REAL,
+    tx_hash       TEXT UNIQUE,
+    reward_token  TEXT,
+    reward_amount REAL
+);
+CREATE INDEX IF NOT EXISTS idx_profits_ts ON profits (ts);
+CREATE INDEX IF NOT EXISTS idx_profits_protocol_ts ON profits (protocol, ts);
+CREATE INDEX IF NOT EXISTS idx_profits_watcher_ts ON profits (watcher, ts);
+"""
+
+CSV_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ProfitLedger:
+    """
+    SQLite-backed profit history. record() only appends to an in-memory
+    buffer; rows reach disk in batches (LEDGER_BATCH_SIZE / LEDGER_FLUSH_S) or
+    on flush(). Queries flush first so they always see every recorded row.
+    """
+
+    def __init__(self, path: str = LEDGER_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = Lock()
+        self._buffer = []
+        self._last_flush = time.time()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    # ---- writes ----
+    def record(self, row: Dict[str, Any]):
+        with self._lock:
+            self._buffer.append(tuple(row.get(c) for c in COLUMNS))
+            due = len(self._buffer) >= LEDGER_BATCH_SIZE or time.time() - self._last_flush >= LEDGER_FLUSH_S
+        if due:
+            self.flush()
+
+    def flush_if_due(self):
+        with self._lock:
+            due = self._buffer and time.time() - self._last_flush >= LEDGER_FLUSH_S
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._last_flush = time.time()
+            if rows:
+                self._insert(rows)
+        return len(rows)
+
+    def _insert(self, rows):
+        # caller holds the lock
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO profits ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    # ---- imports ----
+    def ingest_csv(self, path: str) -> int:
+        """Import a legacy profit_logger CSV; rows already present by tx_hash are skipped."""
+        rows = []
+        with open(path, "r", newline="") as f:
+            for rec in csv.DictReader(f):
+                try:
+                    ts = time.mktime(time.strptime(rec["timestamp"], CSV_TIME_FORMAT))
+                except (KeyError, ValueError):
+                    continue
+                rows.append((
+                    ts, rec.get("protocol"), rec.get("name"),
+                    _float(rec.get("profit_usd")), _float(rec.get("gas_cost_usd")),
+                    rec.get("tx_hash") or None, rec.get("reward_token"), _float(rec.get("reward_amount")),
+                ))
+        with self._lock:
+            before = self._conn.total_changes
+            if rows:
+                self._insert(rows)
+            return self._conn.total_changes - before
+
+    def ingest_archives(self, logs_dir: str = "logs") -> int:
+        """Import logs/profit_log.csv plus the monthly archives (profit_log_YYYY_MM.csv) left from the CSV era."""
+        total = 0
+        for path in sorted(glob.glob(os.path.join(logs_dir, "profit_log*.csv"))):
+            total += self.ingest_csv(path)
+        return total
+
+    # ---- queries ----
+    def _where(self, start, end, protocol, watcher):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end)
+        if protocol is not None:
+            clauses.append("protocol = ?")
+            params.append(protocol)
+        if watcher is not None:
+            clauses.append("watcher = ?")
+            params.append(watcher)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              protocol: Optional[str] = None, watcher: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Rows with start <= ts < end (unix seconds), oldest first."""
+        self.flush()
+        where, params = self._where(start, end, protocol, watcher)
+        with self._lock:
+            cur = self._conn.execute(f"SELECT {', '.join(COLUMNS)} FROM profits{where} ORDER BY ts", params)
+            return [dict(zip(COLUMNS, r)) for r in cur.fetchall()]
+
+    def aggregate(self, start: Optional[float] = None, end: Optional[float] = None, by: str = "protocol",
+                  protocol: Optional[str] = None, watcher: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-group harvest count, profit and gas totals over a time range."""
+        if by not in GROUP_COLUMNS:
+            raise ValueError(f"Cannot group by {by!r}; expected one of {GROUP_COLUMNS}")
+        self.flush()
+        where, params = self._where(start, end, protocol, watcher)
+        sql = (
+            f"SELECT {by}, COUNT(*), COALESCE(SUM(profit_usd), 0), COALESCE(SUM(gas_cost_usd), 0), MIN(ts), MAX(ts) "
+            f"FROM profits{where} GROUP BY {by} ORDER BY 3 DESC"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {by: key, "harvests": n, "profit_usd": profit, "gas_cost_usd": gas, "first_ts": first, "last_ts": last}
+            for key, n, profit, gas, first, last in rows
+        ]
+
+
+def _float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+_ledger = None
+_ledger_lock = Lock()
+
+
+def get_ledger() -> ProfitLedger:
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = ProfitLedger(LEDGER_DB)
+            atexit.register(_ledger.flush)
+        return _ledger
+
+
+if __name__ == "__main__":
+    # python profit_ledger.py ingest [logs_dir]  |  python profit_ledger.py summary [days]
+    import sys
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "summary"
+    ledger = get_ledger()
+    if cmd == "ingest":
+        print(f"[ProfitLedger] Ingested {ledger.ingest_archives(sys.argv[2] if len(sys.argv) > 2 else 'logs')} rows into {LEDGER_DB}")
+    elif cmd == "summary":
+        days = float(sys.argv[2]) if len(sys.argv) > 2 else 30
+        for row in ledger.aggregate(start=time.time() - days * 86400):
+            print(row)
@@ -1,13 +1,9 @@
 # profit_logger.py
-import csv
-import os
 import time
 from price_fetcher import get_price
+from profit_ledger import get_ledger
 
-LOG_FILE = "logs/profit_log.csv"
-
-def _ensure_logs_dir():
-    os.makedirs("logs", exist_ok=True)
+# The ledger is the only record; import old logs/profit_log*.csv with `python profit_ledger.py ingest`
 
 def gas_cost_usd_from(gas_gwei: float, gas_limit: int) -> float:
     matic_price = get_price("MATIC")
@@ -27,40 +23,34 @@ def safe_reward_amount(amount) -> float:
                 return 0.0
         return 0.0
 
-def log_profit(tx_hash: str, watcher: dict, gas_gwei: float, gas_limit: int) -> float:
+def log_profit(tx_hash: str, watcher: dict, gas_gwei: float, gas_limit: int,
+               reward_amount=None, reward_usd: float = None, gas_cost_usd: float = None) -> float:
+    """
+    Record one harvest in the profit ledger. Callers that already priced the
+    reward/gas on the decision path can pass reward_usd / gas_cost_usd and skip
+    the price lookups here.
+    """
     try:
-        _ensure_logs_dir()
         reward_token = watcher.get("rewardToken", "MATIC")
-        reward_amount = safe_reward_amount(watcher.get("rewardAmount", 0.0))
-        token_price = get_price(reward_token)
-        reward_usd = reward_amount * token_price
-        gas_cost_usd = gas_cost_usd_from(gas_gwei, gas_limit)
+        if reward_amount is None:
+            reward_amount = watcher.get("rewardAmount", 0.0)
+        reward_amount = safe_reward_amount(reward_amount)
+        if reward_usd is None:
+            reward_usd = reward_amount * get_price(reward_token)
+        if gas_cost_usd is None:
+            gas_cost_usd = gas_cost_usd_from(gas_gwei, gas_limit)
         profit = reward_usd - gas_cost_usd
 
-        file_exists = os.path.isfile(LOG_FILE)
-        with open(LOG_FILE, "a", newline="") as csvfile:
-            writer = csv.writer(csvfile)
-            if not file_exists:
-                writer.writerow([
-                    "timestamp",
-                    "protocol",
-                    "name",
-                    "profit_usd",
-                    "gas_cost_usd",
-                    "tx_hash",
-                    "reward_token",
-                    "reward_amount"
-                ])
-            writer.writerow([
-                time.strftime("%Y-%m-%d %H:%M:%S"),
-                watcher.get("protocol"),
-                watcher.get("name"),
-                f"{profit:.6f}",
-                f"{gas_cost_usd:.6f}",
-                tx_hash,
-                reward_token,
-                f"{reward_amount:.8f}"
-            ])
+        get_ledger().record({
+            "ts": time.time(),
+            "protocol": watcher.get("protocol"),
+            "watcher": watcher.get("name"),
+            "profit_usd": round(profit, 6),
+            "gas_cost_usd": round(gas_cost_usd, 6),
+            "tx_hash": tx_hash,
+            "reward_token": reward_token,
+            "reward_amount": reward_amount,
+        })
 
         print(f"[ProfitLogger] {watcher.get('protocol')} {watcher.get('name')} profit: ${profit:.6f}, gas: ${gas_cost_usd:.6f}, tx: {tx_hash}")
         return float(profit)
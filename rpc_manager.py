@@ -1,6 +1,16 @@
-import os, random, time
+import os, time
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from requests.adapters import HTTPAdapter
 from web3 import Web3
+from web3.providers.base import JSONBaseProvider
 from dotenv import load_dotenv
+from utils.rpc_cache import block_cache
+from circuit_breaker import BreakerBoard
+from metrics import RPC_REQUESTS, RPC_LATENCY, endpoint_label
+import profiler
 load_dotenv()
 
 RPC_URLS = [os.getenv(f"RPC_URL_{i}") for i in range(1,5)]
@@ -8,34 +18,227 @@ RPC_URLS = [r for r in RPC_URLS if r]
 
 FAIL_LIMIT = 3
 COOLDOWN_SECONDS = 120
+# An endpoint that keeps failing its probes is benched for up to this long
+RPC_BREAKER_MAX_S = float(os.getenv("RPC_BREAKER_MAX_S", 1800))
 ALERT_THRESHOLD = 300
 
+RPC_TIMEOUT_S = float(os.getenv("RPC_TIMEOUT_S", 10))
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", 16))
+# Hedged reads: if the fastest endpoint hasn't answered after the delay, ask the next one too
+RPC_HEDGE_READS = os.getenv("RPC_HEDGE_READS", "false").lower() == "true"
+RPC_HEDGE_DELAY_S = float(os.getenv("RPC_HEDGE_DELAY_MS", 400)) / 1000
+LATENCY_EWMA_ALPHA = 0.2
+
+# Safe to send to two endpoints at once
+READ_METHODS = {
+    "eth_call", "eth_blockNumber", "eth_gasPrice", "eth_chainId", "eth_getBalance", "eth_getCode",
+    "eth_getTransactionCount", "eth_getTransactionReceipt", "eth_getTransactionByHash",
+    "eth_getBlockByNumber", "eth_estimateGas", "eth_feeHistory", "eth_maxPriorityFeePerGas",
+    "web3_clientVersion", "net_version",
+}
+
 rpc_status = {rpc: {"fails":0, "cooldown_until":0, "last_ok":None, "was_dead":False} for rpc in RPC_URLS}
 _last_all_dead = None
+_pool = None
+
+
+class RPCPoolProvider(JSONBaseProvider):
+    """
+    One provider over every RPC_URL_n. Each endpoint keeps a keep-alive
+    session plus a rolling latency/error estimate; every request goes to the
+    fastest healthy endpoint and fails over to the next on transport errors.
+    Each endpoint has a circuit breaker: FAIL_LIMIT failures bench it for
+    COOLDOWN_SECONDS, doubling on every failed half-open probe.
+    """
+
+    def __init__(self, urls, timeout: float = RPC_TIMEOUT_S, hedge_reads: bool = RPC_HEDGE_READS, hedge_delay_s: float = RPC_HEDGE_DELAY_S):
+        super().__init__()
+        self.urls = list(urls)
+        self.timeout = timeout
+        self.hedge_reads = hedge_reads
+        self.hedge_delay_s = hedge_delay_s
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self.stats = {}
+        self.breakers = BreakerBoard("rpc", failures=FAIL_LIMIT, base_s=COOLDOWN_SECONDS, max_s=RPC_BREAKER_MAX_S)
+        for url in self.urls:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=RPC_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._sessions[url] = session
+            self.stats[url] = {"latency_s": None, "error_rate": 0.0, "requests": 0, "errors": 0}
+            rpc_status.setdefault(url, {"fails":0, "cooldown_until":0, "last_ok":None, "was_dead":False})
+        self._hedge_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rpc-hedge") if hedge_reads else None
+
+    # ---- endpoint health ----
+    def ranked_endpoints(self):
+        """
+        Endpoints whose breaker lets a call through (closed, or half-open with the
+        probe slot free) fastest first; benched ones last, still tried if nothing
+        else is left.
+        """
+        now = time.time()
+        healthy = [u for u in self.urls if self.breakers.get(u).available(now)]
+        cooling = [u for u in self.urls if u not in healthy]
+        with self._lock:
+            def score(url):
+                st = self.stats[url]
+                if st["latency_s"] is not None:
+                    latency = st["latency_s"]
+                else:
+                    # untried: probe it early; never answered: rank it as a timeout
+                    latency = self.timeout if st["errors"] else 0.0
+                return latency * (1 + 4 * st["error_rate"])
+            healthy.sort(key=score)
+        cooling.sort(key=lambda u: self.breakers.get(u).remaining(now))
+        return healthy + cooling
+
+    def _record_ok(self, url, elapsed):
+        with self._lock:
+            st = self.stats[url]
+            st["requests"] += 1
+            st["latency_s"] = elapsed if st["latency_s"] is None else (1 - LATENCY_EWMA_ALPHA) * st["latency_s"] + LATENCY_EWMA_ALPHA * elapsed
+            st["error_rate"] *= (1 - LATENCY_EWMA_ALPHA)
+            status = rpc_status[url]
+            if self.breakers.record_success(url):
+                print(f"[RPC] ✅ {url} recovered")
+            status.update({"fails":0,"cooldown_until":0,"last_ok":time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),"was_dead":False})
+
+    def _record_fail(self, url, err):
+        with self._lock:
+            st = self.stats[url]
+            st["requests"] += 1
+            st["errors"] += 1
+            st["error_rate"] = (1 - LATENCY_EWMA_ALPHA) * st["error_rate"] + LATENCY_EWMA_ALPHA
+            status = rpc_status[url]
+            status["fails"] += 1
+            breaker = self.breakers.get(url)
+            if breaker.record_failure(err):
+                status["cooldown_until"] = breaker.open_until
+                print(f"[RPC] ⚠️ {url} benched for {breaker.remaining():.0f}s (trip {breaker.trips}): {err}")
+                status["was_dead"] = True
+
+    # ---- transport ----
+    def _post(self, url, request_data):
+        self.breakers.get(url).allow()  # claims the half-open probe slot
+        started = time.perf_counter()
+        try:
+            with profiler.span("POST", endpoint=endpoint_label(url)):
+                resp = self._sessions[url].post(
+                    url, data=request_data, timeout=self.timeout,
+                    headers={"Content-Type": "application/json"},
+                )
+            resp.raise_for_status()
+            response = self.decode_rpc_response(resp.content)
+        except Exception as e:
+            RPC_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint_label(url), outcome="error")
+            self._record_fail(url, e)
+            raise
+        elapsed = time.perf_counter() - started
+        RPC_LATENCY.observe(elapsed, endpoint=endpoint_label(url), outcome="ok")
+        self._record_ok(url, elapsed)
+        return response
+
+    def _failover(self, endpoints, request_data):
+        last_err = None
+        for url in endpoints:
+            try:
+                return self._post(url, request_data)
+            except Exception as e:
+                last_err = e
+        raise ConnectionError(f"All RPC endpoints failed: {last_err}")
+
+    def _hedged(self, endpoints, request_data):
+        primary, backup, rest = endpoints[0], endpoints[1], endpoints[2:]
+        futures = {self._hedge_pool.submit(self._post, primary, request_data)}
+        done, _ = wait(futures, timeout=self.hedge_delay_s)
+        if not done:
+            futures.add(self._hedge_pool.submit(self._post, backup, request_data))
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                if f.exception() is None:
+                    return f.result()
+        if len(futures) == 1:
+            rest = [backup] + rest
+        return self._failover(rest, request_data)
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        endpoints = self.ranked_endpoints()
+        if not endpoints:
+            raise ConnectionError("No RPC endpoints configured (RPC_URL_1..RPC_URL_4)")
+        # params are only summarised while a cycle is being profiled
+        trace = profiler.span(f"rpc {method}", **_span_args(method, params)) if profiler.is_active() else profiler.NULL_SPAN
+        try:
+            with trace:
+                if self._hedge_pool and method in READ_METHODS and len(endpoints) > 1:
+                    response = self._hedged(endpoints, request_data)
+                else:
+                    response = self._failover(endpoints, request_data)
+        except Exception:
+            RPC_REQUESTS.inc(method=method, outcome="error")
+            raise
+        RPC_REQUESTS.inc(method=method, outcome="error" if "error" in response else "ok")
+        return response
+
+    def make_batch_request(self, calls):
+        """
+        Several (method, params) calls in one JSON-RPC batch POST. Returns raw
+        response dicts in call order (unformatted: hex quantities).
+        """
+        payload = [{"jsonrpc": "2.0", "method": m, "params": p, "id": i} for i, (m, p) in enumerate(calls)]
+        endpoints = self.ranked_endpoints()
+        if not endpoints:
+            raise ConnectionError("No RPC endpoints configured (RPC_URL_1..RPC_URL_4)")
+        try:
+            with profiler.span("rpc batch", calls=len(calls), method=calls[0][0] if calls else None):
+                response = self._failover(endpoints, json.dumps(payload).encode())
+        except Exception:
+            RPC_REQUESTS.inc(method="batch", outcome="error")
+            raise
+        RPC_REQUESTS.inc(method="batch", outcome="ok" if isinstance(response, list) else "error")
+        if not isinstance(response, list):
+            # some nodes answer a rejected batch with a single error object
+            raise ValueError(f"Batch request rejected: {response}")
+        by_id = {r.get("id"): r for r in response}
+        return [by_id.get(i, {"error": {"message": "missing from batch response"}}) for i in range(len(calls))]
+
+    def endpoint_stats(self):
+        with self._lock:
+            stats = {url: dict(self.stats[url]) for url in self.urls}
+        return {url: {**stats[url], "breaker": self.breakers.get(url).snapshot()} for url in self.urls}
+
+
+def _span_args(method, params):
+    """Enough of the params to tell calls apart in a profile trace."""
+    if method in ("eth_call", "eth_estimateGas") and params and isinstance(params[0], dict):
+        data = params[0].get("data") or params[0].get("input") or ""
+        return {"to": params[0].get("to"), "selector": str(data)[:10]}
+    return {"params": str(params)[:80]} if params else {}
+
+
+def get_pool() -> RPCPoolProvider:
+    global _pool
+    if _pool is None:
+        _pool = RPCPoolProvider(RPC_URLS)
+    return _pool
 
 def get_web3():
     global _last_all_dead
     while True:
-        shuffled = RPC_URLS[:]
-        random.shuffle(shuffled)
         now = time.time()
-        for rpc in shuffled:
-            status = rpc_status[rpc]
-            if now < status["cooldown_until"]:
-                continue
-            try:
-                w3 = Web3(Web3.HTTPProvider(rpc, request_kwargs={'timeout':30}))
-                if w3.is_connected():
-                    status.update({"fails":0,"cooldown_until":0,"last_ok":time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),"was_dead":False})
-                    print(f"[RPC] ✅ Connected via {rpc}")
-                    return w3
-                else:
-                    status["fails"] += 1
-            except:
-                status["fails"] += 1
-            if status["fails"] >= FAIL_LIMIT:
-                status["cooldown_until"] = now + COOLDOWN_SECONDS
-                status["was_dead"] = True
+        try:
+            w3 = Web3(get_pool())
+            w3.middleware_onion.add(block_cache.middleware, name="block_cache")
+            if w3.is_connected():
+                best = w3.provider.ranked_endpoints()[0]
+                print(f"[RPC] ✅ Connected via pool of {len(RPC_URLS)} endpoints (fastest: {best})")
+                return w3
+        except Exception as e:
+            print(f"[RPC] Connect failed: {e}")
         if not any(not rpc_status[r]["was_dead"] and time.time() >= rpc_status[r]["cooldown_until"] for r in RPC_URLS):
             if _last_all_dead is None:
                 _last_all_dead = now
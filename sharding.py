@@ -0,0 +1,336 @@
+# sharding.py
+"""
+Split the watchers across several bot processes without double-harvesting.
+
+Two ways to run it, both coordinated through one SQLite file (SHARD_DB):
+- SHARD_WORKERS=N: `python bot.py` becomes a supervisor that serves the
+  health endpoints and runs N worker processes (WORKER_ID=worker-<i>),
+  restarting any that die
+- WORKER_ID=<name> on each replica, with SHARD_DB on storage they share
+
+Every worker heartbeats a row in SHARD_DB and counts as dead once the row is
+older than SHARD_LEASE_S. A consistent-hash ring over the live workers maps
+each watcher to one owner, so a worker joining or dying moves only its share.
+Owning a watcher on the ring isn't enough to run it: the worker also needs
+the watcher's claim. A claim changes hands only once the previous holder has
+let go (after its in-flight tx for the watcher settled) or died. All workers
+sign with the same key, so nonces come from a counter in the same file
+(utils.nonce_manager.use_shared_store).
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import multiprocessing
+from bisect import bisect
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from state_store import watcher_id
+
+# Worker processes `python bot.py` runs (1 = no sharding unless WORKER_ID is set)
+SHARD_WORKERS = max(1, int(os.getenv("SHARD_WORKERS", 1)))
+# This process's name on the ring; set per replica, or by the supervisor for its children
+WORKER_ID = os.getenv("WORKER_ID", "")
+SHARD_DB = os.getenv("SHARD_DB", "shards.db")
+SHARD_HEARTBEAT_S = float(os.getenv("SHARD_HEARTBEAT_S", 5))
+# A worker whose heartbeat is older than this is dead: its watchers and claims move on
+SHARD_LEASE_S = float(os.getenv("SHARD_LEASE_S", 30))
+# Points per worker on the ring; more points, more even split
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", 64))
+# Supervisor: wait this long before restarting a worker that exited
+SHARD_RESTART_S = float(os.getenv("SHARD_RESTART_S", 5))
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS shard_workers (
+        worker_id TEXT PRIMARY KEY,
+        pid       INTEGER,
+        started   REAL,
+        heartbeat REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS shard_claims (
+        watcher_id TEXT PRIMARY KEY,
+        worker_id  TEXT NOT NULL,
+        claimed_at REAL NOT NULL
+    )
+    """,
+)
+
+
+def enabled() -> bool:
+    return bool(WORKER_ID) or SHARD_WORKERS > 1
+
+
+def is_supervisor() -> bool:
+    """SHARD_WORKERS > 1 without a WORKER_ID: this process runs the workers, not watchers."""
+    return SHARD_WORKERS > 1 and not WORKER_ID
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing: `vnodes` points per member, a key belongs to the next point clockwise."""
+
+    def __init__(self, members: Iterable[str], vnodes: int = SHARD_VNODES):
+        self.members = sorted(set(members))
+        points = sorted((_hash(f"{m}#{i}"), m) for m in self.members for i in range(vnodes))
+        self._points = [p for p, _ in points]
+        self._owners = [m for _, m in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        return self._owners[bisect(self._points, _hash(key)) % len(self._points)]
+
+
+def connect(path: str = SHARD_DB) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    for statement in _SCHEMA:
+        conn.execute(statement)
+    return conn
+
+
+class ShardCoordinator:
+    """
+    One worker's view of the shard: heartbeats in a background thread, and
+    assign() once per main-loop pass to get the watchers it runs.
+    """
+
+    def __init__(self, worker_id: str, path: str = SHARD_DB, lease_s: float = SHARD_LEASE_S,
+                 heartbeat_s: float = SHARD_HEARTBEAT_S, vnodes: int = SHARD_VNODES):
+        self.worker_id = worker_id
+        self.path = path
+        self.lease_s = lease_s
+        self.heartbeat_s = heartbeat_s
+        self.vnodes = vnodes
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._ring = HashRing([], vnodes)
+        self._stop = threading.Event()
+        self._thread = None
+        self.waiting = 0  # owned watchers whose claim another worker still holds
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+                self._conn.execute("COMMIT")
+                return result
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # ---- membership ----
+    def join(self):
+        now = time.time()
+        self._transaction(lambda c: c.execute(
+            "INSERT INTO shard_workers (worker_id, pid, started, heartbeat) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(worker_id) DO UPDATE SET pid=excluded.pid, started=excluded.started, heartbeat=excluded.heartbeat",
+            (self.worker_id, os.getpid(), now, now),
+        ))
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="shard-heartbeat", daemon=True)
+            self._thread.start()
+        print(f"[Shard] {self.worker_id} joined {self.path}")
+
+    def heartbeat(self):
+        self._transaction(lambda c: c.execute(
+            "INSERT INTO shard_workers (worker_id, pid, started, heartbeat) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(worker_id) DO UPDATE SET heartbeat=excluded.heartbeat",
+            (self.worker_id, os.getpid(), time.time(), time.time()),
+        ))
+
+    def _run(self):
+        while not self._stop.wait(self.heartbeat_s):
+            try:
+                self.heartbeat()
+            except sqlite3.Error as e:
+                print(f"[Shard] Heartbeat failed: {e}")
+
+    def leave(self):
+        """Clean shutdown: drop out of the ring and hand every claim back at once."""
+        self._stop.set()
+        self._transaction(lambda c: (
+            c.execute("DELETE FROM shard_claims WHERE worker_id = ?", (self.worker_id,)),
+            c.execute("DELETE FROM shard_workers WHERE worker_id = ?", (self.worker_id,)),
+        ))
+
+    def _live(self, conn) -> List[str]:
+        cutoff = time.time() - self.lease_s
+        return [r[0] for r in conn.execute("SELECT worker_id FROM shard_workers WHERE heartbeat >= ?", (cutoff,))]
+
+    def members(self) -> List[str]:
+        with self._lock:
+            return sorted(self._live(self._conn))
+
+    def is_leader(self) -> bool:
+        """Lowest live worker id; does the once-per-shard chores (watchers.json export)."""
+        members = self.members()
+        return bool(members) and members[0] == self.worker_id
+
+    # ---- assignment ----
+    def assign(self, active: List[Dict[str, Any]], pending: Callable[[], Set[str]] = set) -> List[Dict[str, Any]]:
+        """
+        The watchers in `active` this worker should run now: owned on the ring
+        and claimed. Claims on watchers that moved to another worker are
+        released unless their id is in pending() (tx still in flight); claims
+        on newly owned ones are taken once the previous holder released them
+        or died.
+        """
+        def run(conn):
+            live = set(self._live(conn))
+            live.add(self.worker_id)
+            if set(self._ring.members) != live:
+                before = self._ring.members
+                self._ring = HashRing(live, self.vnodes)
+                print(f"[Shard] {self.worker_id}: ring {len(before)} -> {len(live)} workers ({', '.join(sorted(live))})")
+            ring = self._ring
+            claims = dict(conn.execute("SELECT watcher_id, worker_id FROM shard_claims"))
+            in_flight = pending()
+            released = [wid for wid, holder in claims.items()
+                        if holder == self.worker_id and ring.owner(wid) != self.worker_id and wid not in in_flight]
+            conn.executemany("DELETE FROM shard_claims WHERE watcher_id = ? AND worker_id = ?",
+                             [(wid, self.worker_id) for wid in released])
+
+            now = time.time()
+            mine, taken, waiting = [], [], 0
+            for watcher in active:
+                wid = watcher_id(watcher)
+                if ring.owner(wid) != self.worker_id:
+                    continue
+                holder = claims.get(wid)
+                if holder == self.worker_id:
+                    mine.append(watcher)
+                elif holder is None or holder not in live:
+                    taken.append((wid, self.worker_id, now))
+                    mine.append(watcher)
+                else:
+                    waiting += 1
+            conn.executemany(
+                "INSERT INTO shard_claims (watcher_id, worker_id, claimed_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(watcher_id) DO UPDATE SET worker_id=excluded.worker_id, claimed_at=excluded.claimed_at",
+                taken,
+            )
+            if released or taken:
+                print(f"[Shard] {self.worker_id}: released {len(released)}, claimed {len(taken)} watchers")
+            return mine, waiting
+
+        mine, self.waiting = self._transaction(run)
+        return mine
+
+    def lost(self, watchers: List[Dict[str, Any]]) -> Set[str]:
+        """
+        Ids among `watchers` this worker no longer holds. Checked right before
+        sending: a worker stalled past its lease may have been replaced mid-cycle.
+        """
+        ids = [watcher_id(w) for w in watchers]
+        if not ids:
+            return set()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT watcher_id FROM shard_claims WHERE worker_id = ? AND watcher_id IN ({','.join('?' * len(ids))})",
+                [self.worker_id, *ids],
+            ).fetchall()
+        return set(ids) - {r[0] for r in rows}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**shard_status(self.path, self.lease_s), "worker_id": self.worker_id, "waiting": self.waiting}
+
+
+def shard_status(path: str = SHARD_DB, lease_s: float = SHARD_LEASE_S) -> Dict[str, Any]:
+    """Workers (alive or not) and how many claims each holds, straight from SHARD_DB."""
+    conn = connect(path)
+    try:
+        now = time.time()
+        claims = dict(conn.execute("SELECT worker_id, COUNT(*) FROM shard_claims GROUP BY worker_id"))
+        workers = {
+            wid: {"pid": pid, "alive": now - heartbeat <= lease_s, "heartbeat_age_s": round(now - heartbeat, 1),
+                  "claims": claims.get(wid, 0)}
+            for wid, pid, heartbeat in conn.execute("SELECT worker_id, pid, heartbeat FROM shard_workers ORDER BY worker_id")
+        }
+        return {"workers": workers, "live": sum(1 for w in workers.values() if w["alive"])}
+    finally:
+        conn.close()
+
+
+_coordinator = None
+_coordinator_lock = threading.Lock()
+
+
+def get_coordinator() -> Optional[ShardCoordinator]:
+    """This process's coordinator, or None when sharding is off (or in the supervisor)."""
+    global _coordinator
+    if not WORKER_ID:
+        return None
+    with _coordinator_lock:
+        if _coordinator is None:
+            _coordinator = ShardCoordinator(WORKER_ID)
+        return _coordinator
+
+
+class Supervisor:
+    """
+    Runs `target` in `count` processes, each with WORKER_ID=worker-<i> in its
+    environment, and restarts any that exit. Processes are spawned, not
+    forked, so each starts clean of the supervisor's threads.
+    """
+
+    def __init__(self, target: Callable[[], None], count: int = SHARD_WORKERS, restart_s: float = SHARD_RESTART_S):
+        self.target = target
+        self.count = count
+        self.restart_s = restart_s
+        self._ctx = multiprocessing.get_context("spawn")
+        self._procs = {}
+        self._restarts = {}
+        self._exited_at = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _spawn(self, worker_id: str):
+        # spawned children read WORKER_ID from the environment they start with
+        os.environ["WORKER_ID"] = worker_id
+        try:
+            proc = self._ctx.Process(target=self.target, name=worker_id, daemon=True)
+            proc.start()
+        finally:
+            os.environ.pop("WORKER_ID", None)
+        self._procs[worker_id] = proc
+        print(f"[Shard] Started {worker_id} (pid {proc.pid})")
+
+    def start(self):
+        with self._lock:
+            for i in range(1, self.count + 1):
+                self._spawn(f"worker-{i}")
+        self._thread = threading.Thread(target=self._run, name="shard-supervisor", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(1)
+            with self._lock:
+                for worker_id, proc in list(self._procs.items()):
+                    if proc.is_alive():
+                        continue
+                    if time.time() - self._exited_at.setdefault(worker_id, time.time()) < self.restart_s:
+                        continue
+                    print(f"[Shard] ⚠️ {worker_id} exited ({proc.exitcode}), restarting")
+                    self._exited_at.pop(worker_id)
+                    self._restarts[worker_id] = self._restarts.get(worker_id, 0) + 1
+                    self._spawn(worker_id)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                worker_id: {"pid": proc.pid, "alive": proc.is_alive(), "restarts": self._restarts.get(worker_id, 0)}
+                for worker_id, proc in self._procs.items()
+            }
+
+    def alive(self) -> int:
+        return sum(1 for s in self.status().values() if s["alive"])
@@ -0,0 +1,231 @@
+# state_store.py
+import os
+import json
+import time
+import sqlite3
+from threading import Lock
+from typing import Any, Dict, List
+
+STATE_DB = os.getenv("STATE_DB", "watchers.db")
+
+# Fields the bot writes back after each evaluation; everything else is config
+STATE_FIELDS = ("last_harvest", "last_error", "last_decision")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watchers (
+    id            TEXT PRIMARY KEY,
+    position      INTEGER NOT NULL,
+    config        TEXT NOT NULL,
+    last_harvest  REAL,
+    last_error    TEXT,
+    last_decision TEXT,
+    updated_at    REAL
+)
+"""
+
+
+def watcher_id(watcher: Dict[str, Any]) -> str:
+    """Stable key: explicit "id", else contract address + name (what the old JSON match used)."""
+    if watcher.get("id"):
+        return str(watcher["id"])
+    return f"{str(watcher.get('contract_address', '')).lower()}:{watcher.get('name', '')}"
+
+
+def save_json_atomic(path: str, watchers: list):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(watchers, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class StateStore:
+    """
+    Watcher config + per-watcher state in SQLite (WAL). State updates touch a
+    single row by primary key inside one transaction, so they are atomic and
+    O(1) regardless of how many watchers exist.
+    """
+
+    def __init__(self, path: str = STATE_DB):
+        self.path = path
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM watchers").fetchone()[0]
+
+    @staticmethod
+    def _row(watcher: Dict[str, Any]):
+        config = {k: v for k, v in watcher.items() if k not in STATE_FIELDS}
+        decision = watcher.get("last_decision")
+        return (
+            json.dumps(config),
+            watcher.get("last_harvest"),
+            watcher.get("last_error"),
+            json.dumps(decision) if decision is not None else None,
+        )
+
+    # ---- bulk import / export (watchers.json format) ----
+    def import_watchers(self, watchers: List[Dict[str, Any]], keep_state: bool = False):
+        """
+        Upsert watchers in watchers.json format. With keep_state the JSON is only
+        the config source: stored state wins for known ids, and ids missing from
+        the JSON are removed.
+        """
+        now = time.time()
+        on_conflict = "position=excluded.position, config=excluded.config"
+        if not keep_state:
+            on_conflict += (", last_harvest=excluded.last_harvest, last_error=excluded.last_error, "
+                            "last_decision=excluded.last_decision, updated_at=excluded.updated_at")
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for position, watcher in enumerate(watchers):
+                    config, last_harvest, last_error, last_decision = self._row(watcher)
+                    self._conn.execute(
+                        "INSERT INTO watchers (id, position, config, last_harvest, last_error, last_decision, updated_at) "
+                        f"VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET {on_conflict}",
+                        (watcher_id(watcher), position, config, last_harvest, last_error, last_decision, now),
+                    )
+                if keep_state:
+                    ids = [watcher_id(w) for w in watchers]
+                    self._conn.execute(
+                        f"DELETE FROM watchers WHERE id NOT IN ({','.join('?' * len(ids))})" if ids else "DELETE FROM watchers",
+                        ids,
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def import_json(self, path: str, keep_state: bool = False) -> int:
+        with open(path, "r") as f:
+            text = f.read().strip()
+        watchers = json.loads(text) if text else []
+        self.import_watchers(watchers, keep_state=keep_state)
+        return len(watchers)
+
+    def load(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT config, last_harvest, last_error, last_decision FROM watchers ORDER BY position"
+            ).fetchall()
+        watchers = []
+        for config, last_harvest, last_error, last_decision in rows:
+            watcher = json.loads(config)
+            if last_harvest is not None:
+                watcher["last_harvest"] = last_harvest
+            if last_error is not None:
+                watcher["last_error"] = last_error
+            if last_decision is not None:
+                watcher["last_decision"] = json.loads(last_decision)
+            watchers.append(watcher)
+        return watchers
+
+    def export_json(self, path: str):
+        save_json_atomic(path, self.load())
+
+    # ---- per-watcher state ----
+    def update(self, watcher: Dict[str, Any]):
+        self.update_many([watcher])
+
+    def update_many(self, watchers: List[Dict[str, Any]]):
+        """Write the state fields of each watcher in one transaction; unknown ids are appended."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for watcher in watchers:
+                    _, last_harvest, last_error, last_decision = self._row(watcher)
+                    cur = self._conn.execute(
+                        "UPDATE watchers SET last_harvest=?, last_error=?, last_decision=?, updated_at=? WHERE id=?",
+                        (last_harvest, last_error, last_decision, now, watcher_id(watcher)),
+                    )
+                    if cur.rowcount == 0:
+                        position = self._conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM watchers").fetchone()[0]
+                        config, *_ = self._row(watcher)
+                        self._conn.execute(
+                            "INSERT INTO watchers (id, position, config, last_harvest, last_error, last_decision, updated_at) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (watcher_id(watcher), position, config, last_harvest, last_error, last_decision, now),
+                        )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+_store = None
+_store_lock = Lock()
+
+
+def get_store() -> StateStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = StateStore(STATE_DB)
+        return _store
+
+
+def _bench(n: int):
+    import tempfile
+    tmp = tempfile.mkdtemp()
+    watchers = [
+        {"name": f"vault-{i}", "protocol": "autofarm", "contract_address": f"0x{i:040x}",
+         "abi_file": "abis/autofarm.json", "pid": i, "rewardToken": "AUTO"}
+        for i in range(n)
+    ]
+    json_path = os.path.join(tmp, "watchers.json")
+    save_json_atomic(json_path, watchers)
+
+    # old path: re-read, linear match, rewrite the whole file per harvest
+    updates = 200
+    start = time.perf_counter()
+    for i in range(updates):
+        target = watchers[(i * 7) % n]
+        target["last_harvest"] = time.time()
+        with open(json_path, "r") as f:
+            current = json.load(f)
+        for w in current:
+            if w.get("contract_address") == target["contract_address"] and w.get("name") == target["name"]:
+                w.update(target)
+                break
+        with open(json_path, "w") as f:
+            json.dump(current, f, indent=2)
+    legacy = (time.perf_counter() - start) / updates
+
+    store = StateStore(os.path.join(tmp, "watchers.db"))
+    store.import_watchers(watchers)
+    start = time.perf_counter()
+    for i in range(updates):
+        target = watchers[(i * 7) % n]
+        target["last_harvest"] = time.time()
+        store.update(target)
+    single = (time.perf_counter() - start) / updates
+    store.close()
+
+    print(f"[StateStore] {n} watchers: JSON rewrite {legacy * 1000:.2f} ms/update, "
+          f"SQLite WAL {single * 1000:.3f} ms/update ({legacy / single:.0f}x)")
+
+
+if __name__ == "__main__":
+    # python state_store.py import|export [watchers.json]  |  python state_store.py bench [n]
+    import sys
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "bench"
+    if cmd == "bench":
+        _bench(int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
+    elif cmd == "import":
+        print(f"[StateStore] Imported {get_store().import_json(sys.argv[2] if len(sys.argv) > 2 else 'watchers.json')} watchers into {STATE_DB}")
+    elif cmd == "export":
+        path = sys.argv[2] if len(sys.argv) > 2 else "watchers.json"
+        get_store().export_json(path)
+        print(f"[StateStore] Exported {STATE_DB} to {path}")
@@ -2,6 +2,7 @@ import os
 import logging
 import datetime
 from telegram_notifier import send_alert
+import analytics
 
 logger = logging.getLogger("SummaryReporter")
 
@@ -23,6 +24,11 @@ class SummaryReporter:
         now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
         summary = [f"📊 Daily Summary ({now})"]
 
+        try:
+            summary.append(analytics.daily_summary(hours=24))
+        except Exception as e:
+            logger.warning(f"[SummaryReporter] Profit analytics unavailable: {e}")
+
         if self.successes:
             summary.append("✅ Successes:")
             summary.extend(self.successes)
@@ -41,3 +47,14 @@ class SummaryReporter:
         # Reset logs after summary
         self.successes = []
         self.failures = []
+
+
+def generate_summary(profit_tracker=None, hours: float = 24):
+    """Scheduled daily report: ledger rollups plus the in-memory tracker totals if given."""
+    lines = [analytics.daily_summary(hours=hours)]
+    if profit_tracker is not None and profit_tracker.report():
+        lines.append(f"Tracked this session: ${profit_tracker.total():.2f}")
+    message = "\n".join(lines)
+    logger.info(message)
+    send_alert(message)
+    return message
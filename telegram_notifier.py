@@ -1,23 +1,151 @@
 import os
+import time
+import queue
+import atexit
+import threading
 import requests
+from metrics import HTTP_LATENCY
 
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID")
+TELEGRAM_API_BASE = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org")
+
+BASE_URL = f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+
+# Alert queue: send_alert only enqueues, a background worker does the HTTP
+ALERT_QUEUE_SIZE = int(os.environ.get("ALERT_QUEUE_SIZE", 500))
+# Alerts arriving within this window go out as one message
+ALERT_COALESCE_S = float(os.environ.get("ALERT_COALESCE_S", 1.0))
+# Telegram allows roughly one message per second per chat
+TELEGRAM_MIN_INTERVAL_S = float(os.environ.get("TELEGRAM_MIN_INTERVAL_S", 1.0))
+MAX_MESSAGE_LEN = 4096
+
+_queue = queue.Queue(maxsize=ALERT_QUEUE_SIZE)
+_dropped = 0
+_dropped_lock = threading.Lock()
+_worker = None
+_worker_lock = threading.Lock()
+_last_sent = 0.0
+_session = requests.Session()
+
+
+def _post(text: str):
+    global _last_sent
+    payload = {
+        "chat_id": TELEGRAM_CHAT_ID,
+        "text": text,
+        "parse_mode": "HTML"
+    }
+    for _ in range(3):
+        wait = TELEGRAM_MIN_INTERVAL_S - (time.time() - _last_sent)
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            with HTTP_LATENCY.time(service="telegram"):
+                response = _session.post(BASE_URL, data=payload, timeout=5)
+            _last_sent = time.time()
+            if response.status_code == 429:
+                # Telegram tells us how long to back off
+                try:
+                    retry_after = response.json().get("parameters", {}).get("retry_after", 1)
+                except ValueError:
+                    retry_after = 1
+                time.sleep(float(retry_after))
+                continue
+            if not response.ok:
+                print(f"[Telegram] Failed to send message: {response.text}")
+            return
+        except Exception as e:
+            print(f"[Telegram] Exception sending alert: {e}")
+            return
+
+
+def _coalesce(messages):
+    """Collapse repeats ("msg (x3)") and join the burst, split to Telegram's size limit."""
+    counts = {}
+    for m in messages:
+        counts[m] = counts.get(m, 0) + 1
+    lines = [m if n == 1 else f"{m} (x{n})" for m, n in counts.items()]
+
+    chunks, current = [], ""
+    for line in lines:
+        line = line[:MAX_MESSAGE_LEN]
+        if current and len(current) + 1 + len(line) > MAX_MESSAGE_LEN:
+            chunks.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _take_dropped() -> int:
+    global _dropped
+    with _dropped_lock:
+        n, _dropped = _dropped, 0
+    return n
+
+
+def _run():
+    while True:
+        batch = [_queue.get()]
+        deadline = time.time() + ALERT_COALESCE_S
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        taken = len(batch)
+        try:
+            dropped = _take_dropped()
+            if dropped:
+                batch.append(f"⚠️ {dropped} alerts dropped (alert queue full)")
+            for chunk in _coalesce(batch):
+                _post(chunk)
+        except Exception as e:
+            print(f"[Telegram] Alert worker error: {e}")
+        finally:
+            for _ in range(taken):
+                _queue.task_done()
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="telegram-alerts", daemon=True)
+            _worker.start()
 
-BASE_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
 
 def send_alert(message: str):
+    """Queue an alert; never blocks the caller on the Telegram API."""
+    global _dropped
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
         print(f"[Telegram] Skipped (no credentials): {message}")
         return
+    _ensure_worker()
     try:
-        payload = {
-            "chat_id": TELEGRAM_CHAT_ID,
-            "text": message,
-            "parse_mode": "HTML"
-        }
-        response = requests.post(BASE_URL, data=payload, timeout=5)
-        if not response.ok:
-            print(f"[Telegram] Failed to send message: {response.text}")
-    except Exception as e:
-        print(f"[Telegram] Exception sending alert: {e}")
+        _queue.put_nowait(message)
+    except queue.Full:
+        with _dropped_lock:
+            _dropped += 1
+
+
+def flush(timeout: float = 10.0) -> bool:
+    """Wait for queued alerts to go out; True when the queue drained in time."""
+    deadline = time.time() + timeout
+    while _queue.unfinished_tasks:
+        if time.time() > deadline:
+            print(f"[Telegram] Flush timed out with {_queue.unfinished_tasks} alerts pending")
+            return False
+        time.sleep(0.05)
+    return True
+
+
+atexit.register(flush)
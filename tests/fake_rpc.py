@@ -0,0 +1,68 @@
+# tests/fake_rpc.py
+"""A local JSON-RPC endpoint whose latency and health the test controls."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESULTS = {
+    "web3_clientVersion": "fake-rpc/1.0",
+    "eth_chainId": "0x89",
+    "eth_blockNumber": "0x10",
+    "eth_gasPrice": "0x3b9aca00",
+}
+
+
+class FakeRPC:
+    """
+    Answers every request after `delay` seconds, or with HTTP 503 while
+    `failing` is set. `hits` counts requests (a batch counts once), and
+    `methods` records them in arrival order.
+    """
+
+    def __init__(self, delay: float = 0.0, failing: bool = False):
+        self.delay = delay
+        self.failing = failing
+        self.hits = 0
+        self.methods = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def answer(self, call):
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": RESULTS.get(call["method"], "0x")}
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        fake = self.server.fake
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with fake._lock:
+            fake.hits += 1
+            fake.methods.extend(c["method"] for c in (body if isinstance(body, list) else [body]))
+        time.sleep(fake.delay)
+        if fake.failing:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        payload = [fake.answer(c) for c in body] if isinstance(body, list) else fake.answer(body)
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
@@ -0,0 +1,59 @@
+# tests/test_backtest.py
+"""backtest.simulate against a step-by-step replay through the live decide_to_harvest."""
+import numpy as np
+import pytest
+from conftest import FixedPrices
+
+import price_fetcher
+from ai_agent import decide_to_harvest
+from backtest import param_grid, simulate, synthetic_series
+
+GAS_LIMIT = 150_000
+
+
+@pytest.fixture
+def series():
+    return synthetic_series(steps=240, watchers=3, seed=7, gas_spike_prob=0.05, reward_per_hour=2.0)
+
+
+def scalar_replay(series, params, monkeypatch):
+    """One combination, one watcher and one step at a time through decide_to_harvest."""
+    router = FixedPrices({})
+    monkeypatch.setattr(price_fetcher, "_router", router)
+    config = {"profit_multiplier": params["profit_multiplier"], "absolute_max_gas_gwei": params["absolute_max_gas_gwei"]}
+    steps, watchers = series["accrual"].shape
+    pending = np.zeros(watchers)
+    net = gas_spent = 0.0
+    harvests = 0
+    for t in range(steps):
+        pending += series["accrual"][t]
+        for w in range(watchers):
+            router.prices = {"MATIC": series["matic_price"][t], "TKN": series["token_price"][t, w]}
+            d = decide_to_harvest({"name": f"w{w}"}, {"amount": pending[w], "symbol": "TKN"},
+                                  series["gas_gwei"][t], GAS_LIMIT, config)
+            # min_reward_usd only exists in the backtest
+            if d["should"] and d["reward_usd"] >= params["min_reward_usd"]:
+                net += d["reward_usd"] - d["gas_cost_usd"]
+                gas_spent += d["gas_cost_usd"]
+                harvests += 1
+                pending[w] = 0.0
+    return net, harvests, gas_spent
+
+
+def test_simulate_matches_decide_to_harvest(series, monkeypatch):
+    grid = param_grid(profit_multiplier=(1.5, 4, 20), min_reward_usd=(0, 2), absolute_max_gas_gwei=(70, 600))
+    results = simulate(series, grid, gas_limit=GAS_LIMIT)
+
+    assert results["harvests"].max() > 0 and results["harvests"].min() < results["harvests"].max()
+    for i in range(len(grid["profit_multiplier"])):
+        params = {name: grid[name][i] for name in grid}
+        net, harvests, gas_spent = scalar_replay(series, params, monkeypatch)
+        assert results["harvests"][i] == harvests, params
+        assert results["net_profit_usd"][i] == pytest.approx(net), params
+        assert results["gas_spent_usd"][i] == pytest.approx(gas_spent), params
+
+
+def test_live_decision_has_no_min_reward_gate(prices):
+    decision = decide_to_harvest({"name": "w"}, {"amount": 0.1, "symbol": "AUTO"}, 30.0, GAS_LIMIT,
+                                 {"min_reward_usd": 100.0, "profit_multiplier": 2.0})
+    assert decision["should"] and decision["reward_usd"] == pytest.approx(1.0)
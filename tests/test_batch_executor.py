@@ -0,0 +1,87 @@
+# tests/test_batch_executor.py
+"""Batched harvests end to end on the dev chain: only permissionless harvests go through the aggregator."""
+import pytest
+from conftest import BOT_KEY
+
+from ai_agent import evaluate_watcher, execute_plan
+from batch_executor import BatchExecutor
+
+CONFIG = {"profit_multiplier": 2.0, "absolute_max_gas_gwei": 600, "batch": True}
+# a multiplier no single harvest can meet, so only batch candidates come back
+TOO_SMALL_ALONE = {**CONFIG, "profit_multiplier": 1e9}
+REWARD = 6 * 10 ** 16  # 0.06 AUTO = $0.60
+
+
+def make_watchers(chain, mock, staker, count=3, **extra):
+    addresses = chain.clones(mock, [REWARD] * count, staker)
+    return [
+        {"name": f"{mock}-{i}", "protocol": "autofarm", "contract_address": address,
+         "abi_file": "abis/autofarm.json", "pid": i, "rewardToken": "AUTO", **extra}
+        for i, address in enumerate(addresses)
+    ]
+
+
+def contract_at(chain, name, address):
+    return chain.w3.eth.contract(address=address, abi=chain._contract(name).abi)
+
+
+def plans_for(w3, watchers, bot_address, config=CONFIG):
+    return [(w, evaluate_watcher(w3, w, bot_address, config)) for w in watchers]
+
+
+def test_per_user_farm_credits_the_sender(chain, w3, bot_address, prices):
+    watcher = make_watchers(chain, "MockFarm", bot_address, count=1)[0]
+    plan = evaluate_watcher(w3, watcher, bot_address, {**CONFIG, "batch": False})
+    assert plan and plan["decision"]["should"]
+
+    assert execute_plan(w3, watcher, plan, bot_address, BOT_KEY)
+    farm = contract_at(chain, "MockFarm", watcher["contract_address"])
+    assert farm.functions.claimed(bot_address).call() == REWARD
+
+
+def test_per_user_farms_are_never_batched(chain, w3, bot_address, multicall3, prices):
+    watchers = make_watchers(chain, "MockFarm", bot_address)
+    # too small alone, and not offered to the batch either
+    assert all(plan is None for _, plan in plans_for(w3, watchers, bot_address, TOO_SMALL_ALONE))
+
+    # even when handed plans directly, the executor leaves them alone
+    forced = plans_for(w3, watchers, bot_address)
+    assert BatchExecutor(w3, multicall3.address).execute(forced, bot_address, BOT_KEY, CONFIG) == {}
+    for watcher in watchers:
+        farm = contract_at(chain, "MockFarm", watcher["contract_address"])
+        assert farm.functions.claimed(multicall3.address).call() == 0
+        assert farm.functions.harvests(watcher["pid"]).call() == 0
+
+
+def test_permissionless_harvests_go_out_as_one_tx(chain, w3, bot_address, multicall3, prices):
+    watchers = make_watchers(chain, "MockStrategy", bot_address, permissionless_harvest=True)
+    assert all(plan and not plan["decision"]["should"] for _, plan in plans_for(w3, watchers, bot_address, TOO_SMALL_ALONE))
+
+    pairs = plans_for(w3, watchers, bot_address)
+
+    sent = BatchExecutor(w3, multicall3.address).execute(pairs, bot_address, BOT_KEY, CONFIG)
+    assert set(sent) == {id(w) for w in watchers}
+    (tx_hash,) = set(sent.values())
+    assert w3.eth.get_transaction_receipt(tx_hash)["status"] == 1
+    for watcher in watchers:
+        strategy = contract_at(chain, "MockStrategy", watcher["contract_address"])
+        assert strategy.functions.harvests(watcher["pid"]).call() == 1
+        assert strategy.functions.compounded().call() == REWARD
+        assert watcher.get("last_harvest")
+
+
+def test_auto_min_reward_is_met_by_the_combined_reward(chain, w3, bot_address, multicall3, prices):
+    watchers = make_watchers(chain, "MockStrategy", bot_address, permissionless_harvest=True)
+    config = {**CONFIG, "auto_min_reward_usd": 1.0}  # $0.60 each, $1.80 together
+    pairs = plans_for(w3, watchers, bot_address, config)
+    assert all(plan["decision"]["reason"].startswith("reward_below_auto_min") for _, plan in pairs)
+
+    sent = BatchExecutor(w3, multicall3.address).execute(pairs, bot_address, BOT_KEY, config)
+    assert len(set(sent.values())) == 1 and len(sent) == 3
+
+
+@pytest.fixture(autouse=True)
+def fresh_signer(bot_address):
+    # each test's sends start from the chain's pending nonce
+    from utils.nonce_manager import _managers
+    _managers.clear()
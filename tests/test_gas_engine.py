@@ -0,0 +1,108 @@
+# tests/test_gas_engine.py
+"""GasEngine's eth_feeHistory fallback: permanent only when the node lacks the method."""
+from types import SimpleNamespace
+
+import pytest
+from web3.exceptions import MethodUnavailable
+
+from gas_engine import GasEngine
+
+GWEI = 10 ** 9
+
+
+class StubEth:
+    def __init__(self, errors):
+        self.block_number = 100
+        self.errors = list(errors)  # raised by successive fee_history calls, then it answers
+        self.fee_history_calls = 0
+        self.gas_price = 80 * GWEI
+
+    def fee_history(self, count, block, percentiles):
+        self.fee_history_calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {
+            "oldestBlock": block - count + 1,
+            "baseFeePerGas": [50 * GWEI] * (count + 1),
+            "gasUsedRatio": [0.5] * count,
+            "reward": [[40 * GWEI] * len(percentiles)] * count,
+        }
+
+    def get_block(self, number):
+        return {"number": number, "baseFeePerGas": 50 * GWEI, "gasUsed": 15_000_000, "gasLimit": 30_000_000}
+
+
+def engine(*errors):
+    eth = StubEth(errors)
+    return eth, GasEngine(SimpleNamespace(eth=eth))
+
+
+@pytest.mark.parametrize("error", [
+    MethodUnavailable({"code": -32601, "message": "RPC Endpoint has not been implemented: eth_feeHistory"}),
+    ValueError({"code": -32601, "message": "the method eth_feeHistory does not exist/is not available"}),
+    ValueError("Method not found"),
+])
+def test_missing_method_disables_fee_history(error):
+    eth, gas = engine(error)
+    gas.refresh()
+    assert gas.stats()["fee_history"] is False
+
+    eth.block_number += 1
+    gas.refresh()
+    assert eth.fee_history_calls == 1
+    assert gas.suggest()["eip1559"]  # still priced from the latest block
+
+
+@pytest.mark.parametrize("error", [
+    TimeoutError("read timed out"),
+    ValueError({"code": -32005, "message": "rate limit exceeded"}),
+    ConnectionError("502 Bad Gateway"),
+])
+def test_transient_failure_falls_back_for_one_block(error):
+    eth, gas = engine(error)
+    gas.refresh()
+    assert gas.stats()["fee_history"] is True
+    assert gas.stats()["latest_block"] == 100  # the fallback sampled this block
+
+    # same block: no second attempt
+    gas.refresh()
+    assert eth.fee_history_calls == 1
+
+    eth.block_number += 1
+    gas.refresh()
+    assert eth.fee_history_calls == 2
+    assert gas.stats()["latest_block"] == 101
+    assert gas.stats()["blocks"] == 2  # the fallback sample plus the feeHistory block
+
+
+def test_auto_profiler_needs_a_real_config(tmp_path, monkeypatch):
+    import gas_engine
+    monkeypatch.setattr(gas_engine, "CONFIG_FILE", str(tmp_path / "config.json"))
+    # config.template.json sits in the working directory but is never applied
+    assert gas_engine.load_auto_profiler() is None
+
+    (tmp_path / "config.json").write_text('{"min_reward_usd": 1.0}')
+    assert gas_engine.load_auto_profiler() is None
+
+    (tmp_path / "config.json").write_text('{"auto_profiler": {"low_gas_threshold": 30, "high_gas_min_reward": 3}}')
+    assert gas_engine.load_auto_profiler() == {"low_gas_threshold": 30.0, "high_gas_min_reward": 3.0}
+
+
+def test_auto_profiler_floor_gates_live_decisions(prices):
+    from gas_engine import adaptive_min_reward
+    from ai_agent import decide_to_harvest
+    profiler = {"low_gas_threshold": 30, "high_gas_threshold": 100, "low_gas_min_reward": 0.5, "high_gas_min_reward": 2.0}
+    pending = {"amount": 0.1, "symbol": "AUTO"}  # $1.00
+
+    def decide(gas_gwei, floor):
+        config = {"profit_multiplier": 2.0}
+        if floor is not None:
+            config["auto_min_reward_usd"] = floor
+        return decide_to_harvest({"name": "w"}, pending, gas_gwei, 150_000, config)
+
+    assert decide(30, adaptive_min_reward(30, profiler))["should"]
+    high = decide(100, adaptive_min_reward(100, profiler))
+    assert not high["should"] and high["reason"].startswith("reward_below_auto_min")
+    assert high["required_reward_usd"] == 2.0
+    # without auto_profiler there is no floor at all
+    assert decide(100, None)["should"]
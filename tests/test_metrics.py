@@ -0,0 +1,43 @@
+# tests/test_metrics.py
+"""/metrics exposes the RPC block cache and gas-estimate cache counters."""
+import pytest
+
+from utils import rpc_cache, gas_cache
+from utils.rpc_cache import BlockCache
+
+
+@pytest.fixture
+def client():
+    import bot
+    return bot.app.test_client()
+
+
+def sample(body: str, series: str) -> float:
+    line = next(l for l in body.splitlines() if l.startswith(series + " "))
+    return float(line.rsplit(" ", 1)[1])
+
+
+def test_cache_counters_are_exported(client, monkeypatch):
+    cache = BlockCache(max_entries=1)
+    monkeypatch.setattr(rpc_cache, "block_cache", cache)
+    node = {"eth_blockNumber": "0x10", "eth_call": "0x01", "eth_gasPrice": "0x02"}
+    call = cache.middleware(lambda method, params: {"result": node[method]}, None)
+    call("eth_call", [{"to": "0x1"}, "latest"])  # miss
+    call("eth_call", [{"to": "0x1"}, "latest"])  # hit
+    call("eth_gasPrice", [])                     # miss, evicts the eth_call entry
+
+    gas_cache.clear()
+    gas_cache.put("k", 21000)
+    gas_cache.get("k")
+    gas_cache.get("other")
+
+    body = client.get("/metrics").get_data(as_text=True)
+    rpc = cache.stats()
+    assert sample(body, 'oraclebot_cache_lookups_total{cache="rpc",result="hit"}') == rpc["hits"] == 1
+    assert sample(body, 'oraclebot_cache_lookups_total{cache="rpc",result="miss"}') == rpc["misses"] == 2
+    assert sample(body, 'oraclebot_cache_evictions_total{cache="rpc"}') == 1
+    assert sample(body, 'oraclebot_cache_entries{cache="rpc"}') == 1
+    assert sample(body, 'oraclebot_cache_lookups_total{cache="gas",result="hit"}') == 1
+    assert sample(body, 'oraclebot_cache_lookups_total{cache="gas",result="miss"}') == 1
+    assert sample(body, 'oraclebot_cache_entries{cache="gas"}') == 1
+    gas_cache.clear()
@@ -0,0 +1,86 @@
+# tests/test_multicall.py
+"""Multicall3 batched reads against the dev chain, compared with the per-watcher path."""
+import pytest
+
+import multicall
+from multicall import Batch
+from utils import method_cache
+from utils.helpers import load_contract
+from ai_agent import prefetch_reads, detect_pending_reward
+
+NO_CODE = "0x" + "00" * 19 + "42"
+
+
+@pytest.fixture(autouse=True)
+def fresh_reads(monkeypatch, multicall3):
+    monkeypatch.setattr(multicall, "MULTICALL3_ADDRESS", multicall3.address)
+    monkeypatch.setattr(multicall, "_deployed", {})
+    monkeypatch.setattr(method_cache, "_entries", {})
+
+
+def farm_watchers(chain, staker):
+    rewards = [10 ** 18, 25 * 10 ** 17, 0]
+    farms = chain.clones("MockFarm", rewards, staker)
+    gauges = chain.clones("MockRewards", [7 * 10 ** 16], staker)
+    watchers = [
+        {"name": f"farm-{i}", "contract_address": a, "abi_file": "abis/autofarm.json", "pid": i, "rewardToken": "AUTO"}
+        for i, a in enumerate(farms)
+    ]
+    watchers.append({"name": "gauge", "contract_address": gauges[0], "abi_file": "abis/balancer.json", "rewardToken": "USDC"})
+    return watchers
+
+
+def test_batched_amounts_match_per_watcher_reads(chain, w3, bot_address):
+    watchers = farm_watchers(chain, bot_address)
+    # per-watcher first, then forget what it resolved so the batch probes from scratch
+    single = {}
+    for w in watchers:
+        single[w["name"]] = detect_pending_reward(w3, load_contract(w3, w["contract_address"], w["abi_file"]), w, bot_address)
+    method_cache._entries.clear()
+
+    pending = prefetch_reads(w3, watchers, bot_address)["pending"]
+    assert set(pending) == {id(w) for w in watchers}
+    for w in watchers:
+        assert pending[id(w)]["amount"] == single[w["name"]]["amount"]
+        assert pending[id(w)]["method"] == single[w["name"]]["method"]
+    assert [pending[id(w)]["amount"] for w in watchers] == [1.0, 2.5, 0.0, 0.07]
+
+
+def test_failed_calls_decode_as_failures(chain, w3, bot_address, multicall3):
+    farm = chain.clones("MockFarm", [10 ** 18], bot_address)[0]
+    batch = Batch(w3)
+    assert batch.add("ok", load_contract(w3, farm, "abis/autofarm.json"), "pendingReward", (0, bot_address))
+    # MockFarm has no earned(): the call reverts inside aggregate3
+    assert batch.add("missing", load_contract(w3, farm, "abis/balancer.json"), "earned")
+    # an account without code "succeeds" with empty return data
+    assert batch.add("eoa", load_contract(w3, bot_address, "abis/autofarm.json"), "pendingReward", (0, bot_address))
+    # not in the ABI at all: never reaches the batch
+    assert not batch.add("unknown", load_contract(w3, farm, "abis/autofarm.json"), "earned")
+
+    results = batch.execute()
+    assert results == {"ok": (True, 10 ** 18), "missing": (False, None), "eoa": (False, None)}
+
+
+def test_unresolved_watchers_are_left_for_the_per_watcher_path(chain, w3, bot_address):
+    farm = chain.clones("MockFarm", [10 ** 18], bot_address)[0]
+    good = {"name": "good", "contract_address": farm, "abi_file": "abis/autofarm.json", "pid": 0, "rewardToken": "AUTO"}
+    wrong_abi = {"name": "wrong-abi", "contract_address": farm, "abi_file": "abis/balancer.json", "rewardToken": "AUTO"}
+    eoa = {"name": "eoa", "contract_address": bot_address, "abi_file": "abis/autofarm.json", "pid": 0, "rewardToken": "AUTO"}
+
+    pending = prefetch_reads(w3, [good, wrong_abi, eoa], bot_address)["pending"]
+    assert set(pending) == {id(good)}
+    assert method_cache.lookup(load_contract(w3, bot_address, "abis/autofarm.json"), "pending") is None
+
+
+def test_falls_back_when_multicall3_is_absent(chain, w3, bot_address, monkeypatch):
+    monkeypatch.setattr(multicall, "MULTICALL3_ADDRESS", NO_CODE)
+    watchers = farm_watchers(chain, bot_address)
+
+    assert not multicall.is_available(w3)
+    assert prefetch_reads(w3, watchers, bot_address) == {"pending": {}, "rounds": {}}
+    # the per-watcher path still reads every amount
+    amounts = [
+        detect_pending_reward(w3, load_contract(w3, w["contract_address"], w["abi_file"]), w, bot_address)["amount"]
+        for w in watchers
+    ]
+    assert amounts == [1.0, 2.5, 0.0, 0.07]
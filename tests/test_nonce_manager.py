@@ -0,0 +1,107 @@
+# tests/test_nonce_manager.py
+"""Local and SQLite-shared nonce allocation against the dev chain."""
+import itertools
+import pytest
+from eth_account import Account
+
+from utils.nonce_manager import NonceManager, SharedNonceManager
+
+
+@pytest.fixture(params=["local", "shared"])
+def make_manager(request, tmp_path):
+    def make(w3, address):
+        if request.param == "shared":
+            return SharedNonceManager(w3, address, str(tmp_path / "nonces.db"))
+        return NonceManager(w3, address)
+    return make
+
+
+_keys = itertools.count(0xe000)
+
+
+@pytest.fixture
+def account(chain):
+    # a fresh sender per test so chain nonces start at 0
+    key = f"0x{next(_keys):064x}"
+    return key, chain.fund(key)
+
+
+def send(w3, key, address, nonce):
+    tx = {"to": address, "value": 0, "gas": 21000, "gasPrice": w3.eth.gas_price,
+          "nonce": nonce, "chainId": w3.eth.chain_id}
+    return w3.eth.send_raw_transaction(Account.sign_transaction(tx, key).rawTransaction)
+
+
+def test_sequential_allocation(w3, account, make_manager):
+    key, address = account
+    nonces = make_manager(w3, address)
+    assert nonces.peek() == 0
+    allocated = [nonces.allocate() for _ in range(5)]
+    assert allocated == [0, 1, 2, 3, 4]
+    for nonce in allocated:
+        send(w3, key, address, nonce)
+    assert w3.eth.get_transaction_count(address) == 5
+    assert nonces.peek() == 5
+
+
+def test_release_hands_the_nonce_back(w3, account, make_manager):
+    key, address = account
+    nonces = make_manager(w3, address)
+    sent = nonces.allocate()
+    unused = nonces.allocate()
+    nonces.release(unused)  # never broadcast
+    assert nonces.peek() == unused
+
+    send(w3, key, address, sent)
+    failed = nonces.allocate()
+    nonces.allocate()
+    # a later nonce is already out: resync instead of leaving a gap
+    nonces.release(failed)
+    assert nonces.peek() == w3.eth.get_transaction_count(address, "pending") == 1
+
+
+def test_reconcile_after_nonce_too_low(w3, account, make_manager):
+    key, address = account
+    nonces = make_manager(w3, address)
+    assert nonces.peek() == 0
+    # a second signer with its own counter (e.g. a bot restarted on another host) gets there first
+    other = NonceManager(w3, address)
+    send(w3, key, address, other.allocate())
+    send(w3, key, address, other.allocate())
+
+    stale = nonces.allocate()
+    assert stale == 0
+    with pytest.raises(Exception, match="(?i)nonce"):
+        send(w3, key, address, stale)
+
+    assert nonces.reconcile() == 2
+    send(w3, key, address, nonces.allocate())
+    assert w3.eth.get_transaction_count(address) == 3
+    assert nonces.peek() == 3
+
+
+def test_out_of_band_transaction(w3, account, make_manager):
+    key, address = account
+    nonces = make_manager(w3, address)
+    send(w3, key, address, nonces.allocate())
+    # someone else signs with the same key, outside the manager
+    send(w3, key, address, 1)
+
+    taken = nonces.allocate()
+    assert taken == 1
+    with pytest.raises(Exception, match="(?i)nonce"):
+        send(w3, key, address, taken)
+    nonces.reconcile()
+    send(w3, key, address, nonces.allocate())
+    assert w3.eth.get_transaction_count(address) == 3
+
+
+def test_shared_managers_never_hand_out_the_same_nonce(w3, account, tmp_path):
+    key, address = account
+    path = str(tmp_path / "nonces.db")
+    workers = [SharedNonceManager(w3, address, path) for _ in range(3)]
+    allocated = [workers[i % 3].allocate() for i in range(9)]
+    assert sorted(allocated) == list(range(9))
+    for nonce in allocated:
+        send(w3, key, address, nonce)
+    assert w3.eth.get_transaction_count(address) == 9
@@ -0,0 +1,64 @@
+# tests/test_price_fetcher.py
+"""price_fetcher against a local CoinGecko stub: one batched request, the TTL and the fallback."""
+import time
+
+import pytest
+
+import price_fetcher
+from benchmarks.stubs import start_coingecko
+
+
+@pytest.fixture
+def coingecko(monkeypatch):
+    stub, url = start_coingecko()
+    monkeypatch.setattr(price_fetcher, "COINGECKO_API", url)
+    monkeypatch.setattr(price_fetcher, "_router", None)
+    monkeypatch.setattr(price_fetcher, "_prices", {sym: 0.0 for sym in price_fetcher.SYMBOL_MAP})
+    monkeypatch.setattr(price_fetcher, "_fetched_at", {})
+    monkeypatch.setattr(price_fetcher, "_tracked", {"MATIC"})
+    yield stub
+    stub.shutdown()
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_prefetch_is_one_batched_request(coingecko):
+    prices = price_fetcher.prefetch(["AUTO", "QUICK", "USDC"])
+    assert coingecko.hits == 1
+    assert prices == {"MATIC": 0.5, "AUTO": 10.0, "QUICK": 50.0, "USDC": 1.0}
+
+
+def test_cached_price_refreshes_in_background_after_ttl(coingecko, monkeypatch):
+    monkeypatch.setattr(price_fetcher, "_CACHE_DURATION", 0.3)
+    price_fetcher.prefetch(["AUTO"])
+    coingecko.prices["auto"] = 12.0
+
+    # Within the TTL: served from the cache, no request
+    assert price_fetcher.get_price("AUTO") == 10.0
+    assert coingecko.hits == 1
+
+    # Past the TTL: the stale price comes back at once and a refresh runs behind it
+    time.sleep(0.3)
+    assert price_fetcher.get_price("AUTO") == 10.0
+    wait_for(lambda: price_fetcher.get_price("AUTO") == 12.0)
+    assert coingecko.hits == 2
+    assert price_fetcher.is_fresh("AUTO")
+
+
+def test_failed_fetch_keeps_cached_prices(coingecko, monkeypatch):
+    price_fetcher.fetch_prices(["AUTO"])
+    fetched_at = price_fetcher._fetched_at["AUTO"]
+    coingecko.failing = True
+    sleeps = []
+    monkeypatch.setattr(price_fetcher.time, "sleep", sleeps.append)
+
+    prices = price_fetcher.fetch_prices(["AUTO", "QUICK"])
+    assert coingecko.hits == 1 + 3  # three attempts, with backoff between them
+    assert sleeps == [1, 2, 3]
+    assert prices == {"AUTO": 10.0, "QUICK": 0.0}
+    assert price_fetcher._fetched_at["AUTO"] == fetched_at  # still ages toward a refresh
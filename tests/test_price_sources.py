@@ -0,0 +1,73 @@
+# tests/test_price_sources.py
+"""ChainlinkSource block bookkeeping with the bot's prefetched rounds."""
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import price_sources
+from price_sources import ChainlinkSource
+
+MATIC_FEED = price_sources.DEFAULT_CHAINLINK_FEEDS["MATIC"]
+AUTO_FEED = "0x" + "ab" * 20
+
+
+class StubFeeds:
+    """Per-feed answers and a count of direct latestRoundData reads."""
+
+    def __init__(self, answers):
+        self.answers = dict(answers)
+        self.reads = []
+
+    def contract(self, w3, address, abi_file):
+        def latest_round():
+            self.reads.append(address)
+            return (1, self.answers[address], 0, int(time.time()), 1)
+        functions = SimpleNamespace(
+            latestRoundData=lambda: SimpleNamespace(call=latest_round),
+            decimals=lambda: SimpleNamespace(call=lambda: 8),
+        )
+        return SimpleNamespace(address=address, functions=functions)
+
+    def round(self, address):
+        return {"roundId": 1, "answer": self.answers[address], "updatedAt": int(time.time())}
+
+
+@pytest.fixture
+def feeds(monkeypatch):
+    stub = StubFeeds({MATIC_FEED: 50_000_000, price_sources.Web3.to_checksum_address(AUTO_FEED): 1_000_000_000})
+    monkeypatch.setattr(price_sources, "multicall_available", lambda w3: False)
+    monkeypatch.setattr(price_sources, "load_contract", stub.contract)
+    return stub
+
+
+def make_source():
+    w3 = SimpleNamespace(eth=SimpleNamespace(block_number=1))
+    return w3, ChainlinkSource(w3, {"MATIC": MATIC_FEED, "AUTO": AUTO_FEED})
+
+
+def test_feeds_missing_from_the_prefetch_are_still_re_read(feeds):
+    w3, source = make_source()
+    auto = source.feeds["AUTO"]
+    assert source.quote("MATIC") == (0.5, pytest.approx(time.time(), abs=5))
+
+    # the bot's prefetch only covered the watchers' feed, block after block
+    for block in (2, 3):
+        w3.eth.block_number = block
+        feeds.answers[MATIC_FEED] += 10_000_000
+        source.ingest({auto: feeds.round(auto)}, block)
+        assert source.quote("MATIC")[0] == feeds.answers[MATIC_FEED] / 1e8
+    assert feeds.reads.count(MATIC_FEED) == 3
+
+
+def test_a_prefetch_covering_every_feed_saves_the_refresh(feeds):
+    w3, source = make_source()
+    source.quote("MATIC")  # first use also reads decimals
+    reads = len(feeds.reads)
+
+    w3.eth.block_number = 2
+    feeds.answers[MATIC_FEED] = 60_000_000
+    source.ingest({addr: feeds.round(addr) for addr in source.feeds.values()}, 2)
+    assert source.quote("MATIC")[0] == 0.6
+    assert source.quote("AUTO")[0] == 10.0
+    assert len(feeds.reads) == reads
@@ -0,0 +1,33 @@
+# tests/test_profiler.py
+"""/profile arming: integer, non-negative, capped at PROFILE_MAX_CYCLES."""
+import pytest
+
+import profiler
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_MAX_CYCLES", 5)
+    import bot
+    yield bot.app.test_client()
+    profiler.arm(0)
+
+
+def test_arm_is_capped(client):
+    resp = client.get("/profile?cycles=1000000")
+    assert resp.status_code == 200
+    assert resp.get_json()["armed_cycles"] == 5
+    assert resp.get_json()["max_cycles"] == 5
+
+
+@pytest.mark.parametrize("cycles", ["-1", "abc", "1.5"])
+def test_bad_cycles_are_rejected(client, cycles):
+    profiler.arm(2)
+    resp = client.get(f"/profile?cycles={cycles}")
+    assert resp.status_code == 400
+    assert profiler.status()["armed_cycles"] == 2
+
+
+def test_zero_disarms(client):
+    profiler.arm(3)
+    assert client.get("/profile?cycles=0").get_json()["armed_cycles"] == 0
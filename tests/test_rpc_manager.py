@@ -0,0 +1,147 @@
+# tests/test_rpc_manager.py
+"""RPCPoolProvider against local fake endpoints: failover, breakers, ranking, hedged reads."""
+import time
+import pytest
+
+import rpc_manager
+from rpc_manager import RPCPoolProvider, FAIL_LIMIT
+from fake_rpc import FakeRPC
+
+
+@pytest.fixture
+def endpoints():
+    started = []
+
+    def start(**kwargs):
+        fake = FakeRPC(**kwargs)
+        started.append(fake)
+        return fake
+    yield start
+    for fake in started:
+        fake.shutdown()
+
+
+def block_number(pool):
+    return pool.make_request("eth_blockNumber", [])["result"]
+
+
+def test_fails_over_per_request(endpoints):
+    down, up = endpoints(failing=True), endpoints()
+    pool = RPCPoolProvider([down.url, up.url], hedge_reads=False)
+
+    assert block_number(pool) == "0x10"
+    assert (down.hits, up.hits) == (1, 1)
+    assert pool.stats[down.url]["errors"] == 1
+
+    # the next request starts from the endpoint that answered
+    assert block_number(pool) == "0x10"
+    assert (down.hits, up.hits) == (1, 2)
+
+
+def test_all_endpoints_down_raises(endpoints):
+    a, b = endpoints(failing=True), endpoints(failing=True)
+    pool = RPCPoolProvider([a.url, b.url], hedge_reads=False)
+    with pytest.raises(ConnectionError, match="All RPC endpoints failed"):
+        block_number(pool)
+
+
+def test_breaker_benches_then_recovers(endpoints, monkeypatch):
+    monkeypatch.setattr(rpc_manager, "COOLDOWN_SECONDS", 0.2)
+    flaky, steady = endpoints(failing=True), endpoints()
+    pool = RPCPoolProvider([flaky.url, steady.url], timeout=1.0, hedge_reads=False)
+    # steady looks slow, so flaky stays first until its breaker opens
+    pool.stats[steady.url]["latency_s"] = 5.0
+
+    for _ in range(FAIL_LIMIT):
+        assert block_number(pool) == "0x10"
+    assert flaky.hits == FAIL_LIMIT
+    breaker = pool.breakers.get(flaky.url)
+    assert breaker.state == "open"
+    assert pool.ranked_endpoints() == [steady.url, flaky.url]
+
+    # benched: requests skip it entirely
+    block_number(pool)
+    assert flaky.hits == FAIL_LIMIT
+
+    # half-open after the cooldown: with steady down the probe goes to flaky,
+    # and failing it reopens the breaker for twice as long
+    steady.failing = True
+    time.sleep(0.3)
+    with pytest.raises(ConnectionError):
+        block_number(pool)
+    assert flaky.hits == FAIL_LIMIT + 1
+    assert breaker.state == "open" and breaker.trips == 2
+
+    # a successful probe closes it
+    flaky.failing = False
+    time.sleep(0.6)
+    assert block_number(pool) == "0x10"
+    assert flaky.hits == FAIL_LIMIT + 2
+    assert breaker.state == "closed"
+    assert rpc_manager.rpc_status[flaky.url]["fails"] == 0
+
+
+def test_ranks_by_observed_latency(endpoints):
+    slow, fast = endpoints(delay=0.05), endpoints()
+    pool = RPCPoolProvider([slow.url, fast.url], hedge_reads=False)
+
+    for _ in range(5):
+        block_number(pool)
+    # one request each while untried, then only the fast one
+    assert (slow.hits, fast.hits) == (1, 4)
+    assert pool.ranked_endpoints() == [fast.url, slow.url]
+
+
+def test_ranking_penalises_errors(endpoints):
+    a, b = endpoints(), endpoints()
+    pool = RPCPoolProvider([a.url, b.url], hedge_reads=False)
+    pool.stats[a.url].update(latency_s=0.010, error_rate=0.5)
+    pool.stats[b.url].update(latency_s=0.020, error_rate=0.0)
+    assert pool.ranked_endpoints() == [b.url, a.url]
+
+
+def test_hedged_read_asks_the_backup_when_primary_is_slow(endpoints):
+    slow, backup = endpoints(delay=1.0), endpoints()
+    pool = RPCPoolProvider([slow.url, backup.url], hedge_reads=True, hedge_delay_s=0.05)
+
+    started = time.perf_counter()
+    assert block_number(pool) == "0x10"
+    assert time.perf_counter() - started < 0.8
+    assert (slow.hits, backup.hits) == (1, 1)
+
+
+def test_hedged_read_skips_the_backup_when_primary_answers_in_time(endpoints):
+    primary, backup = endpoints(), endpoints()
+    pool = RPCPoolProvider([primary.url, backup.url], hedge_reads=True, hedge_delay_s=0.5)
+    assert block_number(pool) == "0x10"
+    assert (primary.hits, backup.hits) == (1, 0)
+
+
+def test_hedged_read_fails_over_when_primary_errors_early(endpoints):
+    down, backup, spare = endpoints(failing=True), endpoints(), endpoints()
+    pool = RPCPoolProvider([down.url, backup.url, spare.url], hedge_reads=True, hedge_delay_s=0.5)
+    assert block_number(pool) == "0x10"
+    # no hedge was sent; the ordinary failover picked the next endpoint
+    assert (down.hits, backup.hits, spare.hits) == (1, 1, 0)
+
+
+def test_hedged_read_falls_through_when_both_fail(endpoints):
+    slow_down, down, spare = endpoints(delay=0.2, failing=True), endpoints(failing=True), endpoints()
+    pool = RPCPoolProvider([slow_down.url, down.url, spare.url], hedge_reads=True, hedge_delay_s=0.05)
+    assert block_number(pool) == "0x10"
+    assert (slow_down.hits, down.hits, spare.hits) == (1, 1, 1)
+
+
+def test_writes_are_never_hedged(endpoints):
+    slow, backup = endpoints(delay=0.2), endpoints()
+    pool = RPCPoolProvider([slow.url, backup.url], hedge_reads=True, hedge_delay_s=0.01)
+    pool.make_request("eth_sendRawTransaction", ["0x00"])
+    assert (slow.hits, backup.hits) == (1, 0)
+
+
+def test_batch_request_keeps_call_order(endpoints):
+    down, up = endpoints(failing=True), endpoints()
+    pool = RPCPoolProvider([down.url, up.url], hedge_reads=False)
+    out = pool.make_batch_request([("eth_chainId", []), ("eth_blockNumber", []), ("eth_gasPrice", [])])
+    assert [r["result"] for r in out] == ["0x89", "0x10", "0x3b9aca00"]
+    assert up.methods == ["eth_chainId", "eth_blockNumber", "eth_gasPrice"]
@@ -0,0 +1,56 @@
+# tests/test_telegram_notifier.py
+"""The alert queue against a stub Bot API: coalescing, the send interval and the drop summary."""
+import queue
+
+import pytest
+
+import telegram_notifier
+from benchmarks.stubs import start_telegram
+
+
+@pytest.fixture
+def telegram(monkeypatch):
+    stub, base = start_telegram()
+    monkeypatch.setattr(telegram_notifier, "TELEGRAM_BOT_TOKEN", "token")
+    monkeypatch.setattr(telegram_notifier, "TELEGRAM_CHAT_ID", "chat")
+    monkeypatch.setattr(telegram_notifier, "BASE_URL", f"{base}/bottoken/sendMessage")
+    monkeypatch.setattr(telegram_notifier, "ALERT_COALESCE_S", 0.2)
+    monkeypatch.setattr(telegram_notifier, "TELEGRAM_MIN_INTERVAL_S", 0.3)
+    # Fresh queue and worker per test; an earlier worker stays parked on the old queue
+    monkeypatch.setattr(telegram_notifier, "_queue", queue.Queue(maxsize=3))
+    monkeypatch.setattr(telegram_notifier, "_worker", None)
+    monkeypatch.setattr(telegram_notifier, "_dropped", 0)
+    monkeypatch.setattr(telegram_notifier, "_last_sent", 0.0)
+    yield stub
+    stub.shutdown()
+
+
+def texts(stub):
+    return [text for _, text in stub.messages]
+
+
+def test_burst_is_coalesced_into_one_message(telegram):
+    for message in ("gas spike", "gas spike", "rpc down"):
+        telegram_notifier.send_alert(message)
+    assert telegram_notifier.flush(timeout=5)
+    assert texts(telegram) == ["gas spike (x2)\nrpc down"]
+
+
+def test_messages_respect_min_interval(telegram):
+    for message in ("first", "second", "third"):
+        telegram_notifier.send_alert(message)
+        assert telegram_notifier.flush(timeout=5)
+    assert texts(telegram) == ["first", "second", "third"]
+    sent_at = [at for at, _ in telegram.messages]
+    gaps = [b - a for a, b in zip(sent_at, sent_at[1:])]
+    assert min(gaps) >= telegram_notifier.TELEGRAM_MIN_INTERVAL_S - 0.05
+
+
+def test_overflow_is_summarised(telegram, monkeypatch):
+    start_worker = telegram_notifier._ensure_worker
+    monkeypatch.setattr(telegram_notifier, "_ensure_worker", lambda: None)  # let the queue fill up
+    for i in range(5):
+        telegram_notifier.send_alert(f"alert {i}")
+    start_worker()
+    assert telegram_notifier.flush(timeout=5)
+    assert texts(telegram) == ["alert 0\nalert 1\nalert 2\n⚠️ 2 alerts dropped (alert queue full)"]
@@ -0,0 +1,54 @@
+# tests/test_tx_tracker.py
+"""Harvest alerts: one per harvest, and only once it is mined when a tracker follows it."""
+import pytest
+from conftest import BOT_KEY
+
+import ai_agent
+import tx_tracker
+from ai_agent import evaluate_watcher, execute_plan
+from tx_tracker import TxTracker
+
+CONFIG = {"profit_multiplier": 2.0, "absolute_max_gas_gwei": 600}
+
+
+@pytest.fixture
+def alerts(monkeypatch):
+    sent = []
+    monkeypatch.setattr(ai_agent, "send_alert", sent.append)
+    monkeypatch.setattr(tx_tracker, "send_alert", sent.append)
+    return sent
+
+
+@pytest.fixture
+def plan_for(chain, w3, bot_address, prices):
+    from utils.nonce_manager import _managers
+    _managers.clear()
+
+    def make(name):
+        address = chain.clones("MockFarm", [10 ** 18], bot_address)[0]
+        watcher = {"name": name, "protocol": "autofarm", "contract_address": address,
+                   "abi_file": "abis/autofarm.json", "pid": 0, "rewardToken": "AUTO"}
+        plan = evaluate_watcher(w3, watcher, bot_address, CONFIG)
+        assert plan and plan["decision"]["should"]
+        return watcher, plan
+    return make
+
+
+def test_tracked_harvest_alerts_once_on_confirmation(w3, bot_address, plan_for, alerts):
+    watcher, plan = plan_for("tracked")
+    tracker = TxTracker(w3, bot_address, BOT_KEY)
+    tracker.stop()  # poll by hand instead of on the background thread
+
+    tx_hash = execute_plan(w3, watcher, plan, bot_address, BOT_KEY, tracker)
+    assert tx_hash
+    assert alerts == []  # broadcast only
+
+    tracker.poll()
+    assert tracker.stats()["confirmed"] == 1
+    assert alerts == [f"✅ tracked harvested: {tx_hash}"]
+
+
+def test_untracked_harvest_alerts_once_on_send(w3, bot_address, plan_for, alerts):
+    watcher, plan = plan_for("untracked")
+    tx_hash = execute_plan(w3, watcher, plan, bot_address, BOT_KEY)
+    assert alerts == [f"✅ untracked harvested: {tx_hash}"]
@@ -0,0 +1,249 @@
+# tx_tracker.py
+import os
+import time
+import threading
+from typing import Any, Dict, List, Tuple
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+from gas_engine import tx_fee_fields
+from utils import gas_cache, method_cache
+from utils.nonce_manager import get_nonce_manager
+from profit_logger import log_profit
+from state_store import get_store, watcher_id
+from telegram_notifier import send_alert
+from circuit_breaker import watcher_breakers
+
+TX_POLL_S = float(os.getenv("TX_POLL_S", 2.0))
+TX_MAX_IN_FLIGHT = int(os.getenv("TX_MAX_IN_FLIGHT", 16))
+# Unmined this long after the last broadcast -> resend at the same nonce with higher fees
+TX_STUCK_S = float(os.getenv("TX_STUCK_S", 45))
+# Nodes require >= 10% on both fee fields to accept a replacement
+TX_REPLACE_BUMP = float(os.getenv("TX_REPLACE_BUMP", 1.15))
+TX_MAX_REPLACEMENTS = int(os.getenv("TX_MAX_REPLACEMENTS", 3))
+# Never bid above this per gas when speeding up
+TX_MAX_FEE_GWEI = float(os.getenv("TX_MAX_FEE_GWEI", os.getenv("ABSOLUTE_MAX_GAS_GWEI", 600)))
+# Give up (and resync the nonce) after this long without a receipt
+TX_DROP_S = float(os.getenv("TX_DROP_S", 600))
+
+Pair = Tuple[Dict[str, Any], Dict[str, Any]]  # (watcher, plan)
+
+
+def _q(value) -> int:
+    """Receipt quantity as int, whether it came back formatted or as raw hex."""
+    if value is None:
+        return 0
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+class TxTracker:
+    """
+    Follows every broadcast harvest until it is mined. One background thread
+    polls receipts for all in-flight hashes in a single JSON-RPC batch (when the
+    provider supports it), speeds up stuck transactions with a bumped-fee copy at
+    the same nonce, and on inclusion stamps last_harvest and writes the real
+    gasUsed * effectiveGasPrice to the profit ledger.
+    """
+
+    def __init__(self, w3: Web3, public_address: str, private_key: str, max_in_flight: int = TX_MAX_IN_FLIGHT):
+        self.w3 = w3
+        self.public_address = public_address
+        self.private_key = private_key
+        self.max_in_flight = max_in_flight
+        self._lock = threading.Lock()
+        self._inflight = {}  # nonce -> entry
+        self._thread = None
+        self._stop = threading.Event()
+        self.confirmed = 0
+        self.reverted = 0
+        self.replaced = 0
+        self.dropped = 0
+
+    # ---- producer side (decision loop) ----
+    def has_capacity(self) -> bool:
+        with self._lock:
+            return len(self._inflight) < self.max_in_flight
+
+    def is_pending(self, watcher: Dict[str, Any]) -> bool:
+        key = watcher_id(watcher)
+        with self._lock:
+            return any(key in entry["ids"] for entry in self._inflight.values())
+
+    def pending_ids(self) -> set:
+        """watcher_id of every watcher with a harvest still in flight."""
+        with self._lock:
+            return {key for entry in self._inflight.values() for key in entry["ids"]}
+
+    def track(self, pairs: List[Pair], tx_hash: str, sent: Dict[str, Any]):
+        """Register a broadcast tx; `sent` is what send_tx_with_retries filled in."""
+        tx = sent["tx"]
+        now = time.time()
+        entry = {
+            "pairs": pairs,
+            "ids": {watcher_id(w) for w, _ in pairs},
+            "tx": tx,
+            "fees": sent["fees"],
+            "bump": sent["bump"],
+            "hashes": [tx_hash],
+            "sent_at": now,
+            "last_sent": now,
+            "replacements": 0,
+        }
+        with self._lock:
+            self._inflight[tx["nonce"]] = entry
+        self._ensure_thread()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="tx-tracker", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            inflight = len(self._inflight)
+        return {"in_flight": inflight, "confirmed": self.confirmed, "reverted": self.reverted,
+                "replaced": self.replaced, "dropped": self.dropped}
+
+    # ---- background loop ----
+    def _run(self):
+        while not self._stop.wait(TX_POLL_S):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"[TxTracker] Poll failed: {e}")
+
+    def _fetch_receipts(self, hashes: List[str]) -> Dict[str, Any]:
+        provider = self.w3.provider
+        if hasattr(provider, "make_batch_request"):
+            responses = provider.make_batch_request([("eth_getTransactionReceipt", [h]) for h in hashes])
+            return {h: r.get("result") for h, r in zip(hashes, responses) if r.get("result")}
+        receipts = {}
+        for h in hashes:
+            try:
+                receipt = self.w3.eth.get_transaction_receipt(h)
+            except TransactionNotFound:
+                continue
+            if receipt:
+                receipts[h] = receipt
+        return receipts
+
+    def poll(self):
+        """One pass: receipts for everything in flight, then speed-ups and drops."""
+        with self._lock:
+            entries = dict(self._inflight)
+        if not entries:
+            return
+        hashes = [h for entry in entries.values() for h in entry["hashes"]]
+        receipts = self._fetch_receipts(hashes)
+
+        now = time.time()
+        for nonce, entry in entries.items():
+            found = next(((h, receipts[h]) for h in entry["hashes"] if h in receipts), None)
+            if found:
+                with self._lock:
+                    self._inflight.pop(nonce, None)
+                self._settle(entry, *found)
+            elif now - entry["sent_at"] > TX_DROP_S:
+                with self._lock:
+                    self._inflight.pop(nonce, None)
+                self._drop(entry)
+            elif now - entry["last_sent"] > TX_STUCK_S and entry["replacements"] < TX_MAX_REPLACEMENTS:
+                self._speed_up(entry)
+
+    # ---- outcomes ----
+    def _settle(self, entry: Dict[str, Any], tx_hash: str, receipt):
+        status = _q(receipt.get("status"))
+        gas_used = _q(receipt.get("gasUsed"))
+        price_wei = _q(receipt.get("effectiveGasPrice")) or int(tx_fee_fields(entry["fees"], entry["bump"]).get("gasPrice", 0))
+        gas_gwei = price_wei / 1e9
+        pairs = entry["pairs"]
+        share = gas_used // max(1, len(pairs))  # batched harvests split the gas evenly
+
+        for i, (watcher, plan) in enumerate(pairs):
+            gas_key = gas_cache.key_for(plan["contract"], plan["func_name"], plan["args"])
+            row_hash = tx_hash if len(pairs) == 1 else f"{tx_hash}:{i}"
+            if status == 1:
+                watcher["last_harvest"] = time.time()
+                watcher.pop("last_error", None)
+                if len(pairs) == 1 and gas_cache.record_gas_used(gas_key, gas_used):
+                    print(f"[TxTracker] {watcher.get('name')}: gasUsed {gas_used} drifted from the cached estimate")
+                decision = plan.get("decision") or {}
+                log_profit(row_hash, watcher, gas_gwei, share,
+                           reward_amount=decision.get("reward_amount"), reward_usd=decision.get("reward_usd"))
+            else:
+                watcher["last_error"] = f"tx_reverted: {tx_hash}"
+                watcher_breakers.record_failure(watcher_id(watcher), watcher["last_error"])
+                method_cache.invalidate(plan["contract"], "harvest")
+                gas_cache.invalidate(gas_key)
+                # the gas is spent either way
+                log_profit(row_hash, watcher, gas_gwei, share, reward_amount=0.0, reward_usd=0.0)
+
+        names = ", ".join(w.get("name", "?") for w, _ in pairs)
+        if status == 1:
+            self.confirmed += 1
+            print(f"[TxTracker] ⛓ {names} confirmed in block {_q(receipt.get('blockNumber'))}: "
+                  f"gasUsed={gas_used} @ {gas_gwei:.2f} gwei ({tx_hash})")
+            send_alert(f"✅ {names} harvested: {tx_hash}")
+        else:
+            self.reverted += 1
+            send_alert(f"❌ {names} tx reverted: {tx_hash}")
+        self._persist(pairs)
+
+    def _drop(self, entry: Dict[str, Any]):
+        self.dropped += 1
+        pairs = entry["pairs"]
+        for watcher, _ in pairs:
+            watcher["last_error"] = f"tx_dropped: {entry['hashes'][-1]}"
+            watcher_breakers.record_failure(watcher_id(watcher), watcher["last_error"])
+        get_nonce_manager(self.w3, self.public_address).reconcile()
+        send_alert(f"⚠️ {', '.join(w.get('name', '?') for w, _ in pairs)} tx not mined after {TX_DROP_S:.0f}s, giving up: {entry['hashes'][-1]}")
+        self._persist(pairs)
+
+    def _speed_up(self, entry: Dict[str, Any]):
+        bump = entry["bump"] * TX_REPLACE_BUMP
+        fields = tx_fee_fields(entry["fees"], bump)
+        bid_gwei = fields.get("maxFeePerGas", fields.get("gasPrice", 0)) / 1e9
+        if bid_gwei > TX_MAX_FEE_GWEI:
+            entry["replacements"] = TX_MAX_REPLACEMENTS  # at the cap; just wait for it or the drop timeout
+            return
+        tx = {**entry["tx"], **fields}
+        try:
+            signed = self.w3.eth.account.sign_transaction(tx, self.private_key)
+            new_hash = self.w3.eth.send_raw_transaction(signed.rawTransaction).hex()
+        except Exception as e:
+            err = str(e).lower()
+            if "nonce too low" in err or "already known" in err:
+                return  # the original (or an earlier copy) got in; the receipt will show up
+            if "underpriced" in err:
+                entry["bump"] = bump  # bid higher next time
+            print(f"[TxTracker] Speed-up failed for nonce {tx['nonce']}: {e}")
+            return
+        entry.update(tx=tx, bump=bump, last_sent=time.time(), replacements=entry["replacements"] + 1)
+        entry["hashes"].append(new_hash)
+        self.replaced += 1
+        print(f"[TxTracker] 🚀 Nonce {tx['nonce']} resent at {bid_gwei:.2f} gwei: {new_hash}")
+
+    @staticmethod
+    def _persist(pairs: List[Pair]):
+        try:
+            get_store().update_many([w for w, _ in pairs])
+        except Exception as e:
+            print(f"[StateStore] Failed to persist tx outcome: {e}")
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker(w3: Web3, public_address: str, private_key: str) -> TxTracker:
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = TxTracker(w3, public_address, private_key)
+        _tracker.w3 = w3
+        return _tracker
@@ -0,0 +1,136 @@
+import json
+import time
+import weakref
+from threading import Lock
+from web3 import Web3
+from eth_utils import function_abi_to_4byte_selector
+from utils.method_cache import abi_hash
+
+
+class AbiEntry:
+    """One parsed ABI file: raw ABI, its hash and per-function selectors/types."""
+
+    def __init__(self, abi_path: str, abi: list):
+        self.path = abi_path
+        self.abi = abi
+        self.hash = abi_hash(abi)
+        self.functions = {}
+        for item in abi:
+            if item.get("type") != "function":
+                continue
+            self.functions.setdefault(item["name"], []).append({
+                "selector": function_abi_to_4byte_selector(item),
+                "inputs": [_abi_type(i) for i in item.get("inputs", [])],
+                "outputs": [_abi_type(o) for o in item.get("outputs", [])],
+            })
+
+    def find(self, fn_name: str, argc: int):
+        for fn in self.functions.get(fn_name, []):
+            if len(fn["inputs"]) == argc:
+                return fn
+        return None
+
+
+def _abi_type(param: dict) -> str:
+    if param["type"].startswith("tuple"):
+        inner = ",".join(_abi_type(c) for c in param["components"])
+        return f"({inner}){param['type'][5:]}"
+    return param["type"]
+
+
+_lock = Lock()
+_abis = {}
+_addresses = {}
+# Contracts are cached per Web3 instance; when rpc_manager hands out a new
+# instance after failover the old cache is simply never hit again and is
+# collected with it.
+_contracts = weakref.WeakKeyDictionary()
+
+
+def load_abi(abi_path: str) -> AbiEntry:
+    entry = _abis.get(abi_path)
+    if entry is None:
+        with open(abi_path, "r") as f:
+            entry = AbiEntry(abi_path, json.load(f))
+        with _lock:
+            entry = _abis.setdefault(abi_path, entry)
+    return entry
+
+
+def checksum(address: str) -> str:
+    addr = _addresses.get(address)
+    if addr is None:
+        addr = _addresses[address] = Web3.to_checksum_address(address)
+    return addr
+
+
+def get_contract(web3: Web3, contract_address: str, abi_path: str):
+    addr = checksum(contract_address)
+    with _lock:
+        per_w3 = _contracts.get(web3)
+        if per_w3 is None:
+            per_w3 = _contracts[web3] = {}
+        contract = per_w3.get((addr, abi_path))
+    if contract is not None:
+        return contract
+
+    entry = load_abi(abi_path)
+    contract = web3.eth.contract(address=addr, abi=entry.abi)
+    contract.abi_entry = entry
+    with _lock:
+        return per_w3.setdefault((addr, abi_path), contract)
+
+
+def encode_call(contract, fn_name: str, args: tuple = ()):
+    """
+    Returns (calldata, output_types) for fn_name(*args), using the precomputed
+    selector when the contract came from the registry.
+    """
+    entry = getattr(contract, "abi_entry", None)
+    fn = entry.find(fn_name, len(args)) if entry else None
+    if fn is None:
+        bound = contract.functions[fn_name](*args)
+        data = Web3.to_bytes(hexstr=contract.encodeABI(fn_name=fn_name, args=list(args)))
+        return data, [_abi_type(o) for o in bound.abi.get("outputs", [])]
+    return fn["selector"] + contract.w3.codec.encode(fn["inputs"], list(args)), fn["outputs"]
+
+
+def clear():
+    with _lock:
+        _abis.clear()
+        _addresses.clear()
+        _contracts.clear()
+
+
+if __name__ == "__main__":
+    # Micro-benchmark: per-cycle CPU of the old load path vs the registry for N watchers
+    import sys
+    from utils.helpers import _load_contract_uncached
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    cycles = 5
+    abi_files = ["abis/autofarm.json", "abis/balancer.json", "abis/quickswap.json"]
+    w3 = Web3()
+    watchers = [
+        (Web3.to_checksum_address("0x" + f"{i + 1:040x}").lower(), abi_files[i % len(abi_files)])
+        for i in range(n)
+    ]
+
+    wallet = "0x" + "11" * 20
+    probes = {path: ("pendingReward", (0, wallet)) if load_abi(path).find("pendingReward", 2) else ("earned", ())
+              for path in abi_files}
+
+    def run(loader, encode):
+        start = time.process_time()
+        for _ in range(cycles):
+            for address, abi_path in watchers:
+                fn_name, args = probes[abi_path]
+                encode(loader(w3, address, abi_path), fn_name, args)
+        return (time.process_time() - start) / cycles
+
+    legacy = run(_load_contract_uncached, lambda c, fn_name, args: c.encodeABI(fn_name=fn_name, args=list(args)))
+    for address, abi_path in watchers:  # the first live cycle warms the registry
+        get_contract(w3, address, abi_path)
+    cached = run(get_contract, encode_call)
+    print(f"[ContractRegistry] {n} watchers: legacy {legacy * 1000:.2f} ms/cycle, "
+          f"registry {cached * 1000:.3f} ms/cycle, saved {(legacy - cached) * 1000:.2f} ms CPU per cycle")
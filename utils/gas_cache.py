@@ -0,0 +1,67 @@
+import os
+import json
+import time
+from threading import Lock
+from typing import Optional
+
+# Estimates are reused for this long unless a receipt shows they drifted
+GAS_CACHE_TTL_S = float(os.getenv("GAS_CACHE_TTL_S", 3600))
+# Relative gasUsed vs estimate difference that invalidates an entry
+GAS_DRIFT_TOLERANCE = float(os.getenv("GAS_DRIFT_TOLERANCE", 0.15))
+
+_lock = Lock()
+_entries = {}  # key -> (raw_estimate, stored_at)
+hits = 0
+misses = 0
+
+
+def key_for(contract, func_name: str, args: tuple) -> str:
+    return f"{contract.address}:{func_name}:{json.dumps(list(args), default=str)}"
+
+
+def get(key: str) -> Optional[int]:
+    """Raw (unbuffered) estimate, or None when missing or older than GAS_CACHE_TTL_S."""
+    global hits, misses
+    with _lock:
+        entry = _entries.get(key)
+        if entry and time.time() - entry[1] < GAS_CACHE_TTL_S:
+            hits += 1
+            return entry[0]
+        _entries.pop(key, None)
+        misses += 1
+        return None
+
+
+def put(key: str, estimate: int):
+    with _lock:
+        _entries[key] = (int(estimate), time.time())
+
+
+def invalidate(key: str):
+    with _lock:
+        _entries.pop(key, None)
+
+
+def record_gas_used(key: str, gas_used: int) -> bool:
+    """Compare a receipt's gasUsed with the cached estimate; drops the entry and returns True on drift."""
+    with _lock:
+        entry = _entries.get(key)
+        if not entry:
+            return False
+        estimate = entry[0]
+        if estimate and abs(gas_used - estimate) / estimate > GAS_DRIFT_TOLERANCE:
+            del _entries[key]
+            return True
+        return False
+
+
+def stats() -> dict:
+    with _lock:
+        return {"size": len(_entries), "hits": hits, "misses": misses}
+
+
+def clear():
+    global hits, misses
+    with _lock:
+        _entries.clear()
+        hits = misses = 0
@@ -1,17 +1,22 @@
 import json
 from web3 import Web3
+from utils.contract_registry import get_contract
 
 def load_contract(web3: Web3, contract_address: str, abi_path: str):
+    return get_contract(web3, contract_address, abi_path)
+
+def _load_contract_uncached(web3: Web3, contract_address: str, abi_path: str):
     with open(abi_path, "r") as f:
         abi = json.load(f)
     addr = Web3.to_checksum_address(contract_address)
     return web3.eth.contract(address=addr, abi=abi)
 
-def get_gas_price(web3: Web3) -> int:
+def get_gas_price(web3: Web3) -> float:
+    """eth_gasPrice in gwei, keeping the fraction (Polygon prices are rarely whole gwei)."""
     try:
-        return int(web3.eth.gas_price // 10**9)
+        return web3.eth.gas_price / 10**9
     except:
-        return 0
+        return 0.0
 
 def estimate_gas_safe(web3: Web3, tx: dict, fallback: int = 210000) -> int:
     try:
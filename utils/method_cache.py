@@ -0,0 +1,97 @@
+import os
+import json
+import hashlib
+from threading import Lock
+
+# Persistent record of which pending/harvest call shape worked per (contract, ABI)
+RESOLVED_METHODS_FILE = os.getenv("RESOLVED_METHODS_FILE", "resolved_methods.json")
+
+# Argument shapes a resolved method can take
+SHAPE_NONE = "none"
+SHAPE_PID = "pid"
+SHAPE_PID_ADDRESS = "pid_address"
+
+_lock = Lock()
+_entries = None
+
+
+def abi_hash(abi) -> str:
+    return hashlib.sha256(json.dumps(abi, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def interface_key(contract) -> str:
+    # registry-built contracts carry their ABI hash already
+    entry = getattr(contract, "abi_entry", None)
+    return f"{contract.address}:{entry.hash if entry else abi_hash(contract.abi)}"
+
+
+def shape_of(args: tuple) -> str:
+    if len(args) == 2:
+        return SHAPE_PID_ADDRESS
+    if len(args) == 1:
+        return SHAPE_PID
+    return SHAPE_NONE
+
+
+def args_for(shape: str, watcher: dict, wallet_address: str = None) -> tuple:
+    pid = watcher.get("pid", 0)
+    if shape == SHAPE_PID_ADDRESS:
+        return (pid, wallet_address)
+    if shape == SHAPE_PID:
+        return (pid,)
+    return ()
+
+
+def _load():
+    global _entries
+    if _entries is None:
+        try:
+            with open(RESOLVED_METHODS_FILE, "r") as f:
+                _entries = json.load(f)
+        except (OSError, ValueError):
+            _entries = {}
+    return _entries
+
+
+def _save():
+    # per-process temp name: sharded workers may save at the same time
+    tmp = f"{RESOLVED_METHODS_FILE}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(_entries, f, indent=2)
+    os.replace(tmp, RESOLVED_METHODS_FILE)
+
+
+def lookup(contract, kind: str):
+    """Returns {"method": name, "shape": shape} for kind "pending"/"harvest", or None."""
+    with _lock:
+        return _load().get(interface_key(contract), {}).get(kind)
+
+
+def record(contract, kind: str, method: str, shape: str):
+    entry = {"method": method, "shape": shape}
+    with _lock:
+        resolved = _load().setdefault(interface_key(contract), {})
+        if resolved.get(kind) == entry:
+            return
+        resolved[kind] = entry
+        try:
+            _save()
+        except OSError as e:
+            print(f"[MethodCache] Could not persist {RESOLVED_METHODS_FILE}: {e}")
+
+
+def invalidate(contract, kind: str = None):
+    """Drop a resolved method after a decode/revert failure so the next cycle re-probes."""
+    key = interface_key(contract)
+    with _lock:
+        entries = _load()
+        if key not in entries:
+            return
+        if kind is None:
+            entries.pop(key)
+        elif entries[key].pop(kind, None) is None:
+            return
+        try:
+            _save()
+        except OSError as e:
+            print(f"[MethodCache] Could not persist {RESOLVED_METHODS_FILE}: {e}")
@@ -0,0 +1,147 @@
+import sqlite3
+from threading import Lock
+from web3 import Web3
+
+
+class NonceManager:
+    """
+    Hands out nonces for one sending address locally. The pending nonce is read
+    from the chain once; after that allocation is a counter bump under a lock,
+    so back-to-back sends in one cycle never reuse a nonce or wait on an RPC.
+    """
+
+    def __init__(self, w3: Web3, address: str):
+        self.w3 = w3
+        self.address = Web3.to_checksum_address(address)
+        self._lock = Lock()
+        self._next = None
+
+    def _chain_nonce(self) -> int:
+        return self.w3.eth.get_transaction_count(self.address, "pending")
+
+    def peek(self) -> int:
+        """Nonce the next allocation will get (used for tx templates / estimates)."""
+        with self._lock:
+            if self._next is None:
+                self._next = self._chain_nonce()
+            return self._next
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._next is None:
+                self._next = self._chain_nonce()
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def release(self, nonce: int):
+        """Give back a nonce whose tx never reached the mempool."""
+        with self._lock:
+            if self._next is not None and nonce == self._next - 1:
+                self._next = nonce
+            else:
+                # a later nonce is already out; resync instead of leaving a gap
+                self._next = None
+
+    def reconcile(self) -> int:
+        """Resync with the chain after "nonce too low" or a dropped transaction."""
+        with self._lock:
+            chain = self._chain_nonce()
+            if self._next != chain:
+                print(f"[Nonce] {self.address}: local {self._next} -> chain pending {chain}")
+            self._next = chain
+            return chain
+
+
+class SharedNonceManager(NonceManager):
+    """
+    Same interface, for several processes signing with one key (sharded
+    workers): the next nonce is a row in a SQLite file and every allocation
+    is a read-and-bump inside BEGIN IMMEDIATE, so that row is the only owner
+    of the counter. NULL means "resync from the chain on next use".
+    """
+
+    def __init__(self, w3: Web3, address: str, path: str):
+        super().__init__(w3, address)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS nonces (address TEXT PRIMARY KEY, next_nonce INTEGER)")
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn()
+                self._conn.execute("COMMIT")
+                return result
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _read(self):
+        row = self._conn.execute("SELECT next_nonce FROM nonces WHERE address = ?", (self.address,)).fetchone()
+        return row[0] if row else None
+
+    def _write(self, value):
+        self._conn.execute(
+            "INSERT INTO nonces (address, next_nonce) VALUES (?, ?) "
+            "ON CONFLICT(address) DO UPDATE SET next_nonce=excluded.next_nonce",
+            (self.address, value),
+        )
+
+    def _current(self) -> int:
+        nonce = self._read()
+        if nonce is None:
+            nonce = self._chain_nonce()
+            self._write(nonce)
+        return nonce
+
+    def peek(self) -> int:
+        return self._transaction(self._current)
+
+    def allocate(self) -> int:
+        def bump():
+            nonce = self._current()
+            self._write(nonce + 1)
+            return nonce
+        return self._transaction(bump)
+
+    def release(self, nonce: int):
+        def give_back():
+            current = self._read()
+            self._write(nonce if current is not None and nonce == current - 1 else None)
+        self._transaction(give_back)
+
+    def reconcile(self) -> int:
+        def resync():
+            chain = self._chain_nonce()
+            local = self._read()
+            if local != chain:
+                print(f"[Nonce] {self.address}: shared {local} -> chain pending {chain}")
+            self._write(chain)
+            return chain
+        return self._transaction(resync)
+
+
+_managers = {}
+_managers_lock = Lock()
+_shared_path = None
+
+
+def use_shared_store(path: str):
+    """Allocate nonces through SQLite at `path` from now on (call before the first send)."""
+    global _shared_path
+    with _managers_lock:
+        _shared_path = path
+        _managers.clear()
+
+
+def get_nonce_manager(w3: Web3, address: str) -> NonceManager:
+    key = Web3.to_checksum_address(address)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = SharedNonceManager(w3, key, _shared_path) if _shared_path else NonceManager(w3, key)
+        manager.w3 = w3  # follow RPC failover to a new Web3 instance
+        return manager
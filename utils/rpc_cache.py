@@ -0,0 +1,145 @@
+import os
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+
+# Read-only methods whose results are stable within one block
+CACHEABLE_METHODS = {"eth_gasPrice", "eth_call", "eth_chainId", "eth_getBlockByNumber", "eth_blockNumber"}
+# Never changes for a connection; survives block changes
+PERMANENT_METHODS = {"eth_chainId"}
+
+RPC_CACHE_MAX_ENTRIES = int(os.getenv("RPC_CACHE_MAX_ENTRIES", 2048))
+# How often the head is re-checked; Polygon produces a block every ~2s
+BLOCK_POLL_S = float(os.getenv("RPC_CACHE_BLOCK_POLL_S", 2.0))
+
+
+def _as_int(value):
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+class BlockCache:
+    """
+    Memoizes read-only JSON-RPC responses keyed by (method, params) for the
+    current block. The head is polled at most every BLOCK_POLL_S; when it moves,
+    everything except permanent entries is dropped.
+    """
+
+    def __init__(self, max_entries: int = RPC_CACHE_MAX_ENTRIES, block_poll_s: float = BLOCK_POLL_S):
+        self.max_entries = max_entries
+        self.block_poll_s = block_poll_s
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._permanent = {}
+        self._block = None
+        self._block_checked = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "block": self._block,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._permanent.clear()
+            self._block = None
+            self._block_checked = 0.0
+
+    def _observe_block(self, number: int):
+        # caller holds the lock
+        if number != self._block:
+            self._block = number
+            self._entries.clear()
+        self._block_checked = time.monotonic()
+
+    def _refresh_head(self, make_request):
+        with self._lock:
+            if time.monotonic() - self._block_checked < self.block_poll_s:
+                return
+        response = make_request("eth_blockNumber", [])
+        if "result" in response:
+            with self._lock:
+                self._observe_block(_as_int(response["result"]))
+
+    def middleware(self, make_request, w3):
+        def cache_middleware(method, params):
+            if method not in CACHEABLE_METHODS:
+                return make_request(method, params)
+
+            try:
+                key = (method, json.dumps(params, sort_keys=True, default=repr))
+            except (TypeError, ValueError):
+                return make_request(method, params)
+
+            if method in PERMANENT_METHODS:
+                with self._lock:
+                    cached = self._permanent.get(key)
+                    if cached is not None:
+                        self.hits += 1
+                        return cached
+                    self.misses += 1
+                response = make_request(method, params)
+                if "result" in response:
+                    with self._lock:
+                        self._permanent[key] = response
+                return response
+
+            if method == "eth_blockNumber":
+                with self._lock:
+                    fresh = self._block is not None and time.monotonic() - self._block_checked < self.block_poll_s
+                    if fresh:
+                        self.hits += 1
+                        return {"jsonrpc": "2.0", "id": 0, "result": self._block}
+                    self.misses += 1
+                response = make_request(method, params)
+                if "result" in response:
+                    with self._lock:
+                        self._observe_block(_as_int(response["result"]))
+                return response
+
+            # "pending" state changes between blocks; don't pin it
+            if "pending" in params:
+                return make_request(method, params)
+
+            self._refresh_head(make_request)
+            with self._lock:
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return cached
+                self.misses += 1
+                block = self._block
+
+            response = make_request(method, params)
+            if "result" not in response:
+                return response
+            with self._lock:
+                if block != self._block:
+                    return response  # head moved while we were waiting
+                self._entries[key] = response
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            return response
+
+        return cache_middleware
+
+
+# Shared by every Web3 instance rpc_manager hands out
+block_cache = BlockCache()
+
+
+def cache_stats() -> dict:
+    return block_cache.stats()
@@ -0,0 +1,156 @@
+# watch_scheduler.py
+import os
+import time
+import heapq
+import itertools
+from collections import deque
+from threading import Lock
+from typing import Any, Dict, List, Optional
+from state_store import watcher_id
+
+# Never re-poll a watcher sooner / later than this, whatever the prediction says
+SCHED_MIN_INTERVAL_S = float(os.getenv("SCHED_MIN_INTERVAL_S", os.getenv("MAIN_LOOP_SLEEP_S", 60)))
+SCHED_MAX_INTERVAL_S = float(os.getenv("SCHED_MAX_INTERVAL_S", 1800))
+# Wake at this fraction of the predicted time-to-threshold (gas and prices move meanwhile)
+SCHED_SAFETY = float(os.getenv("SCHED_SAFETY", 0.8))
+# pendingReward samples kept per watcher for the accrual-rate fit
+SCHED_SAMPLES = int(os.getenv("SCHED_SAMPLES", 8))
+
+
+class WatchScheduler:
+    """
+    Deadline queue over watchers. After each evaluation the watcher's next poll
+    is predicted from its reward accrual rate (least-squares slope of recent
+    pendingReward samples) and how far it still is from the profitability
+    threshold at current gas. Feed jobs are additionally held back until
+    max(last_update, last_harvest) + min_update_interval.
+    """
+
+    def __init__(self, min_interval: float = SCHED_MIN_INTERVAL_S, max_interval: float = SCHED_MAX_INTERVAL_S,
+                 safety: float = SCHED_SAFETY, samples: int = SCHED_SAMPLES):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.safety = safety
+        self.samples = samples
+        self._lock = Lock()
+        self._heap = []  # (due, seq, key); stale entries are skipped on pop
+        self._seq = itertools.count()
+        self._due = {}
+        self._watchers = {}
+        self._samples = {}
+
+    # ---- membership ----
+    def sync(self, watchers: List[Dict[str, Any]], now: Optional[float] = None):
+        """Track exactly these watchers; new ones are due immediately (or when their feed interval allows)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            keys = set()
+            for watcher in watchers:
+                key = watcher_id(watcher)
+                keys.add(key)
+                self._watchers[key] = watcher
+                if key not in self._due:
+                    self._push(key, max(now, self._earliest(watcher)))
+            for key in set(self._watchers) - keys:
+                self._watchers.pop(key, None)
+                self._due.pop(key, None)
+                self._samples.pop(key, None)
+
+    def _push(self, key: str, due: float):
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, next(self._seq), key))
+
+    @staticmethod
+    def _earliest(watcher: Dict[str, Any]) -> float:
+        interval = watcher.get("min_update_interval")
+        if not interval:
+            return 0.0
+        last = max(float(watcher.get("last_update") or 0), float(watcher.get("last_harvest") or 0))
+        return last + float(interval)
+
+    # ---- queue ----
+    def pop_due(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Watchers whose deadline has passed; they stay unscheduled until observe()/reschedule()."""
+        now = time.time() if now is None else now
+        out = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due, _, key = heapq.heappop(self._heap)
+                if self._due.get(key) != due:
+                    continue
+                del self._due[key]
+                out.append(self._watchers[key])
+        return out
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def reschedule(self, watcher: Dict[str, Any], delay: Optional[float] = None, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        delay = self.min_interval if delay is None else delay
+        key = watcher_id(watcher)
+        with self._lock:
+            if key in self._watchers:
+                self._push(key, max(now + delay, self._earliest(watcher)))
+
+    # ---- prediction ----
+    def accrual_rate(self, watcher: Dict[str, Any]) -> Optional[float]:
+        """Reward tokens per second, or None until there are two usable samples."""
+        with self._lock:
+            pts = list(self._samples.get(watcher_id(watcher), ()))
+        if len(pts) < 2:
+            return None
+        n = len(pts)
+        mean_t = sum(t for t, _ in pts) / n
+        mean_a = sum(a for _, a in pts) / n
+        var = sum((t - mean_t) ** 2 for t, _ in pts)
+        if var <= 0:
+            return None
+        return sum((t - mean_t) * (a - mean_a) for t, a in pts) / var
+
+    def _record(self, key: str, amount: float, now: float):
+        samples = self._samples.setdefault(key, deque(maxlen=self.samples))
+        if samples and amount < samples[-1][1]:
+            samples.clear()  # harvested (by us or someone else) since the last sample
+        samples.append((now, amount))
+
+    def predict_delay(self, watcher: Dict[str, Any], decision: Optional[Dict[str, Any]]) -> float:
+        """Seconds until the watcher is expected to clear its threshold, clamped to [min, max] interval."""
+        if not decision or decision.get("required_reward_usd") is None:
+            return self.min_interval
+        amount = float(decision.get("reward_amount") or 0.0)
+        reward_usd = float(decision.get("reward_usd") or 0.0)
+        missing_usd = float(decision["required_reward_usd"]) - reward_usd
+        rate = self.accrual_rate(watcher)
+        if missing_usd <= 0 or not rate or rate <= 0 or amount <= 0 or reward_usd <= 0:
+            return self.min_interval
+        usd_per_s = rate * (reward_usd / amount)
+        delay = self.safety * missing_usd / usd_per_s
+        return min(self.max_interval, max(self.min_interval, delay))
+
+    def observe(self, watcher: Dict[str, Any], decision: Optional[Dict[str, Any]], harvested: bool = False,
+                now: Optional[float] = None) -> float:
+        """Feed back one evaluation and schedule the next poll; returns the chosen delay."""
+        now = time.time() if now is None else now
+        key = watcher_id(watcher)
+        with self._lock:
+            if harvested:
+                self._samples.pop(key, None)
+            elif decision and decision.get("reward_amount") is not None:
+                self._record(key, float(decision["reward_amount"]), now)
+        delay = self.min_interval if harvested else self.predict_delay(watcher, decision)
+        self.reschedule(watcher, delay, now)
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            due = sorted(self._due.values())
+        return {
+            "watchers": len(self._watchers),
+            "due_now": sum(1 for d in due if d <= now),
+            "next_due_in_s": round(due[0] - now, 1) if due else None,
+        }